@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -25,5 +26,57 @@ RATE_LIMIT_REQUESTS = int(os.getenv('RATE_LIMIT_REQUESTS', 100))
 RATE_LIMIT_PERIOD = int(os.getenv('RATE_LIMIT_PERIOD', 3600))  # In seconds (1 hour)
 
 # PDB File Configuration
-ALLOWED_EXTENSIONS = {'.pdb'}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+ALLOWED_EXTENSIONS = {'.pdb', '.cif', '.bcif'}  # optionally compressed (.gz, .bz2, .xz)
+
+# Memory budget for analyzing a single structure. The upload size limit is derived
+# from it using the peak memory per atom of the columnar (large-file) parser.
+ANALYSIS_MEMORY_BUDGET = int(os.getenv('ANALYSIS_MEMORY_BUDGET', 1024 * 1024 * 1024))  # 1 GB
+ANALYSIS_BYTES_PER_ATOM = 320  # measured peak for parse + bond perception
+PDB_RECORD_BYTES = 81
+MAX_FILE_SIZE = ANALYSIS_MEMORY_BUDGET // ANALYSIS_BYTES_PER_ATOM * PDB_RECORD_BYTES
+
+# Files above this size skip the Bio.PDB object graph and are parsed column by column
+LARGE_FILE_THRESHOLD = int(os.getenv('LARGE_FILE_THRESHOLD', 10 * 1024 * 1024))  # 10 MB
+
+# Worker processes used for all-vs-all batch comparisons
+BATCH_COMPARE_WORKERS = int(os.getenv('BATCH_COMPARE_WORKERS', os.cpu_count() or 1))
+
+# Worker processes used for solvent-accessible surface area, one task per chain
+SASA_WORKERS = int(os.getenv('SASA_WORKERS', os.cpu_count() or 1))
+
+# Parsed structure cache (shared by all sessions in the server process)
+STRUCTURE_CACHE_MAX_BYTES = int(os.getenv('STRUCTURE_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # 512 MB
+
+# On-disk analysis result cache, kept across server restarts (0 disables it)
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'duobody', 'results'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))  # 1 GB
+
+# Docking pipeline (DuoBody page). HDOCKlite executables default to the app directory.
+HDOCK_PATH = os.getenv('HDOCK_PATH', os.path.abspath('hdock'))
+CREATEPL_PATH = os.getenv('CREATEPL_PATH', os.path.abspath('createpl'))
+PRODIGY_PATH = os.getenv('PRODIGY_PATH', 'prodigy')
+PLIP_PATH = os.getenv('PLIP_PATH', 'plip')
+
+# Working directory of background docking jobs, one subdirectory per job. Memory-backed
+# /dev/shm is used when available, since the docking tools write many scratch files.
+DOCKING_WORK_DIR = os.getenv('DOCKING_WORK_DIR', os.path.join(
+    '/dev/shm' if os.access('/dev/shm', os.W_OK) else tempfile.gettempdir(), 'duobody', 'docking'))
+
+# Finished jobs' directories are deleted after this many seconds, or earlier (oldest first)
+# once together they take more than DOCKING_WORK_MAX_BYTES
+DOCKING_JOB_RETENTION = int(os.getenv('DOCKING_JOB_RETENTION', 24 * 3600))  # 1 day
+DOCKING_WORK_MAX_BYTES = int(os.getenv('DOCKING_WORK_MAX_BYTES', 1024 * 1024 * 1024))  # 1 GB
+
+# Cached outputs of docking pipeline stages, keyed by hashes of their inputs and kept
+# across server restarts (an empty directory or a size of 0 disables it)
+STAGE_CACHE_DIR = os.getenv('STAGE_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'duobody', 'stages'))
+STAGE_CACHE_MAX_BYTES = int(os.getenv('STAGE_CACHE_MAX_BYTES', 5 * 1024 * 1024 * 1024))  # 5 GB
+
+# Docking jobs run at the same time; further submissions wait in a queue
+DOCKING_MAX_JOBS = int(os.getenv('DOCKING_MAX_JOBS', 2))
+
+# Worker slots for receptor x antibody screens (one external docking run per slot)
+DOCKING_SCREEN_WORKERS = int(os.getenv('DOCKING_SCREEN_WORKERS', os.cpu_count() or 1))
+
+# Time limit in seconds for docking one receptor-antibody pair (0 for none)
+DOCKING_PAIR_TIMEOUT = int(os.getenv('DOCKING_PAIR_TIMEOUT', 2 * 3600))
@@ -2,13 +2,14 @@ import streamlit as st
 import time
 import os
 import sys
+import pandas as pd
 
 import Welcome
 
 # Add the root directory to the path so we can import from the root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Welcome import is_authenticated, get_user_info
-from utils.pdb_analyzer import PDBAnalyzer
+from utils.pdb_analyzer import get_analyzer
 
 # Set page title
 st.set_page_config(
@@ -28,8 +29,8 @@ if not is_authenticated():
     st.warning("Please log in to access this page.")
     st.stop()
 
-# Initialize the PDB analyzer
-analyzer = PDBAnalyzer()
+# Shared PDB analyzer (one per server process, kept across reruns)
+analyzer = get_analyzer()
 
 # Initialize session state variables
 if 'analysis_result' not in st.session_state:
@@ -38,6 +39,8 @@ if 'comparison_result' not in st.session_state:
     st.session_state.comparison_result = None
 if 'analysis_type' not in st.session_state:
     st.session_state.analysis_type = "single"
+if 'interface_result' not in st.session_state:
+    st.session_state.interface_result = None
 
 # Page content
 st.image("duodok.png", width=100)
@@ -79,7 +82,7 @@ if analysis_type == "Single PDB Analysis":
     # Create tabs for different analysis modes
     analysis_mode = st.radio(
         "Select Analysis Mode:",
-        ["Receptor Only", "Antibody Only"],
+        ["Receptor Only", "Antibody Only", "Receptor-Antibody Interaction"],
         horizontal=True,
         key="analysis_mode_radio"
     )
@@ -89,7 +92,7 @@ if analysis_type == "Single PDB Analysis":
         st.subheader("Upload a Receptor PDB File")
 
         # File upload widget for receptor
-        receptor_file = st.file_uploader("Choose a receptor PDB file", type=["pdb"], key="receptor_file")
+        receptor_file = st.file_uploader("Choose a receptor PDB file", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="receptor_file")
 
         # Receptor file information
         if receptor_file is not None:
@@ -110,8 +113,8 @@ if analysis_type == "Single PDB Analysis":
                             # Reset the file pointer
                             receptor_file.seek(0)
 
-                            # Analyze the file
-                            result = analyzer.analyze_structure(receptor_file)
+                            # Open the analysis; sections are computed as they are displayed
+                            result = analyzer.open_analysis(receptor_file)
                             st.session_state.analysis_result = result
 
                             # Show success message
@@ -124,7 +127,7 @@ if analysis_type == "Single PDB Analysis":
         st.subheader("Upload an Antibody PDB File")
 
         # File upload widget for antibody
-        antibody_file = st.file_uploader("Choose an antibody PDB file", type=["pdb"], key="antibody_file")
+        antibody_file = st.file_uploader("Choose an antibody PDB file", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="antibody_file")
 
         # Antibody file information
         if antibody_file is not None:
@@ -146,8 +149,8 @@ if analysis_type == "Single PDB Analysis":
                             # Reset the file pointer
                             antibody_file.seek(0)
 
-                            # Analyze the file
-                            result = analyzer.analyze_structure(antibody_file)
+                            # Open the analysis; sections are computed as they are displayed
+                            result = analyzer.open_analysis(antibody_file)
                             st.session_state.analysis_result = result
 
                             # Show success message
@@ -163,7 +166,7 @@ if analysis_type == "Single PDB Analysis":
 
         with col1:
             st.write("### Receptor File")
-            receptor_file = st.file_uploader("Choose a receptor PDB file", type=["pdb"], key="ra_receptor_file")
+            receptor_file = st.file_uploader("Choose a receptor PDB file", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="ra_receptor_file")
 
             if receptor_file is not None:
                 st.write(f"📊 Uploaded receptor file: **{receptor_file.name}**")
@@ -176,7 +179,7 @@ if analysis_type == "Single PDB Analysis":
 
         with col2:
             st.write("### Antibody File")
-            antibody_file = st.file_uploader("Choose an antibody PDB file", type=["pdb"], key="ra_antibody_file")
+            antibody_file = st.file_uploader("Choose an antibody PDB file", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="ra_antibody_file")
 
             if antibody_file is not None:
                 st.write(f"📊 Uploaded antibody file: **{antibody_file.name}**")
@@ -206,9 +209,9 @@ if analysis_type == "Single PDB Analysis":
                             receptor_file.seek(0)
                             antibody_file.seek(0)
 
-                            # Compare the structures
-                            comparison = analyzer.compare_structures(receptor_file, antibody_file)
-                            st.session_state.comparison_result = comparison
+                            # Find the contacts across the interface
+                            interface = analyzer.analyze_interface(receptor_file, antibody_file)
+                            st.session_state.interface_result = interface
                             st.session_state.analysis_result = None  # Clear single analysis result
 
                             # Show success message
@@ -216,6 +219,64 @@ if analysis_type == "Single PDB Analysis":
                         except Exception as e:
                             st.error(f"Error during analysis: {str(e)}")
 
+        # Display interface results
+        if st.session_state.interface_result is not None:
+            interface = st.session_state.interface_result
+            st.subheader("Interface Contacts")
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Atom Contacts", interface["contact_count"])
+            with col2:
+                st.metric("Receptor Interface Residues", len(interface["receptor_residues"]))
+            with col3:
+                st.metric("Antibody Interface Residues", len(interface["antibody_residues"]))
+
+            st.write(f"Contact cutoff: **{interface['cutoff']:.1f} Å** (heavy atoms, waters excluded)")
+            st.write(f"Buried atoms: **{interface['buried_atoms']['receptor']}** receptor, "
+                     f"**{interface['buried_atoms']['antibody']}** antibody")
+            for chain_pair, count in interface["chain_contacts"].items():
+                st.write(f"- Chains {chain_pair}: **{count}** atom contacts")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("### Receptor Interface Residues")
+                st.dataframe(interface["receptor_residues"], use_container_width=True, hide_index=True)
+            with col2:
+                st.write("### Antibody Interface Residues")
+                st.dataframe(interface["antibody_residues"], use_container_width=True, hide_index=True)
+
+            st.write("### Residue Contacts")
+            st.dataframe(interface["residue_contacts"], use_container_width=True, hide_index=True)
+
+            if interface.get("sasa") is not None:
+                sasa = interface["sasa"]
+                st.write("### Buried Surface Area")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Total BSA (Å²)", f"{sasa['buried_surface_area']:.1f}")
+                with col2:
+                    st.metric("Receptor ΔSASA (Å²)", f"{sasa['receptor_buried']:.1f}")
+                with col3:
+                    st.metric("Antibody ΔSASA (Å²)", f"{sasa['antibody_buried']:.1f}")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    receptor_sasa = sasa["receptor"]
+                    st.dataframe(receptor_sasa[receptor_sasa["delta_sasa"] > 0].round(1),
+                                 use_container_width=True, hide_index=True)
+                with col2:
+                    antibody_sasa = sasa["antibody"]
+                    st.dataframe(antibody_sasa[antibody_sasa["delta_sasa"] > 0].round(1),
+                                 use_container_width=True, hide_index=True)
+
+            st.download_button(
+                label="Download Residue Contacts (CSV)",
+                data=interface["residue_contacts"].to_csv(index=False),
+                file_name="interface_contacts.csv",
+                mime="text/csv"
+            )
+
     # Display analysis results
     if st.session_state.analysis_result is not None and st.session_state.analysis_type == "single":
         st.subheader("Analysis Results")
@@ -244,24 +305,46 @@ if analysis_type == "Single PDB Analysis":
         st.write(f"Number of unique residue types: **{len(result['residue_types'])}**")
         st.write(f"Residue types: **{', '.join(sorted(result['residue_types']))}**")
 
-        # Bond information
-        if result["bond_lengths"]:
+        # Bond information, computed only once the panel is switched on
+        bond_stats = None
+        if st.toggle("Show bond statistics", key="show_bond_statistics"):
+            with st.spinner("Perceiving bonds..."):
+                bond_stats = result.get("bond_stats")
+        if bond_stats is not None and bond_stats["count"] > 0:
             st.write("### Bond Statistics")
 
-            # Calculate average bond length
-            avg_bond_length = sum(bond["distance"] for bond in result["bond_lengths"]) / len(result["bond_lengths"])
-
-            # Find min and max bond lengths
-            min_bond = min(result["bond_lengths"], key=lambda x: x["distance"])
-            max_bond = max(result["bond_lengths"], key=lambda x: x["distance"])
+            # Summaries are computed alongside the distances
+            min_bond = bond_stats["min_bond"]
+            max_bond = bond_stats["max_bond"]
 
-            st.write(f"Average bond length: **{avg_bond_length:.3f} Å**")
+            st.write(f"Average bond length: **{bond_stats['mean']:.3f} Å** "
+                     f"(σ = {bond_stats['std']:.3f} Å over {bond_stats['count']} bonds)")
             st.write(f"Minimum bond length: **{min_bond['distance']:.3f} Å** "
                      f"({min_bond['atom1']}-{min_bond['atom2']} in {min_bond['residue']} of chain {min_bond['chain']})")
             st.write(f"Maximum bond length: **{max_bond['distance']:.3f} Å** "
                      f"({max_bond['atom1']}-{max_bond['atom2']} in {max_bond['residue']} of chain {max_bond['chain']})")
 
-        # Add download button for report
+            if result.get("bond_counts"):
+                bond_counts = result["bond_counts"]
+                st.write(f"Covalent bonds: **{bond_counts['total']}** "
+                         f"({bond_counts['inter_residue']} between residues, "
+                         f"{bond_counts['disulfide']} disulfide)")
+
+        # Secondary structure, computed only once the panel is switched on
+        secondary = None
+        if st.toggle("Show secondary structure", key="show_secondary_structure"):
+            with st.spinner("Assigning secondary structure..."):
+                secondary = result.get("secondary_structure")
+        if secondary is not None and secondary["chains"]:
+            st.write("### Secondary Structure")
+            fractions = pd.DataFrame(secondary["chains"]).T.rename(
+                columns={"H": "Helix (H)", "E": "Strand (E)", "C": "Coil (C)"})
+            st.dataframe((fractions * 100).round(1), use_container_width=True)
+            for chain_id, chain_residues in secondary["residues"].groupby("chain", sort=False, observed=True):
+                st.write(f"Chain {chain_id}:")
+                st.code("".join(chain_residues["ss"]))
+
+        # Add download button for report (with the panels opened above)
         report = f"""
         # PDB Structure Analysis Report
 
@@ -287,18 +370,29 @@ if analysis_type == "Single PDB Analysis":
         - Residue types: {', '.join(sorted(result['residue_types']))}
         """
 
-        if result["bond_lengths"]:
-            avg_bond_length = sum(bond["distance"] for bond in result["bond_lengths"]) / len(result["bond_lengths"])
-            min_bond = min(result["bond_lengths"], key=lambda x: x["distance"])
-            max_bond = max(result["bond_lengths"], key=lambda x: x["distance"])
-
+        if bond_stats is not None and bond_stats["count"] > 0:
             report += f"""
         ## Bond Statistics
-        - Average bond length: {avg_bond_length:.3f} Å
+        - Average bond length: {bond_stats['mean']:.3f} Å (standard deviation {bond_stats['std']:.3f} Å, {bond_stats['count']} bonds)
         - Minimum bond length: {min_bond['distance']:.3f} Å ({min_bond['atom1']}-{min_bond['atom2']} in {min_bond['residue']} of chain {min_bond['chain']})
         - Maximum bond length: {max_bond['distance']:.3f} Å ({max_bond['atom1']}-{max_bond['atom2']} in {max_bond['residue']} of chain {max_bond['chain']})
             """
 
+            if result.get("bond_counts"):
+                bond_counts = result["bond_counts"]
+                report += f"""
+        - Covalent bonds: {bond_counts['total']} ({bond_counts['inter_residue']} between residues, {bond_counts['disulfide']} disulfide)
+            """
+
+        if secondary is not None and secondary["chains"]:
+            report += """
+        ## Secondary Structure
+        """
+            for chain_id, fractions in secondary["chains"].items():
+                report += f"""
+        - Chain {chain_id}: {fractions['H']:.1%} helix, {fractions['E']:.1%} strand, {fractions['C']:.1%} coil
+            """
+
         st.download_button(
             label="Download Report",
             data=report,
@@ -314,7 +408,7 @@ else:  # Comparison analysis
 
     with col1:
         st.write("### First PDB File")
-        file1 = st.file_uploader("Choose first PDB file", type=["pdb"], key="file1")
+        file1 = st.file_uploader("Choose first PDB file", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="file1")
 
         if file1 is not None:
             st.write(f"Uploaded file: **{file1.name}**")
@@ -327,7 +421,7 @@ else:  # Comparison analysis
 
     with col2:
         st.write("### Second PDB File")
-        file2 = st.file_uploader("Choose second PDB file", type=["pdb"], key="file2")
+        file2 = st.file_uploader("Choose second PDB file", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="file2")
 
         if file2 is not None:
             st.write(f"Uploaded file: **{file2.name}**")
@@ -422,6 +516,41 @@ else:  # Comparison analysis
                 with col2:
                     st.metric("Atom Count Difference", chain_data['atom_count_diff'])
 
+        # Superposition
+        superposition = comparison.get("superposition")
+        if superposition:
+            st.write("### Structural Superposition")
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.metric("Global RMSD (Cα)", f"{superposition['rmsd']:.3f} Å")
+
+            with col2:
+                st.metric("Aligned Residues", superposition['aligned_residues'])
+
+            chain_rows = [
+                {
+                    "Chain": chain_id,
+                    "Aligned Residues": chain_data['aligned_residues'],
+                    "Sequence Identity": f"{chain_data['sequence_identity']:.1%}",
+                    "RMSD (Å)": round(chain_data['rmsd'], 3) if chain_data['rmsd'] is not None else None
+                }
+                for chain_id, chain_data in superposition['chains'].items()
+            ]
+            st.dataframe(pd.DataFrame(chain_rows), use_container_width=True, hide_index=True)
+
+            # Per-residue deviation, one line per chain of structure 1
+            deviation = pd.DataFrame({
+                "Chain": superposition['residue_chain'],
+                "Residue": superposition['residue_seq'],
+                "Deviation (Å)": superposition['residue_deviation']
+            }).pivot_table(index="Residue", columns="Chain", values="Deviation (Å)")
+            st.write("#### Per-Residue Deviation After Superposition")
+            st.line_chart(deviation, x_label="Residue", y_label="Deviation (Å)")
+        else:
+            st.info("No equivalent residues could be aligned between the two structures.")
+
         # Generate and download report
         report = analyzer.generate_report(comparison)
 
@@ -481,6 +610,14 @@ if st.session_state.analysis_result is not None or st.session_state.comparison_r
         Identifying these features can help you understand the biological function of your protein.
         """)
 
+        # Secondary structure content of the analyzed structure
+        result = st.session_state.analysis_result
+        secondary = result.get("secondary_structure") if result is not None and result.computed("secondary_structure") else None
+        if secondary is not None and secondary["chains"]:
+            for chain_id, fractions in secondary["chains"].items():
+                st.write(f"Chain {chain_id}: **{fractions['H']:.1%}** α-helix, "
+                         f"**{fractions['E']:.1%}** β-strand, **{fractions['C']:.1%}** coil")
+
         # Add interactive elements
         st.info(
             "💡 **Pro Tip**: Secondary structures often correlate with protein function. α-helices are common in membrane proteins, while β-sheets are prevalent in structural proteins.")
@@ -6,12 +6,13 @@ import Welcome
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from io import BytesIO
 
 # Add the root directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Welcome import is_authenticated, get_user_info, logout
-from utils.pdb_analyzer import PDBAnalyzer
+from utils.pdb_analyzer import get_analyzer
 
 # Set page configuration
 st.set_page_config(
@@ -33,8 +34,8 @@ if not is_authenticated():
     st.warning("Please log in to access this page.")
     st.stop()
 
-# Initialize analyzer
-analyzer = PDBAnalyzer()
+# Shared analyzer (one per server process, kept across reruns)
+analyzer = get_analyzer()
 
 # Session state management
 if 'analysis_result' not in st.session_state:
@@ -43,6 +44,8 @@ if 'comparison_result' not in st.session_state:
     st.session_state.comparison_result = None
 if 'analysis_type' not in st.session_state:
     st.session_state.analysis_type = "single"
+if 'batch_result' not in st.session_state:
+    st.session_state.batch_result = None
 
 
 # Visualization functions
@@ -57,12 +60,14 @@ def create_residue_chart(chain_data):
     return fig
 
 
-def create_bond_histogram(bond_data):
-    """Create bond length distribution histogram"""
-    bond_lengths = [bond['distance'] for bond in bond_data]
-    fig = px.histogram(bond_lengths, nbins=20,
-                       labels={'value': 'Bond Length (Å)'},
-                       title='Bond Length Distribution')
+def create_bond_histogram(bond_stats):
+    """Create bond length distribution histogram from precomputed bin counts"""
+    edges = bond_stats['edges']
+    df = pd.DataFrame({'Bond Length (Å)': (edges[:-1] + edges[1:]) / 2, 'Bonds': bond_stats['histogram']})
+    df = df[df['Bonds'] > 0]
+    fig = px.bar(df, x='Bond Length (Å)', y='Bonds',
+                 title='Bond Length Distribution')
+    fig.update_traces(width=float(edges[1] - edges[0]))
     fig.update_layout(showlegend=False)
     return fig
 
@@ -112,6 +117,29 @@ def create_comparison_visualizations(comparison_data):
     return fig1, fig2
 
 
+def create_deviation_chart(superposition):
+    """Create per-residue deviation line chart after superposition"""
+    df = pd.DataFrame({
+        'Chain': superposition['residue_chain'],
+        'Residue': superposition['residue_seq'],
+        'Deviation (Å)': superposition['residue_deviation']
+    })
+    fig = px.line(df, x='Residue', y='Deviation (Å)', color='Chain',
+                  title='Per-Residue Deviation After Superposition')
+    return fig
+
+
+def create_similarity_heatmap(batch):
+    """Create clustered heatmap of an all-vs-all comparison matrix"""
+    order = batch['order']
+    labels = [batch['labels'][i] for i in order]
+    matrix = batch['matrix'][np.ix_(order, order)]
+    title = 'Cα RMSD (Å)' if batch['metric'] == 'rmsd' else 'TM-like Score'
+    fig = px.imshow(matrix, x=labels, y=labels, color_continuous_scale='Viridis',
+                    labels={'color': title}, title=f'All-vs-All {title} (clustered)')
+    return fig
+
+
 # Main application layout
 st.image("duodok.png", width=100)
 st.title("🔬PDB Structure Analysis Visualization")
@@ -135,7 +163,7 @@ with st.sidebar:
 # Analysis type selection
 analysis_type = st.radio(
     "Select Analysis Mode:",
-    ["Single Structure Analysis", "Structure Comparison"],
+    ["Single Structure Analysis", "Structure Comparison", "Batch Comparison"],
     horizontal=True,
     key="analysis_type_selector"
 )
@@ -144,7 +172,7 @@ analysis_type = st.radio(
 if analysis_type == "Single Structure Analysis":
     st.header("Single Structure Analysis")
 
-    uploaded_file = st.file_uploader("Upload PDB File", type=["pdb"])
+    uploaded_file = st.file_uploader("Upload PDB File", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"])
 
     if uploaded_file:
         st.subheader("File Details")
@@ -156,7 +184,8 @@ if analysis_type == "Single Structure Analysis":
         if st.button("Analyze Structure"):
             with st.spinner("Analyzing structure..."):
                 try:
-                    result = analyzer.analyze_structure(uploaded_file)
+                    # Sections are computed as the panels below read them
+                    result = analyzer.open_analysis(uploaded_file)
                     st.session_state.analysis_result = result
                     st.success("Analysis completed!")
                 except Exception as e:
@@ -177,8 +206,8 @@ if analysis_type == "Single Structure Analysis":
                 st.plotly_chart(create_residue_pie(result["residue_counts"]), use_container_width=True)
 
         with viz_col2:
-            if result.get("bond_lengths"):
-                st.plotly_chart(create_bond_histogram(result["bond_lengths"]), use_container_width=True)
+            if result.get("bond_stats") is not None and result["bond_stats"]["count"] > 0:
+                st.plotly_chart(create_bond_histogram(result["bond_stats"]), use_container_width=True)
 
         # Textual results
         st.subheader("Structural Details")
@@ -217,14 +246,14 @@ if analysis_type == "Single Structure Analysis":
             mime="text/markdown"
         )
 # Structure comparison analysis
-else:
+elif analysis_type == "Structure Comparison":
     st.header("Structure Comparison")
 
     col1, col2 = st.columns(2)
     with col1:
-        file1 = st.file_uploader("Upload First PDB", type=["pdb"], key="file1")
+        file1 = st.file_uploader("Upload First PDB", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="file1")
     with col2:
-        file2 = st.file_uploader("Upload Second PDB", type=["pdb"], key="file2")
+        file2 = st.file_uploader("Upload Second PDB", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"], key="file2")
 
     if file1 and file2:
         if st.button("Compare Structures"):
@@ -247,6 +276,30 @@ else:
         if fig2:
             st.plotly_chart(fig2, use_container_width=True)
 
+        # Superposition results
+        superposition = comp.get('superposition')
+        if superposition:
+            st.subheader("Structural Superposition")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Global RMSD (Cα)", f"{superposition['rmsd']:.3f} Å")
+            with col2:
+                st.metric("Aligned Residues", superposition['aligned_residues'])
+
+            chain_rows = [
+                {
+                    'Chain': chain_id,
+                    'Aligned Residues': chain_data['aligned_residues'],
+                    'Sequence Identity': f"{chain_data['sequence_identity']:.1%}",
+                    'RMSD (Å)': round(chain_data['rmsd'], 3) if chain_data['rmsd'] is not None else None
+                }
+                for chain_id, chain_data in superposition['chains'].items()
+            ]
+            st.dataframe(pd.DataFrame(chain_rows), use_container_width=True, hide_index=True)
+            st.plotly_chart(create_deviation_chart(superposition), use_container_width=True)
+        else:
+            st.info("No equivalent residues could be aligned between the two structures.")
+
         # Textual results
 #        st.subheader("Detailed Comparison")
 #        col1, col2 = st.columns(2)
@@ -282,6 +335,12 @@ else:
         - Residue Count Difference: {comp.get('residue_count_diff', 'N/A')}
         - Atom Count Difference: {comp.get('atom_count_diff', 'N/A')}
         """
+        if superposition:
+            report += f"""
+        ## Superposition
+        - Aligned Residues: {superposition['aligned_residues']}
+        - Global RMSD (Cα): {superposition['rmsd']:.3f} Å
+        """
 
         st.download_button(
             label="Download Comparison Report",
@@ -290,6 +349,50 @@ else:
             mime="text/markdown"
         )
 
+# Batch comparison of many structures
+else:
+    st.header("Batch Comparison")
+
+    batch_files = st.file_uploader("Upload Structures", type=["pdb", "cif", "bcif", "gz", "bz2", "xz"],
+                                   accept_multiple_files=True, key="batch_files")
+    metric = st.radio("Similarity Metric", ["Cα RMSD", "TM-like Score"], horizontal=True)
+
+    if batch_files and len(batch_files) >= 2:
+        if st.button("Compare All Pairs"):
+            # Invalid files are reported one by one and left out of the comparison
+            valid_files = []
+            for batch_file in batch_files:
+                is_valid, message = analyzer.validate_file(batch_file)
+                if is_valid:
+                    valid_files.append(batch_file)
+                else:
+                    st.error(f"{batch_file.name}: {message}")
+
+            if len(valid_files) < 2:
+                st.warning("At least two valid structures are needed for a batch comparison.")
+            else:
+                with st.spinner(f"Comparing {len(valid_files)} structures..."):
+                    try:
+                        batch = analyzer.compare_batch(valid_files, metric="rmsd" if metric == "Cα RMSD" else "tm_score")
+                        st.session_state.batch_result = batch
+                        st.success("Batch comparison completed!")
+                    except Exception as e:
+                        st.error(f"Batch comparison failed: {str(e)}")
+    elif batch_files:
+        st.info("Upload at least two structures to compare.")
+
+    if st.session_state.batch_result:
+        batch = st.session_state.batch_result
+        st.plotly_chart(create_similarity_heatmap(batch), use_container_width=True)
+
+        matrix_df = pd.DataFrame(batch['matrix'], index=batch['labels'], columns=batch['labels'])
+        st.download_button(
+            label="Download Matrix (CSV)",
+            data=matrix_df.to_csv(),
+            file_name=f"pdb_{batch['metric']}_matrix.csv",
+            mime="text/csv"
+        )
+
 # Help section
 with st.expander("Analysis Guide"):
     st.markdown("""
@@ -8,6 +8,7 @@ import shutil
 import pandas as pd
 import Welcome
 import logging
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -16,6 +17,8 @@ logger = logging.getLogger()
 # Add the root directory to the path so we can import from the root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Welcome import is_authenticated
+from utils.docking import get_docking_jobs, JobExpiredError, DOCKING_STAGES, STAGE_LABELS
+from config import DOCKING_PAIR_TIMEOUT
 
 # Set page title
 st.set_page_config(
@@ -313,90 +316,205 @@ with st.sidebar:
 #            Welcome.logout()
 #            st.rerun()
 
-def run_command(command):
-    try:
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
-        return result.stdout, result.stderr
-    except Exception as e:
-        return None, str(e)
+# Seconds between status refreshes while a docking job is running
+DOCKING_POLL_SECONDS = 2
+
+STATUS_ICONS = {"pending": "⏳", "running": "🔄", "cached": "♻️", "done": "✅", "failed": "❌", "skipped": "⏭️"}
+
+docking_jobs = get_docking_jobs()
+owner = user_info.get('email') if user_info else None
+
+# Job and screen IDs survive reruns in session state, and page reloads in the URL
+if 'docking_job_id' not in st.session_state:
+    st.session_state.docking_job_id = st.query_params.get("job")
+if 'docking_screen_id' not in st.session_state:
+    st.session_state.docking_screen_id = st.query_params.get("screen")
+
+
+def show_job_progress(job):
+    """Overall progress bar and the status of each pipeline stage"""
+    current = job.current_stage
+    text = f"Running {STAGE_LABELS[current]}..." if current else job.status.capitalize()
+    st.progress(job.progress, text=text)
+    for stage in DOCKING_STAGES:
+        info = job.stages[stage]
+        if info["status"] == "running":
+            detail = f"running for {time.time() - info['started']:.0f} s"
+        elif info["status"] == "cached":
+            detail = "reused from an earlier run"
+        elif info["seconds"] is not None:
+            detail = f"{info['status']} in {info['seconds']:.1f} s"
+        else:
+            detail = info["status"]
+        st.write(f"{STATUS_ICONS[info['status']]} {STAGE_LABELS[stage]} — {detail}")
 
 
-# Streamlit app UI
-st.title("Protein Complex Docking Pipeline")
+def show_job_results(job):
+    """Outcome, binding affinity, complex download and stage outputs of a finished job"""
+    if job.status == "failed":
+        st.error(f"Docking failed: {job.error}")
+    else:
+        st.success("Docking pipeline completed!")
+
+    affinity = job.binding_affinity
+    if affinity:
+        st.metric("Predicted Binding Affinity", affinity)
+
+    complex_path = job.output_path("complex.pdb")
+    if complex_path:
+        with open(complex_path, "rb") as f:
+            st.download_button("Download Complex (PDB)", f.read(), file_name="complex.pdb",
+                               mime="chemical/x-pdb")
+
+    for stage in DOCKING_STAGES:
+        info = job.stages[stage]
+        if info["stdout"] or info["stderr"]:
+            with st.expander(f"{STAGE_LABELS[stage]} Output"):
+                if info["stdout"]:
+                    st.code(info["stdout"])
+                if info["stderr"]:
+                    st.code(info["stderr"])
+
+
+@st.fragment(run_every=DOCKING_POLL_SECONDS)
+def poll_docking_job(job_id):
+    """Refresh the progress of a running job; rerun the page once it finishes
+
+    The page also reruns when the job is gone (expired, or lost with a
+    server restart) and reports it as no longer available.
+    """
+    job = docking_jobs.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    show_job_progress(job)
 
-st.header("Step 1: Upload Receptor and Antibody PDB Files")
-receptor_file = st.file_uploader("Upload Receptor PDB", type=["pdb"])
-antibody_file = st.file_uploader("Upload Antibody PDB", type=["pdb"])
 
-if receptor_file and antibody_file:
-    st.write("Receptor and Antibody files uploaded successfully!")
+def show_screen(screen_id):
+    """Progress and the results table of a screen, filled in as pairs finish"""
+    results = docking_jobs.screen_results(screen_id)
+    finished = results["Status"].isin(["completed", "failed", "timed out"]).sum()
+    st.progress(finished / len(results), text=f"{finished} of {len(results)} pairs finished")
+    st.dataframe(results.sort_values("Binding Affinity (kcal/mol)", na_position="last"),
+                 hide_index=True, use_container_width=True)
+    return results, finished == len(results)
 
-    # Save files locally for processing
-    receptor_path = "./receptor.pdb"
-    antibody_path = "./antibody.pdb"
 
-    with open(receptor_path, "wb") as f:
-        f.write(receptor_file.getbuffer())
+@st.fragment(run_every=DOCKING_POLL_SECONDS)
+def poll_docking_screen(screen_id):
+    """Refresh a running screen; rerun the page once every pair has finished, or once it is gone"""
+    if docking_jobs.get_screen(screen_id) is None:
+        st.rerun()
+    _, done = show_screen(screen_id)
+    if done:
+        st.rerun()
 
-    with open(antibody_path, "wb") as f:
-        f.write(antibody_file.getbuffer())
 
-    st.header("Step 2: Run Docking with hDock")
+def read_chains(label_one, label_two, values=("", "")):
+    """Receptor and antibody chain inputs, side by side"""
+    col1, col2 = st.columns(2)
+    with col1:
+        chain_one = st.text_input(label_one, value=values[0])
+    with col2:
+        chain_two = st.text_input(label_two, value=values[1])
+    return chain_one.strip(), chain_two.strip()
 
-    # Run the hDock command to create the complex
-    hdock_command = f"./hdock {receptor_path} {antibody_path} -out hdock.out"
-    stdout, stderr = run_command(hdock_command)
 
-    if stderr:
-        st.error(f"Error running hDock: {stderr}")
+def attach(kind, value):
+    """Remember the job or screen this session is showing, in session state and the URL"""
+    st.session_state[f"docking_{kind}_id"] = value
+    if value:
+        st.query_params[kind] = value
     else:
-        st.success("hDock completed successfully!")
-        st.write("hDock Output:", stdout)
+        st.query_params.pop(kind, None)
+    st.rerun()
 
-        # Now create the complex file
-        createpl_command = f"./createpl Hdock.out complex_name -nmax 1 -complex -models"
-        stdout, stderr = run_command(createpl_command)
 
-        if stderr:
-            st.error(f"Error running createpl: {stderr}")
-        else:
-            st.success("Complex file created successfully!")
-            st.write("Createpl Output:", stdout)
-
-            # Step 3: Run Prodigy for Binding Energy Calculation
-            st.header("Step 3: Run Prodigy Binding Energy Calculator")
-            complex_pdb_path = "./complex_name_complex.pdb"  # Assuming the complex is saved with this name
-            chain_one = st.text_input("Enter Chain Name for Receptor (e.g., A)")
-            chain_two = st.text_input("Enter Chain Name for Antibody (e.g., B)")
-
-            if chain_one and chain_two:
-                prodigy_command = f"prodigy {complex_pdb_path} --selection {chain_one} {chain_two}"
-                stdout, stderr = run_command(prodigy_command)
-
-                if stderr:
-                    st.error(f"Error running Prodigy: {stderr}")
-                else:
-                    st.success("Prodigy calculation completed!")
-                    st.write("Prodigy Output:", stdout)
-
-                    # Step 4: Run PLIP Analysis
-                    st.header("Step 4: Run PLIP Analysis")
-                    plip_command = f"plip -i {complex_pdb_path} -o plip_results/"
-                    stdout, stderr = run_command(plip_command)
-
-                    if stderr:
-                        st.error(f"Error running PLIP: {stderr}")
-                    else:
-                        st.success("PLIP analysis completed!")
-                        st.write("PLIP Output:", stdout)
-
-                        # Step 5: Show Results
-                        st.header("Final Results")
-                        # Optionally, you can parse the outputs and display them in a more structured way
-                        # For example, parsing Prodigy binding energy results or PLIP interactions
-                        st.write("Binding Energy and PLIP Results are ready!")
+# Streamlit app UI
+st.title("Protein Complex Docking Pipeline")
+
+job = docking_jobs.get(st.session_state.docking_job_id) if st.session_state.docking_job_id else None
+if job is not None and job.owner != owner:
+    job = None
+screen = docking_jobs.get_screen(st.session_state.docking_screen_id) if st.session_state.docking_screen_id else None
+if screen is not None and screen.owner != owner:
+    screen = None
+if (st.session_state.docking_job_id and job is None) or (st.session_state.docking_screen_id and screen is None):
+    st.info("Results of finished dockings are kept for a limited time; that one is no longer available.")
+    st.session_state.docking_job_id = st.session_state.docking_screen_id = None
+    st.query_params.pop("job", None)
+    st.query_params.pop("screen", None)
+
+if screen is not None:
+    st.header("Docking Screen")
+    st.caption(f"Screen ID: {screen.screen_id} · {len(screen.pairs)} pairs · chains {' / '.join(screen.chains)}")
+    st.info("Pairs dock in parallel in the background. You can leave this page and come back to it later.")
+    results = docking_jobs.screen_results(screen.screen_id)
+    if results["Status"].isin(["queued", "running"]).any():
+        poll_docking_screen(screen.screen_id)
+    else:
+        show_screen(screen.screen_id)
+        st.download_button("Download Results (CSV)", results.to_csv(index=False), file_name="docking_screen.csv",
+                           mime="text/csv")
+
+    if st.button("New Screen"):
+        attach("screen", None)
+elif job is not None:
+    st.header("Docking Job")
+    st.caption(f"Job ID: {job.job_id} · chains {' / '.join(job.chains)}")
+    if job.done:
+        show_job_progress(job)
+        show_job_results(job)
+
+        # Only PRODIGY depends on the chains, so the other stages come from the cache
+        st.subheader("Change Chain Selection")
+        chains = read_chains("Receptor Chain", "Antibody Chain", job.chains)
+        if st.button("Re-run PRODIGY"):
+            if all(chains):
+                try:
+                    attach("job", docking_jobs.resubmit(job.job_id, chains))
+                except JobExpiredError as e:
+                    st.error(f"{e}. Please upload the structures again to start a new docking.")
+            else:
+                st.warning("Please enter a chain name for both the receptor and the antibody.")
+    else:
+        st.info("Docking runs in the background. You can leave this page and come back to it later.")
+        poll_docking_job(job.job_id)
+
+    if st.button("New Docking"):
+        attach("job", None)
 else:
-    st.warning("Please upload both the Receptor and Antibody PDB files.")
+    mode = st.radio("Mode", ["Single Pair", "Screening"], horizontal=True,
+                    help="Screening docks every selected receptor against every selected antibody in parallel.")
+    multiple = mode == "Screening"
+
+    st.header("Step 1: Upload Receptor and Antibody PDB Files")
+    receptor_files = st.file_uploader("Upload Receptor PDB", type=["pdb"], accept_multiple_files=multiple)
+    antibody_files = st.file_uploader("Upload Antibody PDB", type=["pdb"], accept_multiple_files=multiple)
+    if not multiple:
+        receptor_files = [receptor_files] if receptor_files else []
+        antibody_files = [antibody_files] if antibody_files else []
+
+    st.header("Step 2: Select Chains for PRODIGY")
+    chains = read_chains("Enter Chain Name for Receptor (e.g., A)", "Enter Chain Name for Antibody (e.g., B)")
+
+    if multiple:
+        timeout_minutes = st.number_input("Time Limit per Pair (minutes)", min_value=0,
+                                          value=DOCKING_PAIR_TIMEOUT // 60,
+                                          help="Pairs still docking after this long are stopped. 0 means no limit.")
+
+    if st.button("Run Screen" if multiple else "Run Docking", type="primary"):
+        if not (receptor_files and antibody_files):
+            st.warning("Please upload both the Receptor and Antibody PDB files.")
+        elif not all(chains):
+            st.warning("Please enter a chain name for both the receptor and the antibody.")
+        elif multiple:
+            attach("screen", docking_jobs.submit_screen(
+                {f.name: f.getvalue() for f in receptor_files},
+                {f.name: f.getvalue() for f in antibody_files},
+                chains, owner, timeout_minutes * 60))
+        else:
+            attach("job", docking_jobs.submit(receptor_files[0].getvalue(), antibody_files[0].getvalue(),
+                                              chains, owner))
 
 # Information section
 st.header("About DuoDok Analysis")
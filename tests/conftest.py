@@ -0,0 +1,16 @@
+import gzip
+import io
+import os
+import pytest
+from Bio.PDB import PDBParser
+from utils.structure_arrays import StructureArrays
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture(scope="session")
+def beg_arrays():
+    """2BEG (five stacked amyloid-beta strands) as frozen StructureArrays"""
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rt") as f:
+        structure = PDBParser(QUIET=True).get_structure("2BEG", io.StringIO(f.read()))
+    return StructureArrays.from_structure(structure).freeze()
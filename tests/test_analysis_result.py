@@ -0,0 +1,67 @@
+import pickle
+import pandas as pd
+import pytest
+from utils.analysis_result import AnalysisHandle, ChainSummary, StructureAnalysis
+
+
+def analysis(beg_arrays):
+    return StructureAnalysis.from_summary("2BEG", beg_arrays.summary())
+
+
+def test_fields_read_by_key_and_attribute(beg_arrays):
+    info = analysis(beg_arrays)
+    assert info["residue_count"] == info.residue_count == 130
+    assert info["atom_count"] == 1855
+    assert info["chains"]["A"] == ChainSummary(residue_count=26, atom_count=371)
+    assert "bond_stats" in info and info.get("bond_stats") is None
+    assert "_bond_loader" not in info
+    with pytest.raises(KeyError):
+        info["missing"]
+
+    info["filename"] = "2BEG.pdb"
+    assert info.filename == "2BEG.pdb"
+
+
+def test_keys_cover_every_public_field(beg_arrays):
+    assert analysis(beg_arrays).keys() == [
+        "structure_id", "number_of_models", "chains", "residue_count", "atom_count", "residue_types",
+        "bond_stats", "bond_counts", "secondary_structure", "filename", "bond_lengths"
+    ]
+
+
+def test_bond_lengths_are_built_once_on_first_read(beg_arrays):
+    info = analysis(beg_arrays)
+    calls = []
+    frame = pd.DataFrame({"distance": [1.5]})
+    info.set_bond_loader(lambda: calls.append(1) or frame)
+    assert not calls
+    assert info["bond_lengths"] is frame
+    assert info.bond_lengths is frame
+    assert calls == [1]
+
+
+def test_pickling_drops_the_bond_loader(beg_arrays):
+    info = analysis(beg_arrays)
+    info.set_bond_loader(lambda: pd.DataFrame({"distance": [1.5]}))
+    copy = pickle.loads(pickle.dumps(info))
+    assert copy.bond_lengths is None
+    assert copy.chains == info.chains
+    assert copy.residue_types == info.residue_types
+
+
+def test_handle_computes_sections_on_first_read():
+    calls = []
+
+    def chains():
+        calls.append("chains")
+        return {"chains": {"A": ChainSummary(residue_count=2, atom_count=3)}}
+
+    handle = AnalysisHandle({"chains": chains, "bonds": lambda: calls.append("bonds")}, filename="one.pdb")
+    assert not handle.computed("chains")
+    assert handle["chains"]["A"].atom_count == 3
+    assert handle.get("chains") is handle["chains"]
+    assert handle["filename"] == "one.pdb"
+    assert calls == ["chains"]
+    assert handle.computed("chains") and not handle.computed("bonds")
+    with pytest.raises(KeyError):
+        handle.section("geometry")
@@ -0,0 +1,86 @@
+import io
+import numpy as np
+import pytest
+import utils.batch_compare as batch_compare
+from utils.batch_compare import pool_pays_off, similarity_matrix, cluster_order, pack_traces, unpack_traces
+from utils.superposition import ca_trace
+from utils.pdb_analyzer import PDBAnalyzer
+
+
+PDB = ("ATOM      1  N   GLY A   1       1.000   0.000   0.000  1.00 20.00           N\n"
+       "ATOM      2  CA  GLY A   1       2.000   0.000   0.000  1.00 20.00           C\n"
+       "END\n")
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def test_pool_only_for_enough_work():
+    assert not pool_pays_off(0.002, 100, 8)
+    assert pool_pays_off(0.002, 1000, 8)
+    assert pool_pays_off(0.015, 200, 8)
+    assert not pool_pays_off(1.0, 1000, 1)
+
+
+def test_compare_batch_rejects_invalid_files():
+    files = [
+        Upload(PDB.encode(), "one.pdb"),
+        Upload(PDB.encode(), "two.txt"),
+        Upload(b"ATOM  garbage\n", "three.pdb")
+    ]
+    with pytest.raises(ValueError) as error:
+        PDBAnalyzer().compare_batch(files)
+    assert "two.txt" in str(error.value)
+    assert "three.pdb" in str(error.value)
+    assert "one.pdb" not in str(error.value)
+
+
+def traces(beg_arrays):
+    """2BEG's Cα trace plus copies with growing coordinate noise"""
+    trace = ca_trace(beg_arrays)
+    rng = np.random.default_rng(0)
+    copies = [trace]
+    for scale in (0.2, 0.5, 1.0, 2.0):
+        copies.append({chain_id: {"sequence": chain["sequence"],
+                                  "coords": chain["coords"] + rng.normal(scale=scale, size=chain["coords"].shape)}
+                       for chain_id, chain in trace.items()})
+    return copies
+
+
+def test_pack_traces_round_trip(beg_arrays):
+    batch = traces(beg_arrays)
+    unpacked = unpack_traces(*pack_traces(batch))
+    for trace, copy in zip(batch, unpacked):
+        assert list(trace) == list(copy)
+        for chain_id in trace:
+            assert trace[chain_id]["sequence"] == copy[chain_id]["sequence"]
+            assert np.array_equal(trace[chain_id]["coords"], copy[chain_id]["coords"])
+
+
+def test_similarity_matrix(beg_arrays):
+    result = similarity_matrix(traces(beg_arrays))
+    rmsd = result["rmsd"]
+    assert np.allclose(rmsd, rmsd.T)
+    assert np.all(np.diag(rmsd) == 0)
+    assert np.all(np.diag(result["tm_score"]) == 1)
+    assert np.all(np.diff(rmsd[0]) > 0)
+    assert np.all(result["aligned_residues"] == 130)
+    assert cluster_order(rmsd)[:2] in ([0, 1], [1, 0])
+
+
+def test_pool_matches_in_process_comparison(beg_arrays, monkeypatch):
+    batch = traces(beg_arrays)
+    expected = similarity_matrix(batch)
+    monkeypatch.setattr(batch_compare, "PROBE_PAIRS", 2)
+    monkeypatch.setattr(batch_compare, "POOL_STARTUP_SECONDS", 0)
+    pooled = []
+    compare_in_pool = batch_compare._compare_in_pool
+    monkeypatch.setattr(batch_compare, "_compare_in_pool", lambda *args: pooled.append(1) or compare_in_pool(*args))
+    result = similarity_matrix(batch, workers=2)
+    assert pooled
+    for key in expected:
+        assert np.allclose(result[key], expected[key])
@@ -0,0 +1,184 @@
+import os
+import time
+import pytest
+from utils import docking
+from utils.docking import DockingJobs, JobExpiredError
+from utils.pipeline import StageCache
+
+# Stand-ins for the docking programs, called with the arguments of DOCKING_PIPELINE
+TOOLS = {
+    "HDOCK_PATH": 'cat "$1" "$2" > "$4"',
+    "CREATEPL_PATH": 'cp "$1" "$2"',
+    "PRODIGY_PATH": 'echo "[++] Predicted binding affinity (kcal.mol-1):     -9.5"',
+    "PLIP_PATH": 'mkdir -p "$4" && echo report > "$4/report.xml"'
+}
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    """Point the pipeline at shell scripts that log each run to the returned file"""
+    calls = tmp_path / "calls.log"
+    for name, script in TOOLS.items():
+        path = tmp_path / name.lower()
+        path.write_text(f'#!/bin/sh\necho {name} >> "{calls}"\n{script}\n')
+        path.chmod(0o755)
+        monkeypatch.setattr(docking, name, str(path))
+    monkeypatch.setattr(docking.DOCKING_PIPELINE, "cache", StageCache(str(tmp_path / "stages"), 1 << 20))
+    return calls
+
+
+def blocking_hdock(tmp_path, monkeypatch):
+    """Make HDOCK wait until the returned path exists"""
+    release = tmp_path / "release"
+    hdock = tmp_path / "blocking_hdock"
+    hdock.write_text(f'#!/bin/sh\nwhile [ ! -e "{release}" ]; do sleep 0.01; done\n{TOOLS["HDOCK_PATH"]}\n')
+    hdock.chmod(0o755)
+    monkeypatch.setattr(docking, "HDOCK_PATH", str(hdock))
+    return release
+
+
+def wait(jobs, job_id, until=lambda job: job.done):
+    deadline = time.time() + 30
+    while not until(jobs.get(job_id)):
+        assert time.time() < deadline
+        time.sleep(0.01)
+    return jobs.get(job_id)
+
+
+def test_job_runs_in_the_background(tmp_path, tools, monkeypatch):
+    release = blocking_hdock(tmp_path, monkeypatch)
+
+    jobs = DockingJobs(str(tmp_path / "jobs"), 1, 1, 3600, 1 << 30)
+    job_id = jobs.submit(b"receptor\n", b"antibody\n", ("A", "B"))
+    assert not jobs.get(job_id).done
+    assert wait(jobs, job_id, lambda job: job.current_stage == "hdock").progress == 0
+    release.touch()
+
+    job = wait(jobs, job_id)
+    assert job.status == "completed" and job.error is None
+    assert job.progress == 1
+    assert job.binding_affinity == "-9.5"
+    assert open(job.output_path("complex.pdb"), "rb").read() == b"receptor\nantibody\n"
+    assert job.output_path("plip_results/report.xml")
+
+
+def test_missing_programs_fail_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(docking, "HDOCK_PATH", str(tmp_path / "hdock"))
+    monkeypatch.setattr(docking.DOCKING_PIPELINE, "cache", None)
+    jobs = DockingJobs(str(tmp_path / "jobs"), 1, 1, 3600, 1 << 30)
+    job = wait(jobs, jobs.submit(b"receptor", b"antibody", ("A", "B")))
+    assert job.status == "failed"
+    assert job.error == "HDOCK docking failed"
+    assert job.stages["hdock"]["status"] == "failed"
+    assert all(job.stages[stage]["status"] == "skipped" for stage in ("createpl", "prodigy", "plip"))
+
+
+def test_resubmit_unknown_job(tmp_path):
+    jobs = DockingJobs(str(tmp_path), 1, 1, 3600, 1 << 30)
+    with pytest.raises(JobExpiredError):
+        jobs.resubmit("missing", ("A", "B"))
+
+
+def test_resubmit_without_input_files(tmp_path):
+    jobs = DockingJobs(str(tmp_path), 1, 1, 3600, 1 << 30)
+    job_id = jobs.submit(b"receptor", b"antibody", ("A", "B"))
+    os.remove(os.path.join(jobs.get(job_id).work_dir, "receptor.pdb"))
+    with pytest.raises(JobExpiredError):
+        jobs.resubmit(job_id, ("A", "H"))
+
+
+def test_screen_docks_every_pair(tmp_path, tools):
+    jobs = DockingJobs(str(tmp_path / "jobs"), 1, 2, 3600, 1 << 30)
+    receptors = {"r1": b"receptor 1\n", "r2": b"receptor 2\n"}
+    antibodies = {"a1": b"antibody 1\n", "a2": b"antibody 2\n", "a3": b"antibody 3\n"}
+    screen_id = jobs.submit_screen(receptors, antibodies, ("A", "B"))
+    screen = jobs.get_screen(screen_id)
+    assert [pair[:2] for pair in screen.pairs] == [(r, a) for r in receptors for a in antibodies]
+    for _, _, job_id in screen.pairs:
+        wait(jobs, job_id)
+
+    results = jobs.screen_results(screen_id)
+    assert len(results) == 6
+    assert (results["Status"] == "completed").all()
+    assert (results["Binding Affinity (kcal/mol)"] == -9.5).all()
+    assert list(results["Job ID"]) == [job_id for _, _, job_id in screen.pairs]
+    for receptor, antibody, job_id in screen.pairs:
+        with open(jobs.get(job_id).output_path("complex.pdb"), "rb") as f:
+            assert f.read() == receptors[receptor] + antibodies[antibody]
+
+
+def test_screen_pairs_time_out(tmp_path, tools, monkeypatch):
+    hdock = tmp_path / "slow_hdock"
+    hdock.write_text("#!/bin/sh\nexec sleep 10\n")
+    hdock.chmod(0o755)
+    monkeypatch.setattr(docking, "HDOCK_PATH", str(hdock))
+
+    jobs = DockingJobs(str(tmp_path / "jobs"), 1, 2, 3600, 1 << 30)
+    screen_id = jobs.submit_screen({"r": b"receptor"}, {"a": b"antibody"}, ("A", "B"), timeout=0.5)
+    wait(jobs, jobs.get_screen(screen_id).pairs[0][2])
+    row = jobs.screen_results(screen_id).iloc[0]
+    assert row["Status"] == "timed out"
+    assert row["Error"] == "HDOCK docking timed out"
+    assert row["Time (s)"] < 5
+
+
+def test_concurrent_jobs_have_their_own_directories(tmp_path, tools):
+    jobs = DockingJobs(str(tmp_path / "jobs"), 4, 1, 3600, 1 << 30)
+    job_ids = [jobs.submit(f"receptor {index}\n".encode(), b"antibody\n", ("A", "B"), owner=index % 2)
+               for index in range(4)]
+    job_ids.append(jobs.submit(b"receptor 0\n", b"antibody\n", ("A", "B"), owner=1))
+    finished = [wait(jobs, job_id) for job_id in job_ids]
+    assert len({job.work_dir for job in finished}) == 5
+    for index, job in enumerate(finished):
+        with open(job.output_path("complex.pdb"), "rb") as f:
+            assert f.read() == f"receptor {index % 4}\n".encode() + b"antibody\n"
+    assert [job.job_id for job in jobs.jobs(owner=1)] == [job_ids[4], job_ids[3], job_ids[1]]
+
+
+def test_finished_jobs_are_cleaned_up(tmp_path, tools):
+    stale = tmp_path / "jobs" / "stale"
+    stale.mkdir(parents=True)
+    os.utime(stale, (0, 0))
+    jobs = DockingJobs(str(tmp_path / "jobs"), 1, 1, 3600, 1 << 30)
+    assert not stale.exists()
+
+    job = wait(jobs, jobs.submit(b"receptor", b"antibody", ("A", "B")))
+    jobs.cleanup()
+    assert jobs.get(job.job_id) is job
+
+    jobs.retention = 0
+    time.sleep(0.01)
+    jobs.cleanup()
+    assert jobs.get(job.job_id) is None
+    assert not os.path.exists(job.work_dir)
+
+
+def test_docked_pairs_are_served_from_the_stage_cache(tmp_path, tools):
+    jobs = DockingJobs(str(tmp_path / "jobs"), 1, 1, 3600, 1 << 30)
+    first = wait(jobs, jobs.submit(b"receptor", b"antibody", ("A", "B"), owner="one"))
+    assert tools.read_text().split() == ["HDOCK_PATH", "CREATEPL_PATH", "PRODIGY_PATH", "PLIP_PATH"]
+
+    # The same content from another session completes at submit, without running anything
+    second = jobs.get(jobs.submit(b"receptor", b"antibody", ("A", "B"), owner="two"))
+    assert second.job_id != first.job_id
+    assert second.status == "completed"
+    assert all(info["status"] == "cached" for info in second.stages.values())
+    assert second.binding_affinity == first.binding_affinity
+    assert len(tools.read_text().split()) == 4
+
+    # Another chain selection only runs PRODIGY again
+    third = wait(jobs, jobs.resubmit(second.job_id, ("A", "H")))
+    assert third.stages["prodigy"]["status"] == "done"
+    assert [third.stages[stage]["status"] for stage in ("hdock", "createpl", "plip")] == ["cached"] * 3
+    assert tools.read_text().split()[4:] == ["PRODIGY_PATH"]
+
+
+def test_identical_submissions_attach_to_the_running_job(tmp_path, tools, monkeypatch):
+    release = blocking_hdock(tmp_path, monkeypatch)
+
+    jobs = DockingJobs(str(tmp_path / "jobs"), 2, 1, 3600, 1 << 30)
+    job_id = jobs.submit(b"receptor", b"antibody", ("A", "B"))
+    assert jobs.submit(b"receptor", b"antibody", ("A", "B")) == job_id
+    release.touch()
+    wait(jobs, job_id)
+    assert len(jobs.jobs()) == 1
@@ -0,0 +1,72 @@
+import itertools
+import numpy as np
+from utils.geometry import (intra_residue_distances, perceive_bonds, classify_bonds, covalent_radii, CellGrid,
+                            BOND_TOLERANCE, MIN_BOND_DISTANCE)
+
+
+def test_intra_residue_distances_match_a_nested_loop(beg_arrays):
+    result = intra_residue_distances(beg_arrays)
+
+    expected = []
+    for residue in range(beg_arrays.residue_count):
+        atoms = np.flatnonzero(beg_arrays.atom_residue == residue)
+        for atom1, atom2 in itertools.combinations(atoms, 2):
+            distance = np.linalg.norm(beg_arrays.coords[atom1] - beg_arrays.coords[atom2])
+            expected.append((residue, atom1, atom2, distance))
+    residue, atom1, atom2, distance = map(np.array, zip(*expected))
+
+    assert np.array_equal(result["residue"], residue)
+    assert np.array_equal(result["atom1"], atom1)
+    assert np.array_equal(result["atom2"], atom2)
+    assert np.allclose(result["distance"], distance, atol=1e-4)
+
+
+def test_intra_residue_distances_of_selected_residues(beg_arrays):
+    result = intra_residue_distances(beg_arrays, residues=[3, 7])
+    assert set(result["residue"].tolist()) == {3, 7}
+    sizes = np.bincount(beg_arrays.atom_residue)[[3, 7]]
+    assert len(result["distance"]) == sum(size * (size - 1) // 2 for size in sizes)
+
+
+def brute_force_pairs(coords, cutoff):
+    distance = np.linalg.norm(coords[:, None] - coords[None], axis=2)
+    first, second = np.nonzero(np.triu(distance <= cutoff, k=1))
+    return first, second, distance[first, second]
+
+
+def test_cell_grid_self_pairs_match_brute_force():
+    coords = np.random.default_rng(0).uniform(0, 20, size=(400, 3)).astype(np.float32)
+    first, second, distance = CellGrid(coords, 3.0).self_pairs(3.0)
+    expected = brute_force_pairs(coords, 3.0)
+    assert np.array_equal(first, expected[0])
+    assert np.array_equal(second, expected[1])
+    assert np.allclose(distance, expected[2], atol=1e-4)
+
+
+def test_cell_grid_query_matches_brute_force():
+    rng = np.random.default_rng(1)
+    coords = rng.uniform(0, 20, size=(300, 3)).astype(np.float32)
+    points = rng.uniform(-5, 25, size=(100, 3)).astype(np.float32)
+    query, grid, distance = CellGrid(coords, 4.0).query(points, 4.0)
+
+    expected = np.linalg.norm(points[:, None] - coords[None], axis=2)
+    assert sorted(zip(query.tolist(), grid.tolist())) == list(zip(*np.nonzero(expected <= 4.0)))
+    assert np.allclose(distance, expected[query, grid], atol=1e-4)
+
+
+def test_perceive_bonds_matches_covalent_radii(beg_arrays):
+    bonds = perceive_bonds(beg_arrays)
+
+    radii = covalent_radii(beg_arrays)
+    first, second, distance = brute_force_pairs(beg_arrays.coords, 2 * radii.max() + BOND_TOLERANCE)
+    bonded = (distance >= MIN_BOND_DISTANCE) & (distance <= radii[first] + radii[second] + BOND_TOLERANCE)
+    assert np.array_equal(bonds["atom1"], first[bonded])
+    assert np.array_equal(bonds["atom2"], second[bonded])
+
+
+def test_classify_bonds_finds_peptide_links(beg_arrays):
+    counts = classify_bonds(beg_arrays, perceive_bonds(beg_arrays))
+    # Five chains of 26 residues, each linked by 25 peptide bonds
+    assert counts["inter_residue"] == 5 * 25
+    assert counts["disulfide"] == 0
+    assert counts["intra_residue"] + counts["inter_residue"] == counts["total"]
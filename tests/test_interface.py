@@ -0,0 +1,52 @@
+import gzip
+import io
+import os
+import numpy as np
+import pytest
+from Bio.PDB import PDBParser
+from utils.interface import interface_contacts, interface_atoms
+from utils.structure_arrays import StructureArrays
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture(scope="module")
+def partners():
+    """2BEG split into a receptor (chains A-B) and an antibody (chains C-E)"""
+    def chains(chain_ids):
+        with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rt") as f:
+            structure = PDBParser(QUIET=True).get_structure("2BEG", io.StringIO(f.read()))
+        for chain in list(structure[0]):
+            if chain.id not in chain_ids:
+                structure[0].detach_child(chain.id)
+        return StructureArrays.from_structure(structure)
+    return chains("AB"), chains("CDE")
+
+
+def test_contacts_match_brute_force(partners):
+    receptor, antibody = partners
+    result = interface_contacts(receptor, antibody, cutoff=4.5)
+
+    atoms1, atoms2 = interface_atoms(receptor), interface_atoms(antibody)
+    distance = np.linalg.norm(receptor.coords[atoms1][:, None] - antibody.coords[atoms2][None], axis=2)
+    first, second = np.nonzero(distance <= 4.5)
+    contacts = result["atom_contacts"]
+    assert list(zip(contacts["receptor_atom"], contacts["antibody_atom"])) == list(zip(atoms1[first], atoms2[second]))
+    assert np.allclose(contacts["distance"], distance[first, second], atol=1e-4)
+    assert result["contact_count"] == len(first) > 0
+    assert result["buried_atoms"]["receptor"] == len(np.unique(first))
+
+
+def test_residue_contacts_add_up(partners):
+    result = interface_contacts(*partners)
+    assert result["residue_contacts"]["atom_contacts"].sum() == result["contact_count"]
+    assert result["receptor_residues"]["atom_contacts"].sum() == result["contact_count"]
+    assert sum(result["chain_contacts"].values()) == result["contact_count"]
+    assert "B-C" in result["chain_contacts"]
+
+
+def test_no_contacts_below_bonding_distance(partners):
+    receptor, antibody = partners
+    result = interface_contacts(receptor, antibody, cutoff=0.5)
+    assert result["contact_count"] == 0
+    assert len(result["residue_contacts"]) == 0
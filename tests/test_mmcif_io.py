@@ -0,0 +1,54 @@
+import gzip
+import io
+import os
+import numpy as np
+import pytest
+from Bio.PDB import MMCIFParser
+from utils.mmcif_io import decode_bcif, parse_mmcif, parse_bcif
+from utils.structure_arrays import StructureArrays
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def read(name):
+    with gzip.open(os.path.join(DATA, name), "rb") as f:
+        return f.read()
+
+
+def packed(values, byte_count):
+    return {"data": np.array(values, dtype="<i1").tobytes(),
+            "encoding": [{"kind": "IntegerPacking", "byteCount": byte_count, "isUnsigned": False, "srcSize": 2},
+                         {"kind": "ByteArray", "type": 1}]}
+
+
+def test_integer_packing():
+    # 127 + 100 is one value past the int8 range
+    assert list(decode_bcif(packed([127, 100, -5], 1))) == [227, -5]
+
+
+def test_integer_packing_rejects_a_wrong_byte_count():
+    with pytest.raises(ValueError):
+        decode_bcif(packed([127, 100, -5], 2))
+
+
+def test_mmcif_matches_bio_pdb():
+    data = read("1GBT.cif.gz")
+    structure = MMCIFParser(QUIET=True).get_structure("1GBT", io.StringIO(data.decode()))
+    expected = StructureArrays.from_structure(structure)
+    arrays = parse_mmcif(data)
+    assert arrays.summary() == expected.summary()
+    assert np.allclose(arrays.coords, expected.coords)
+    assert np.array_equal(arrays.atom_names[arrays.atom_name_codes], expected.atom_names[expected.atom_name_codes])
+
+
+def test_bcif_matches_mmcif():
+    arrays = parse_bcif(read("1gbt.bcif.gz"))
+    expected = parse_mmcif(read("1GBT.cif.gz"))
+    assert arrays.summary() == expected.summary()
+    assert np.allclose(arrays.coords, expected.coords)
+    assert np.array_equal(arrays.elements[arrays.element_codes], expected.elements[expected.element_codes])
+
+
+def test_cif_without_atom_site():
+    with pytest.raises(ValueError):
+        parse_mmcif(b"data_test\n_entry.id test\n")
@@ -0,0 +1,184 @@
+import bz2
+import gc
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import utils.pdb_analyzer as pdb_analyzer_module
+from utils.pdb_analyzer import PDBAnalyzer
+from utils.result_store import ResultStore
+from utils.structure_cache import StructureCache
+from utils.structure_io import map_file
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+PDB = ("ATOM      1  N   GLY A   1       1.000   0.000   0.000  1.00 20.00           N\n"
+       "ATOM      2  CA  GLY A   1       2.000   0.000   0.000  1.00 20.00           C\n"
+       "ATOM      3  N   ALA A   2       3.000   0.000   0.000  1.00 20.00           N\n"
+       "END\n")
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def analyzer(tmp_path, store_bytes=1 << 20):
+    analyzer = PDBAnalyzer()
+    analyzer.structure_cache = StructureCache(1 << 20)
+    analyzer.result_store = ResultStore(str(tmp_path), store_bytes)
+    return analyzer
+
+
+def test_open_analysis_does_not_keep_the_upload(tmp_path):
+    pdb_analyzer = analyzer(tmp_path)
+    upload = Upload(PDB.encode(), "one.pdb")
+    handle = pdb_analyzer.open_analysis(upload)
+    reference = weakref.ref(upload)
+    del upload
+    gc.collect()
+    assert reference() is None
+
+    # Sections re-parse the upload kept in the result store once the structure cache lost it
+    pdb_analyzer.structure_cache.clear()
+    assert handle["residue_count"] == 2
+    assert handle["atom_count"] == 3
+
+
+def test_open_analysis_without_result_store(tmp_path):
+    pdb_analyzer = analyzer(tmp_path, store_bytes=0)
+    handle = pdb_analyzer.open_analysis(Upload(PDB.encode(), "one.pdb"))
+    assert handle["chains"]["A"]["residue_count"] == 2
+    assert handle["atom_count"] == 3
+
+
+def test_uploads_with_the_same_content_are_parsed_once(tmp_path):
+    pdb_analyzer = analyzer(tmp_path)
+    first = pdb_analyzer.load_structure(Upload(PDB.encode(), "one.pdb"))
+    second = pdb_analyzer.load_structure(Upload(PDB.encode(), "copy.pdb"))
+    assert first is second
+    assert pdb_analyzer.structure_cache.misses == 1
+
+    pdb_analyzer.compare_structures(Upload(PDB.encode(), "one.pdb"), Upload(PDB.encode(), "two.pdb"))
+    assert pdb_analyzer.structure_cache.misses == 1
+
+
+def test_uploads_are_parsed_without_temporary_files(tmp_path, monkeypatch):
+    def no_temporary_file(*args, **kwargs):
+        raise AssertionError("temporary file created")
+
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_temporary_file)
+    monkeypatch.setattr(tempfile, "mkstemp", no_temporary_file)
+    arrays = analyzer(tmp_path).load_structure(Upload(PDB.encode(), "one.pdb"))
+    assert arrays.atom_count == 3
+
+
+def test_large_files_match_the_bio_pdb_path(tmp_path, monkeypatch, beg_arrays):
+    path = tmp_path / "2BEG.pdb"
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rb") as f:
+        path.write_bytes(f.read())
+
+    monkeypatch.setattr(pdb_analyzer_module, "LARGE_FILE_THRESHOLD", 1024)
+    arrays = analyzer(tmp_path / "store").load_structure(str(path))
+    # The columnar parser decodes atom columns only on demand
+    assert "coords" not in vars(arrays)
+    assert arrays.summary() == beg_arrays.summary()
+    assert np.allclose(arrays.coords, beg_arrays.coords)
+    assert np.array_equal(arrays.atom_names[arrays.atom_name_codes], beg_arrays.atom_names[beg_arrays.atom_name_codes])
+
+
+def test_map_file_of_an_empty_file(tmp_path):
+    path = tmp_path / "empty.pdb"
+    path.write_bytes(b"")
+    assert map_file(str(path)) == b""
+
+
+@pytest.mark.parametrize("suffix, compress", [(".gz", gzip.compress), (".bz2", bz2.compress), (".xz", lzma.compress)])
+def test_compressed_uploads(tmp_path, beg_arrays, suffix, compress):
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rb") as f:
+        data = f.read()
+    pdb_analyzer = analyzer(tmp_path)
+    upload = Upload(compress(data), "2BEG.pdb" + suffix)
+    assert pdb_analyzer.validate_file(upload)[0]
+    arrays = pdb_analyzer.load_structure(upload)
+    assert arrays.summary() == beg_arrays.summary()
+    assert np.allclose(arrays.coords, beg_arrays.coords)
+
+
+def test_truncated_archive_is_rejected(tmp_path):
+    upload = Upload(gzip.compress(PDB.encode())[:20], "one.pdb.gz")
+    with pytest.raises(ValueError, match="Corrupt or truncated"):
+        analyzer(tmp_path).load_structure(upload)
+
+
+def test_comparison_skips_bond_perception(tmp_path, monkeypatch):
+    def no_bonds(*args, **kwargs):
+        raise AssertionError("bonds computed")
+
+    monkeypatch.setattr(pdb_analyzer_module, "perceive_bonds", no_bonds)
+    monkeypatch.setattr(pdb_analyzer_module, "intra_residue_distances", no_bonds)
+    shorter = "".join(PDB.splitlines(keepends=True)[:2]) + "END\n"
+    comparison = analyzer(tmp_path).compare_structures(Upload(PDB.encode(), "one.pdb"),
+                                                       Upload(shorter.encode(), "two.pdb"))
+    assert comparison["residue_count_diff"] == 1
+    assert comparison["atom_count_diff"] == 1
+    assert comparison["unique_residue_types_1"] == {"ALA"}
+    assert comparison["chain_comparison"] == {"A": {"residue_count_diff": 1, "atom_count_diff": 1}}
+
+
+def test_bond_statistics_match_the_bond_table(tmp_path):
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rb") as f:
+        upload = Upload(f.read(), "2BEG.pdb")
+    info = analyzer(tmp_path).analyze_structure(upload, keep_pairs=True)
+    distance = info.bond_lengths["distance"].to_numpy()
+    assert info.bond_stats.count == info.bond_counts.total == len(distance)
+    assert np.isclose(info.bond_stats.mean, distance.mean())
+    assert np.isclose(info.bond_stats.variance, distance.var())
+    assert info.bond_stats.min_bond["distance"] == distance.min()
+    assert info.bond_stats.histogram.sum() == len(distance)
+
+
+def test_open_analysis_computes_only_what_is_read(tmp_path, monkeypatch):
+    def no_bonds(*args, **kwargs):
+        raise AssertionError("bonds computed")
+
+    monkeypatch.setattr(pdb_analyzer_module, "perceive_bonds", no_bonds)
+    pdb_analyzer = analyzer(tmp_path)
+    handle = pdb_analyzer.open_analysis(Upload(PDB.encode(), "one.pdb"))
+    assert handle["residue_types"] == frozenset({"GLY", "ALA"})
+    assert handle.computed("counts") and not handle.computed("bonds")
+
+    # A new handle on the same content reads stored sections without parsing again
+    pdb_analyzer.structure_cache.clear()
+    handle = pdb_analyzer.open_analysis(Upload(PDB.encode(), "copy.pdb"))
+    assert handle["atom_count"] == 3
+    assert pdb_analyzer.structure_cache.misses == 1
+
+
+def test_one_analyzer_per_process():
+    assert pdb_analyzer_module.get_analyzer() is pdb_analyzer_module.get_analyzer()
+
+
+def test_shared_analyzer_serves_concurrent_sessions(tmp_path):
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rb") as f:
+        data = f.read()
+    pdb_analyzer = analyzer(tmp_path)
+
+    def session(index):
+        # Each session uploads a different file, so every parse goes through the shared parser
+        upload = Upload(data + f"REMARK {index}\n".encode(), f"{index}.pdb")
+        return pdb_analyzer.load_structure(upload).summary()
+
+    with ThreadPoolExecutor(8) as executor:
+        summaries = list(executor.map(session, range(16)))
+    assert all(summary == summaries[0] for summary in summaries)
+    assert summaries[0]["atom_count"] == 1855
+    assert pdb_analyzer.structure_cache.misses == 16
@@ -0,0 +1,112 @@
+import os
+import time
+from utils.pipeline import Pipeline, Stage, StageCache
+
+# Stages run sh scripts; each appends its name to calls.log when it really runs
+COPY = Stage("copy", lambda params: ["sh", "-c", f"echo copy >> calls.log; cat in.txt > {params['name']}",
+                                     "copy"],
+             inputs=("in.txt",), outputs=("copy.txt",))
+COUNT = Stage("count", lambda params: ["sh", "-c", "echo count >> calls.log; wc -c < copy.txt"],
+              inputs=("copy.txt",))
+
+
+def work_dir(tmp_path, name="work", content="hello"):
+    path = tmp_path / name
+    path.mkdir()
+    (path / "in.txt").write_text(content)
+    return str(path)
+
+
+def calls(work_dir):
+    path = os.path.join(work_dir, "calls.log")
+    return open(path).read().split() if os.path.exists(path) else []
+
+
+def test_key_follows_inputs_and_arguments_but_not_the_executable(tmp_path):
+    first = work_dir(tmp_path, "first")
+    key = COPY.key(first, {"name": "copy.txt"})
+    assert key == COPY.key(work_dir(tmp_path, "second"), {"name": "copy.txt"})
+    assert key != COPY.key(work_dir(tmp_path, "changed", "hello!"), {"name": "copy.txt"})
+    assert key != COPY.key(first, {"name": "other.txt"})
+
+    moved = Stage("copy", lambda params: ["/opt/bin/sh", *COPY.command(params)[1:]], inputs=COPY.inputs)
+    assert moved.key(first, {"name": "copy.txt"}) == key
+    assert Stage("copy", COPY.command, COPY.inputs, version=2).key(first, {"name": "copy.txt"}) != key
+
+
+def test_cached_stages_are_restored_without_running(tmp_path):
+    pipeline = Pipeline([COPY, COUNT], StageCache(str(tmp_path / "cache"), 1 << 20))
+    params = {"name": "copy.txt"}
+    first = work_dir(tmp_path, "first")
+    status = pipeline.status()
+    assert pipeline.run(first, params, status)
+    assert [status[name]["status"] for name in ("copy", "count")] == ["done", "done"]
+    assert status["count"]["stdout"].strip() == "5"
+
+    second = work_dir(tmp_path, "second")
+    status = pipeline.status()
+    assert pipeline.restore(second, params, status)
+    assert [status[name]["status"] for name in ("copy", "count")] == ["cached", "cached"]
+    assert status["count"]["stdout"].strip() == "5"
+    assert open(os.path.join(second, "copy.txt")).read() == "hello"
+    assert calls(second) == []
+
+    # New input content misses the cache from the first stage on
+    third = work_dir(tmp_path, "third", "goodbye")
+    assert not pipeline.restore(third, params, pipeline.status())
+    assert pipeline.run(third, params, pipeline.status())
+    assert calls(third) == ["copy", "count"]
+
+
+def test_failed_stage_skips_its_dependents(tmp_path):
+    failing = Stage("copy", lambda params: ["sh", "-c", "exit 3"], inputs=("in.txt",), outputs=("copy.txt",))
+    independent = Stage("echo", lambda params: ["echo", "ok"], inputs=("in.txt",))
+    pipeline = Pipeline([failing, COUNT, independent])
+    assert pipeline.dependencies == {"copy": set(), "count": {"copy"}, "echo": set()}
+
+    status = pipeline.status()
+    assert not pipeline.run(work_dir(tmp_path), {}, status)
+    assert status["copy"]["status"] == "failed"
+    assert status["count"]["status"] == "skipped"
+    assert status["echo"]["status"] == "done"
+
+
+def test_missing_executable_fails_the_stage(tmp_path):
+    missing = Stage("missing", lambda params: [str(tmp_path / "no-such-program")], inputs=("in.txt",))
+    pipeline = Pipeline([missing])
+    status = pipeline.status()
+    assert not pipeline.run(work_dir(tmp_path), {}, status)
+    assert status["missing"]["status"] == "failed"
+    assert "no-such-program" in status["missing"]["stderr"]
+
+
+def test_deadline_kills_the_running_stage(tmp_path):
+    slow = Stage("slow", lambda params: ["sleep", "10"])
+    pipeline = Pipeline([slow])
+    status = pipeline.status()
+    started = time.time()
+    assert not pipeline.run(work_dir(tmp_path), {}, status, deadline=time.time() + 0.5)
+    assert time.time() - started < 5
+    assert status["slow"]["status"] == "failed" and status["slow"]["timed_out"]
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"), 1 << 20)
+    stage = Stage("copy", COPY.command, outputs=("copy.txt",))
+    work = tmp_path / "work"
+    work.mkdir()
+    for index, key in enumerate(("read", "unread", "recent")):
+        (work / "copy.txt").write_text(str(index) * 4000)
+        cache.store(stage, key, str(work), {"stdout": "", "stderr": ""})
+        os.utime(cache._path(stage, key), (index, index))
+
+    cache.max_bytes = cache.size
+    assert cache.restore(stage, "read", str(work)) == {"stdout": "", "stderr": ""}
+    assert (work / "copy.txt").read_text() == "0" * 4000
+    (work / "copy.txt").write_text("3" * 4000)
+    cache.store(stage, "new", str(work), {"stdout": "", "stderr": ""})
+
+    assert cache.restore(stage, "unread", str(work)) is None
+    for key in ("read", "recent", "new"):
+        assert cache.restore(stage, key, str(work)) is not None
+    assert cache.size <= cache.max_bytes
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.analysis_result import StructureAnalysis, SecondaryStructure
+from utils.result_store import ResultStore
+from utils.secondary_structure import assign_secondary_structure
+
+
+def test_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path), 1024 * 1024)
+    store.put("key", {"count": 3, "values": np.arange(4)})
+    result = store.get("key")
+    assert result["count"] == 3
+    assert np.array_equal(result["values"], np.arange(4))
+
+
+def test_truncated_entry_is_a_miss_and_removed(tmp_path):
+    store = ResultStore(str(tmp_path), 1024 * 1024)
+    store.put("key", {"values": np.arange(1000)})
+    path = store._path("key")
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+    assert store.get("key") is None
+    assert not os.path.exists(path)
+    assert store.get_or_create("key", lambda: {"count": 1}) == {"count": 1}
+    assert store.get("key") == {"count": 1}
+
+
+def test_garbage_entry_is_a_miss_and_removed(tmp_path):
+    store = ResultStore(str(tmp_path), 1024 * 1024)
+    os.makedirs(store.directory, exist_ok=True)
+    with open(store._path("key"), "wb") as f:
+        f.write(b"junk")
+    assert store.get("key") is None
+    assert not os.path.exists(store._path("key"))
+
+
+def test_failed_touch_keeps_the_entry(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path), 1024 * 1024)
+    store.put("key", {"count": 3})
+
+    def utime(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "utime", utime)
+    assert store.get("key") == {"count": 3}
+    assert os.path.exists(store._path("key"))
+    assert store.hits == 1 and store.misses == 0
+
+
+def test_typed_results_survive_a_new_store(tmp_path, beg_arrays):
+    info = StructureAnalysis.from_summary("2BEG", beg_arrays.summary())
+    info.secondary_structure = SecondaryStructure(**assign_secondary_structure(beg_arrays))
+    ResultStore(str(tmp_path), 1024 * 1024).put("key", info)
+
+    # A restarted server opens the same directory
+    stored = ResultStore(str(tmp_path), 1024 * 1024).get("key")
+    assert isinstance(stored, StructureAnalysis)
+    assert stored.chains == info.chains
+    assert stored.residue_types == info.residue_types
+    residues = stored.secondary_structure.residues
+    pd.testing.assert_frame_equal(residues, info.secondary_structure.residues, check_dtype=False)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = ResultStore(str(tmp_path), 1024 * 1024)
+    for index, key in enumerate(("read", "unread", "recent")):
+        store.put(key, {"values": np.full(20000, index, dtype=np.int64)})
+        os.utime(store._path(key), (index, index))
+    store.max_bytes = store.size * 3 // 4
+    store.get("read")
+    store.put("new", {"count": 1})
+    assert not store.contains("unread")
+    assert all(store.contains(key) for key in ("read", "recent", "new"))
+    assert store.size <= store.max_bytes
+
+
+def test_disabled_store(tmp_path):
+    store = ResultStore(str(tmp_path), 0)
+    assert store.get_or_create("key", lambda: {"count": 1}) == {"count": 1}
+    assert not store.contains("key")
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,68 @@
+import gzip
+import io
+import os
+import numpy as np
+from Bio.PDB import PDBParser
+from Bio.PDB.SASA import ShrakeRupley
+from utils.sasa import atom_sasa, structure_sasa, complex_sasa, sphere_points, PROBE_RADIUS
+from utils.structure_arrays import StructureArrays
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def beg_structure(chain_ids="ABCDE"):
+    """2BEG as a Bio.PDB structure, keeping only the given chains"""
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rt") as f:
+        structure = PDBParser(QUIET=True).get_structure("2BEG", io.StringIO(f.read()))
+    for chain in list(structure[0]):
+        if chain.id not in chain_ids:
+            structure[0].detach_child(chain.id)
+    return structure
+
+
+def test_sphere_points_are_on_the_unit_sphere():
+    points = sphere_points(500)
+    assert np.allclose(np.linalg.norm(points, axis=1), 1.0)
+    assert np.allclose(points.mean(axis=0), 0.0, atol=0.01)
+
+
+def test_single_sphere():
+    area = atom_sasa(np.zeros((1, 3)), [1.7])
+    assert np.isclose(area[0], 4 * np.pi * (1.7 + PROBE_RADIUS) ** 2)
+
+
+def test_overlapping_spheres_lose_a_cap():
+    radius = 1.7 + PROBE_RADIUS
+    distance = 4.0
+    area = atom_sasa(np.array([[0.0, 0.0, 0.0], [distance, 0.0, 0.0]]), [1.7, 1.7])
+    # Each sphere loses the cap beyond the plane halfway between the centres
+    cap = 2 * np.pi * radius * (radius - distance / 2)
+    assert np.allclose(area, 4 * np.pi * radius ** 2 - cap, rtol=0.02)
+
+
+def test_structure_matches_bio_shrake_rupley(beg_arrays):
+    structure = beg_structure()
+    # structure_sasa leaves out hydrogens
+    for residue in structure.get_residues():
+        for atom in list(residue):
+            if atom.element == "H":
+                residue.detach_child(atom.id)
+    ShrakeRupley(n_points=1000).compute(structure[0], level="M")
+
+    result = structure_sasa(beg_arrays)
+    assert np.isclose(result["total"], structure[0].sasa, rtol=0.005)
+    assert np.isclose(result["residues"]["sasa"].sum(), result["total"])
+    assert len(result["residues"]) == 130
+
+
+def test_complex_buries_surface():
+    receptor = StructureArrays.from_structure(beg_structure("AB"))
+    antibody = StructureArrays.from_structure(beg_structure("CDE"))
+    result = complex_sasa(receptor, antibody)
+    assert result["buried_surface_area"] > 0
+    for partner in ("receptor", "antibody"):
+        residues = result[partner]
+        assert np.all(residues["delta_sasa"] >= -1e-6)
+        assert np.allclose(residues["sasa_free"] - residues["sasa_complex"], residues["delta_sasa"])
+    assert np.isclose(result["buried_surface_area"],
+                      result["receptor"]["delta_sasa"].sum() + result["antibody"]["delta_sasa"].sum())
@@ -0,0 +1,20 @@
+import numpy as np
+from utils.secondary_structure import assign_secondary_structure
+
+# DSSP 2.x output for 2BEG reduced to three states (H, G, I -> H; E, B -> E)
+BEG_DSSP = "CEEEEEEEEECCCCEEEEEEEEEEEC" * 5
+
+
+def test_strands_match_dssp(beg_arrays):
+    result = assign_secondary_structure(beg_arrays)
+    assert "".join(result["residues"]["ss"]) == BEG_DSSP
+    assert (result["residues"]["ss"] == "E").sum() == 100
+    assert (result["residues"]["ss"] == "H").sum() == 0
+
+
+def test_chain_fractions(beg_arrays):
+    chains = assign_secondary_structure(beg_arrays)["chains"]
+    assert set(chains) == {"A", "B", "C", "D", "E"}
+    for fractions in chains.values():
+        assert np.isclose(fractions["E"], 20 / 26)
+        assert np.isclose(sum(fractions.values()), 1.0)
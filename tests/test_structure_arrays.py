@@ -0,0 +1,44 @@
+import gzip
+import io
+import os
+import numpy as np
+import pytest
+from Bio.PDB import PDBParser
+from utils.structure_arrays import StructureArrays
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def bio_structure(name):
+    with gzip.open(os.path.join(DATA, name), "rt") as f:
+        return PDBParser(QUIET=True).get_structure("test", io.StringIO(f.read()))
+
+
+def test_from_structure_matches_bio():
+    structure = bio_structure("2BEG.pdb.gz")
+    arrays = StructureArrays.from_structure(structure)
+    atoms = list(structure.get_atoms())
+
+    assert arrays.model_count == len(structure) == 1
+    assert arrays.residue_count == len(list(structure.get_residues())) == 130
+    assert arrays.atom_count == len(atoms) == 1855
+    assert np.allclose(arrays.coords, [atom.coord for atom in atoms])
+    assert list(arrays.atom_names[arrays.atom_name_codes]) == [atom.get_id() for atom in atoms]
+    assert arrays.summary()["chains"] == {
+        chain.id: {"residue_count": len(chain), "atom_count": len(list(chain.get_atoms()))}
+        for chain in structure[0]
+    }
+
+
+def test_composition_counts_amino_acids_of_one_model():
+    arrays = StructureArrays.from_structure(bio_structure("2BEG.pdb.gz"))
+    composition = arrays.residue_composition()
+    assert sum(composition.values()) == 130
+    assert list(composition.values()) == sorted(composition.values(), reverse=True)
+    assert set(composition) == arrays.residue_types()
+
+
+def test_frozen_arrays_are_read_only():
+    arrays = StructureArrays.from_structure(bio_structure("2BEG.pdb.gz")).freeze()
+    with pytest.raises(ValueError):
+        arrays.coords[0, 0] = 0.0
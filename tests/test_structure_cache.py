@@ -0,0 +1,60 @@
+import pytest
+from utils.structure_cache import StructureCache
+
+
+class Value:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def fail():
+    raise ValueError("Not a structure file")
+
+
+def test_failures_raise_a_fresh_exception_per_caller():
+    cache = StructureCache(1 << 20)
+    with pytest.raises(ValueError) as first:
+        cache.get_or_create("key", fail)
+    with pytest.raises(ValueError, match="Not a structure file") as second:
+        cache.get_or_create("key", fail)
+    with pytest.raises(ValueError) as third:
+        cache.get_or_create("key", fail)
+    assert first.value is not second.value is not third.value
+    assert cache.misses == 1
+
+
+class LineError(Exception):
+    def __init__(self, line, reason):
+        super().__init__(f"{reason} at line {line}")
+        self.line = line
+
+
+@pytest.mark.parametrize("error, error_type", [
+    (LineError(3, "Bad record"), ValueError),
+    (UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte"), UnicodeDecodeError),
+    (FileNotFoundError(2, "No such file", "a.pdb"), FileNotFoundError)
+])
+def test_failures_with_any_constructor_are_raised_again(error, error_type):
+    def fail_with():
+        raise error
+
+    cache = StructureCache(1 << 20)
+    with pytest.raises(type(error)):
+        cache.get_or_create("key", fail_with)
+    with pytest.raises(error_type) as again:
+        cache.get_or_create("key", fail_with)
+    assert str(again.value) == str(error)
+    assert again.value is not error
+
+
+def test_values_are_remeasured_as_they_grow():
+    cache = StructureCache(10000)
+    first = cache.get_or_create("first", lambda: Value(2000))
+    cache.get_or_create("second", lambda: Value(2000))
+    assert cache.size == 4000
+    first.nbytes = 6000
+    assert cache.get_or_create("first", lambda: Value(0)) is first
+    assert cache.size == 8000
+    cache.get_or_create("third", lambda: Value(3000))
+    assert cache.size <= 10000
+    assert len(cache) == 2
@@ -0,0 +1,107 @@
+import gzip
+import io
+import warnings
+import pytest
+from Bio.PDB import PDBParser
+from utils.structure_arrays import StructureArrays
+from utils.structure_io import (scan_pdb_records, parse_pdb_columns, open_text_buffer, open_binary_buffer,
+                                inflate_buffer)
+
+
+def atom(serial, name, resname, resseq, altloc=" ", occupancy=1.0, chain="A"):
+    return (f"ATOM  {serial:>5} {name:<3} {altloc}{resname:>3} {chain}{resseq:>4}    "
+            f"{serial:8.3f}{0.0:8.3f}{0.0:8.3f}{occupancy:6.2f}{20.0:6.2f}           {name[0]}")
+
+
+# Residue 2 is a point mutation whose variants all carry altlocs (Bio.PDB
+# keeps the last one, GLY); residue 3 is one whose first variant has blank
+# altlocs (Bio.PDB keeps ALA and drops VAL); residue 4 has an alternate CA.
+MICROHETEROGENEOUS_PDB = "\n".join([
+    atom(1, "N", "GLY", 1), atom(2, "CA", "GLY", 1),
+    atom(3, "N", "SER", 2, "A", 0.6), atom(4, "CA", "SER", 2, "A", 0.6),
+    atom(5, "CB", "SER", 2, "A", 0.6), atom(6, "OG", "SER", 2, "A", 0.6),
+    atom(7, "N", "GLY", 2, "B", 0.4), atom(8, "CA", "GLY", 2, "B", 0.4),
+    atom(9, "N", "ALA", 3), atom(10, "CA", "ALA", 3), atom(11, "CB", "ALA", 3),
+    atom(12, "N", "VAL", 3, "B", 0.5), atom(13, "CA", "VAL", 3, "B", 0.5),
+    atom(14, "N", "LYS", 4), atom(15, "CA", "LYS", 4, "A", 0.7), atom(16, "CA", "LYS", 4, "B", 0.3),
+    "END", ""
+])
+
+# Chain A is listed again after chain B, repeating its residues (as large
+# assemblies do once they run out of chain IDs) and adding residue 3
+REPEATED_CHAIN_PDB = "\n".join([
+    atom(1, "N", "GLY", 1), atom(2, "CA", "GLY", 1), atom(3, "N", "ALA", 2), atom(4, "CA", "ALA", 2),
+    atom(5, "N", "SER", 1, chain="B"), atom(6, "CA", "SER", 1, chain="B"),
+    atom(7, "N", "GLY", 1), atom(8, "CA", "GLY", 1), atom(9, "N", "ALA", 2), atom(10, "CA", "ALA", 2),
+    atom(11, "N", "LYS", 3), atom(12, "CA", "LYS", 3),
+    "END", ""
+])
+
+
+def bio_summary(text):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        structure = PDBParser(QUIET=True).get_structure("test", io.StringIO(text))
+    return StructureArrays.from_structure(structure).summary()
+
+
+def test_scan_counts_point_mutations_once():
+    summary = scan_pdb_records(io.BytesIO(MICROHETEROGENEOUS_PDB.encode()))
+    assert summary["residue_count"] == 4
+    assert summary["atom_count"] == 9
+    assert summary["residue_types"] == {"GLY", "ALA", "LYS"}
+    assert summary["chains"] == {"A": {"residue_count": 4, "atom_count": 9}}
+
+
+def test_scan_matches_bio_pdb():
+    summary = scan_pdb_records(io.BytesIO(MICROHETEROGENEOUS_PDB.encode()))
+    expected = bio_summary(MICROHETEROGENEOUS_PDB)
+    for key in ("number_of_models", "chains", "residue_count", "atom_count"):
+        assert summary[key] == expected[key]
+    assert summary["residue_types"] == set(expected["residue_types"])
+
+
+def test_scan_counts_repeated_chain_residues_once():
+    summary = scan_pdb_records(io.BytesIO(REPEATED_CHAIN_PDB.encode()))
+    expected = bio_summary(REPEATED_CHAIN_PDB)
+    assert summary["chains"] == expected["chains"] == {"A": {"residue_count": 3, "atom_count": 6},
+                                                        "B": {"residue_count": 1, "atom_count": 2}}
+    assert summary["residue_count"] == expected["residue_count"] == 4
+    assert summary["atom_count"] == expected["atom_count"] == 8
+
+
+def test_columnar_parse_matches_bio_pdb():
+    arrays = parse_pdb_columns(MICROHETEROGENEOUS_PDB.encode())
+    summary = arrays.summary()
+    expected = bio_summary(MICROHETEROGENEOUS_PDB)
+    for key in ("number_of_models", "chains", "residue_count", "atom_count"):
+        assert summary[key] == expected[key]
+    assert set(summary["residue_types"]) == set(expected["residue_types"])
+    assert list(arrays.residue_names[arrays.residue_name_codes]) == ["GLY", "GLY", "ALA", "LYS"]
+
+
+def test_columnar_parse_drops_repeated_chain_residues():
+    arrays = parse_pdb_columns(REPEATED_CHAIN_PDB.encode())
+    summary = arrays.summary()
+    expected = bio_summary(REPEATED_CHAIN_PDB)
+    for key in ("chains", "residue_count", "atom_count"):
+        assert summary[key] == expected[key]
+    assert list(arrays.coords[:, 0]) == [1.0, 2.0, 3.0, 4.0, 11.0, 12.0, 5.0, 6.0]
+
+
+def test_buffers_are_read_in_place():
+    data = bytearray(MICROHETEROGENEOUS_PDB.encode())
+    with open_text_buffer(memoryview(data)) as handle:
+        assert handle.read() == MICROHETEROGENEOUS_PDB
+    with open_binary_buffer(data) as stream:
+        stream.seek(-4, io.SEEK_END)
+        assert stream.read() == b"END\n"
+    # The views are released on close, so the buffer can be resized again
+    data.extend(b"\n")
+
+
+def test_inflate_buffer_enforces_the_size_limit():
+    archive = gzip.compress(b"A" * 10000)
+    assert inflate_buffer(archive, "gzip", 10000) == b"A" * 10000
+    with pytest.raises(ValueError, match="maximum allowed size"):
+        inflate_buffer(archive, "gzip", 9999)
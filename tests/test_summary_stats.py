@@ -0,0 +1,35 @@
+import numpy as np
+from utils.summary_stats import DistanceSummary
+
+
+def test_blocks_match_the_full_array():
+    rng = np.random.default_rng(0)
+    distance = rng.uniform(0.5, 3.5, 10000)
+    atom1 = np.arange(len(distance))
+    atom2 = atom1 + 1
+    edges = np.linspace(1.0, 3.0, 21)
+
+    summary = DistanceSummary(edges)
+    for block in np.array_split(np.arange(len(distance)), 7):
+        summary.update(distance[block], atom1[block], atom2[block])
+
+    assert summary.count == len(distance)
+    assert np.isclose(summary.mean, distance.mean())
+    assert np.isclose(summary.variance, distance.var())
+    assert np.isclose(summary.std, distance.std())
+    assert summary.min == distance.min() and summary.max == distance.max()
+    assert summary.argmin == (distance.argmin(), distance.argmin() + 1)
+    assert summary.argmax == (distance.argmax(), distance.argmax() + 1)
+
+    # Distances outside the edges are counted in the first and last bins
+    expected = np.histogram(np.clip(distance, edges[0], edges[-1]), edges)[0]
+    assert np.array_equal(summary.histogram, expected)
+    assert summary.histogram.sum() == len(distance)
+
+
+def test_empty_summary():
+    summary = DistanceSummary([0.0, 1.0]).update([], [], [])
+    assert summary.count == 0
+    assert np.isnan(summary.variance)
+    assert summary.argmin is None
+    assert summary.histogram.tolist() == [0]
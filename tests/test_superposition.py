@@ -0,0 +1,76 @@
+import gzip
+import io
+import os
+import numpy as np
+from Bio.PDB import PDBParser
+from Bio.SVDSuperimposer import SVDSuperimposer
+from utils.structure_arrays import StructureArrays
+from utils.superposition import kabsch, superpose_structures, align_residues
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def rotation(axis, degrees):
+    """Rotation matrix about an axis (Rodrigues' formula)"""
+    x, y, z = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+    cross = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    angle = np.radians(degrees)
+    return np.eye(3) + np.sin(angle) * cross + (1 - np.cos(angle)) * cross @ cross
+
+
+def test_kabsch_recovers_a_known_transform():
+    rng = np.random.default_rng(0)
+    target = rng.normal(size=(50, 3)) * 10
+    matrix = rotation([1, -2, 0.5], 110)
+    translation = np.array([5.0, -2.0, 12.0])
+    # mobile is the target moved away; the fit must undo that
+    mobile = (target - translation) @ matrix
+
+    fit = kabsch(mobile, target)
+    assert np.allclose(fit["rotation"][0], matrix, atol=1e-8)
+    assert np.allclose(fit["translation"][0], translation, atol=1e-8)
+    assert fit["rmsd"][0] < 1e-8
+
+
+def test_kabsch_matches_svd_superimposer_on_noisy_points():
+    rng = np.random.default_rng(1)
+    target = rng.normal(size=(40, 3)) * 8
+    mobile = target @ rotation([0, 0, 1], 75) + rng.normal(scale=0.5, size=(40, 3))
+
+    superimposer = SVDSuperimposer()
+    superimposer.set(target, mobile)
+    superimposer.run()
+    fit = kabsch(mobile, target)
+    assert np.isclose(fit["rmsd"][0], superimposer.get_rms())
+    assert np.isclose(np.linalg.det(fit["rotation"][0]), 1.0)
+
+
+def test_grouped_fits_are_independent():
+    rng = np.random.default_rng(2)
+    target = rng.normal(size=(60, 3))
+    mobile = rng.normal(size=(60, 3))
+    groups = np.repeat([0, 1], 30)
+    fit = kabsch(mobile, target, groups)
+    for group in (0, 1):
+        alone = kabsch(mobile[groups == group], target[groups == group])
+        assert np.isclose(fit["rmsd"][group], alone["rmsd"][0])
+        assert np.allclose(fit["rotation"][group], alone["rotation"][0])
+
+
+def test_align_residues_skips_gaps():
+    positions1, positions2, identity = align_residues("MKTAYIAK", "MKTYIAK")
+    assert len(positions1) == len(positions2) == 7
+    assert identity == 1.0
+
+
+def test_superposing_a_moved_copy(beg_arrays):
+    with gzip.open(os.path.join(DATA, "2BEG.pdb.gz"), "rt") as f:
+        structure = PDBParser(QUIET=True).get_structure("moved", io.StringIO(f.read()))
+    for atom in structure.get_atoms():
+        atom.transform(rotation([1, 2, 3], 40), np.array([3.0, 4.0, 5.0]))
+
+    result = superpose_structures(beg_arrays, StructureArrays.from_structure(structure))
+    assert result["aligned_residues"] == 130
+    assert result["rmsd"] < 1e-3
+    assert set(result["chains"]) == {"A", "B", "C", "D", "E"}
+    assert np.all(result["residue_deviation"] < 1e-3)
@@ -0,0 +1,236 @@
+import threading
+from dataclasses import dataclass, field, fields
+import numpy as np
+import pandas as pd
+
+
+class ItemAccess:
+    """Read and write fields with result["name"] as well as result.name
+
+    Results used to be plain dicts; pages and reports still index them by
+    key, so the typed results keep that interface.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return [field.name for field in fields(self) if not field.name.startswith("_")]
+
+
+@dataclass(slots=True)
+class ChainSummary(ItemAccess):
+    """Residue and atom counts of one chain ID"""
+    residue_count: int
+    atom_count: int
+
+
+@dataclass(slots=True)
+class BondCounts(ItemAccess):
+    """Perceived covalent bonds by kind"""
+    total: int
+    intra_residue: int
+    inter_residue: int
+    disulfide: int
+
+
+@dataclass(slots=True)
+class BondStatistics(ItemAccess):
+    """Distance summary of the bonds (or atom pairs) of a structure
+
+    min_bond and max_bond label the extreme pairs with atom, residue and
+    chain names; histogram holds pair counts between consecutive edges.
+    """
+    count: int
+    mean: float
+    variance: float
+    std: float
+    min: float
+    max: float
+    min_bond: dict
+    max_bond: dict
+    histogram: np.ndarray
+    edges: np.ndarray
+
+    @classmethod
+    def from_summary(cls, summary, arrays):
+        """Build from a DistanceSummary, naming the extreme pairs"""
+        min_bond = max_bond = None
+        if summary.count:
+            atom1 = np.array([summary.argmin[0], summary.argmax[0]])
+            atom2 = np.array([summary.argmin[1], summary.argmax[1]])
+            extremes = arrays.atom_pair_frame({
+                "atom1": atom1,
+                "atom2": atom2,
+                "residue": arrays.atom_residue[atom1],
+                "distance": np.array([summary.min, summary.max])
+            })
+            columns = ["atom1", "atom2", "residue", "chain", "distance"]
+            min_bond, max_bond = (
+                {column: extremes[column].iloc[row] for column in columns} for row in (0, 1)
+            )
+        return cls(
+            count=summary.count,
+            mean=summary.mean if summary.count else float("nan"),
+            variance=summary.variance,
+            std=summary.std,
+            min=summary.min if summary.count else float("nan"),
+            max=summary.max if summary.count else float("nan"),
+            min_bond=min_bond,
+            max_bond=max_bond,
+            histogram=summary.histogram,
+            edges=summary.edges
+        )
+
+
+@dataclass(slots=True)
+class SecondaryStructure(ItemAccess):
+    """Per-residue H/E/C labels and per-chain label fractions"""
+    residues: pd.DataFrame
+    chains: dict
+
+
+@dataclass(slots=True)
+class StructureAnalysis(ItemAccess):
+    """Result of PDBAnalyzer.analyze_structure
+
+    Scalars and small summaries are plain fields; per-bond and per-residue
+    data are DataFrames with categorical name columns, so the result stays
+    a few bytes per row and pickles quickly into session state.
+
+    The bond pair table is optional: bond_stats covers what the pages show,
+    and bond_lengths is only built, through the loader set with
+    set_bond_loader(), when first read. Pickling keeps a table that was
+    already built but drops the loader.
+    """
+    structure_id: str
+    number_of_models: int
+    chains: dict
+    residue_count: int
+    atom_count: int
+    residue_types: frozenset
+    bond_stats: BondStatistics = None
+    bond_counts: BondCounts = None
+    secondary_structure: SecondaryStructure = None
+    filename: str = None
+    _bond_lengths: pd.DataFrame = field(default=None, repr=False)
+    _bond_loader: object = field(default=None, repr=False, metadata={"store": False})
+
+    @classmethod
+    def from_summary(cls, structure_id, summary):
+        """Build from a StructureArrays.summary() dict"""
+        return cls(
+            structure_id=structure_id,
+            number_of_models=summary["number_of_models"],
+            chains={chain_id: ChainSummary(**counts) for chain_id, counts in summary["chains"].items()},
+            residue_count=summary["residue_count"],
+            atom_count=summary["atom_count"],
+            residue_types=frozenset(summary["residue_types"])
+        )
+
+    @property
+    def bond_lengths(self):
+        """Per-pair DataFrame of bonds, built on first access"""
+        if self._bond_lengths is None and self._bond_loader is not None:
+            self._bond_lengths = self._bond_loader()
+            self._bond_loader = None
+        return self._bond_lengths
+
+    @bond_lengths.setter
+    def bond_lengths(self, frame):
+        self._bond_lengths = frame
+        self._bond_loader = None
+
+    def keys(self):
+        return ItemAccess.keys(self) + ["bond_lengths"]
+
+    def set_bond_loader(self, loader):
+        """Build bond_lengths lazily with loader(), a callable returning the DataFrame"""
+        self._bond_lengths = None
+        self._bond_loader = loader
+
+    def __getstate__(self):
+        return {field.name: getattr(self, field.name) for field in fields(self) if field.name != "_bond_loader"}
+
+    def __setstate__(self, state):
+        self._bond_loader = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the per-row tables that have been built"""
+        tables = [self._bond_lengths]
+        if self.secondary_structure is not None:
+            tables.append(self.secondary_structure.residues)
+        return sum(int(table.memory_usage(deep=True).sum()) for table in tables if table is not None)
+
+
+class AnalysisHandle:
+    """Structure analysis whose sections are computed on first access
+
+    Each section is a callable returning a dict of result keys; it runs the
+    first time one of its keys is read and its value is kept for later
+    reads. Keys are read like a StructureAnalysis (handle["chains"],
+    handle.get("bond_stats")), so UI code only pays for the panels it shows.
+    Handles hold their section callables and are local to the process.
+    """
+
+    # Result keys provided by each section
+    SECTIONS = {
+        "counts": ("structure_id", "number_of_models", "residue_count", "atom_count", "residue_types"),
+        "chains": ("chains",),
+        "bonds": ("bond_stats", "bond_counts"),
+        "bond_lengths": ("bond_lengths",),
+        "composition": ("residue_counts",),
+        "geometry": ("geometry",),
+        "secondary_structure": ("secondary_structure",)
+    }
+    KEY_SECTIONS = {key: section for section, keys in SECTIONS.items() for key in keys}
+
+    def __init__(self, sections, filename=None):
+        self._factories = dict(sections)
+        self._values = {}
+        self._lock = threading.Lock()
+        self.filename = filename
+
+    def section(self, name):
+        """Values of a section as a dict, computing it on first access"""
+        if name not in self._factories:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = self._factories[name]()
+            return self._values[name]
+
+    def computed(self, name):
+        """Whether a section has been computed yet"""
+        return name in self._values
+
+    def __getitem__(self, key):
+        if key == "filename":
+            return self.filename
+        return self.section(self.KEY_SECTIONS[key])[key]
+
+    def __contains__(self, key):
+        return key == "filename" or key in self.KEY_SECTIONS
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def keys(self):
+        return list(self.KEY_SECTIONS) + ["filename"]
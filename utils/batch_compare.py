@@ -0,0 +1,159 @@
+import contextlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from utils.superposition import trace_similarity
+
+# Measured time to spawn the pool and import its workers' modules; the pool
+# is only used when it is expected to save more than this
+POOL_STARTUP_SECONDS = 1.5
+
+# Pairs compared in-process first, to measure what a pair of this batch
+# costs (from about 1 ms for small proteins to over 10 ms for large ones)
+PROBE_PAIRS = 16
+
+# Structure pairs compared per pool task
+PAIRS_PER_TASK = 32
+
+# Worker state, set once per process by _init_worker
+_worker_memory = None
+_worker_traces = None
+
+
+def pack_traces(traces):
+    """Split Cα traces into one (n, 3) coordinate block and small per-chain metadata
+
+    The metadata lists (chain ID, sequence, start, stop) per chain of every
+    trace, with start/stop indexing rows of the coordinate block.
+    """
+    layout, blocks, offset = [], [], 0
+    for trace in traces:
+        chains = []
+        for chain_id, chain in trace.items():
+            stop = offset + len(chain["coords"])
+            chains.append((chain_id, chain["sequence"], offset, stop))
+            blocks.append(chain["coords"])
+            offset = stop
+        layout.append(chains)
+    coords = np.concatenate(blocks).astype(np.float64) if blocks else np.zeros((0, 3), dtype=np.float64)
+    return coords, layout
+
+
+def unpack_traces(coords, layout):
+    """Rebuild traces from pack_traces() output, as views into the coordinate block"""
+    return [
+        {chain_id: {"sequence": sequence, "coords": coords[start:stop]} for chain_id, sequence, start, stop in chains}
+        for chains in layout
+    ]
+
+
+def _init_worker(name, shape, layout):
+    """Attach a pool worker to the shared coordinate block once, at start-up"""
+    global _worker_memory, _worker_traces
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    coords = np.ndarray(shape, dtype=np.float64, buffer=_worker_memory.buf)
+    _worker_traces = unpack_traces(coords, layout)
+
+
+def _compare_pairs(pairs):
+    """Pool task: compare a chunk of (i, j) trace pairs"""
+    return [trace_similarity(_worker_traces[i], _worker_traces[j]) for i, j in pairs]
+
+
+def _compare_in_pool(traces, pairs, workers):
+    """Compare trace pairs across a process pool sharing one coordinate block
+
+    Coordinates are copied once into shared memory and mapped by every
+    worker; tasks only carry pair indices, so nothing large is pickled.
+    """
+    coords, layout = pack_traces(traces)
+    memory = shared_memory.SharedMemory(create=True, size=max(coords.nbytes, 1))
+    try:
+        shared = np.ndarray(coords.shape, dtype=np.float64, buffer=memory.buf)
+        shared[:] = coords
+        del shared
+
+        chunks = [pairs[start:start + PAIRS_PER_TASK] for start in range(0, len(pairs), PAIRS_PER_TASK)]
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(memory.name, coords.shape, layout)
+        ) as pool:
+            return [result for chunk in pool.map(_compare_pairs, chunks) for result in chunk]
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def pool_pays_off(seconds_per_pair, pair_count, workers):
+    """Whether spreading pairs over workers saves more than the pool's start-up"""
+    return workers > 1 and seconds_per_pair * pair_count * (1 - 1 / workers) > POOL_STARTUP_SECONDS
+
+
+def similarity_matrix(traces, workers=1, pool_slot=None):
+    """All-vs-all Cα RMSD, TM-like score and aligned residue count matrices
+
+    Each unordered pair is compared once. The first PROBE_PAIRS pairs are
+    compared in-process and timed; the rest are spread over a pool of
+    worker processes when, at that cost per pair, the pool saves more than
+    its start-up takes. pool_slot, a context manager, is held while the
+    pool runs.
+    """
+    count = len(traces)
+    pairs = [(i, j) for i in range(count) for j in range(i + 1, count)]
+
+    start = time.perf_counter()
+    results = [trace_similarity(traces[i], traces[j]) for i, j in pairs[:PROBE_PAIRS]]
+    seconds_per_pair = (time.perf_counter() - start) / max(len(results), 1)
+
+    rest = pairs[len(results):]
+    if rest and pool_pays_off(seconds_per_pair, len(rest), workers):
+        with pool_slot or contextlib.nullcontext():
+            results += _compare_in_pool(traces, rest, workers)
+    else:
+        results += [trace_similarity(traces[i], traces[j]) for i, j in rest]
+
+    rmsd = np.zeros((count, count))
+    tm_score = np.eye(count)
+    aligned = np.zeros((count, count), dtype=np.int64)
+    for (i, j), (pair_rmsd, pair_tm, pair_aligned) in zip(pairs, results):
+        rmsd[i, j] = rmsd[j, i] = pair_rmsd
+        tm_score[i, j] = tm_score[j, i] = pair_tm
+        aligned[i, j] = aligned[j, i] = pair_aligned
+    for i, trace in enumerate(traces):
+        aligned[i, i] = sum(int((~np.isnan(chain["coords"]).any(axis=1)).sum()) for chain in trace.values())
+
+    return {"rmsd": rmsd, "tm_score": tm_score, "aligned_residues": aligned}
+
+
+def cluster_order(distance):
+    """Leaf order of an average-linkage (UPGMA) clustering of a distance matrix
+
+    Undefined distances (NaN) are treated as larger than any defined one.
+    Suited to the dozens of structures a batch comparison handles.
+    """
+    count = len(distance)
+    distance = np.array(distance, dtype=np.float64)
+    finite = distance[np.isfinite(distance)]
+    distance[~np.isfinite(distance)] = 2 * finite.max() + 1 if finite.size else 1.0
+    np.fill_diagonal(distance, np.inf)
+
+    members = {index: [index] for index in range(count)}
+    active = list(range(count))
+    while len(active) > 1:
+        sub = distance[np.ix_(active, active)]
+        first, second = np.unravel_index(np.argmin(sub), sub.shape)
+        a, b = active[min(first, second)], active[max(first, second)]
+
+        # Merge b into a; a's distances become size-weighted averages
+        size_a, size_b = len(members[a]), len(members[b])
+        merged = (size_a * distance[a] + size_b * distance[b]) / (size_a + size_b)
+        distance[a, :] = distance[:, a] = merged
+        distance[a, a] = np.inf
+        members[a] = members[a] + members.pop(b)
+        active.remove(b)
+
+    return members[active[0]] if active else []
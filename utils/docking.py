@@ -0,0 +1,345 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from config import (HDOCK_PATH, CREATEPL_PATH, PRODIGY_PATH, PLIP_PATH,
+                    DOCKING_WORK_DIR, DOCKING_MAX_JOBS, STAGE_CACHE_DIR, STAGE_CACHE_MAX_BYTES,
+                    DOCKING_SCREEN_WORKERS, DOCKING_PAIR_TIMEOUT,
+                    DOCKING_JOB_RETENTION, DOCKING_WORK_MAX_BYTES)
+from utils.pipeline import Pipeline, Stage, StageCache, directory_size
+
+
+class JobExpiredError(LookupError):
+    """A docking job, or the files it was run on, has been removed"""
+
+
+# Initialize the docking job manager as a global object
+_docking_jobs = None
+_docking_jobs_lock = threading.Lock()
+
+STAGE_LABELS = {
+    "hdock": "HDOCK docking",
+    "createpl": "Complex generation (createpl)",
+    "prodigy": "PRODIGY binding affinity",
+    "plip": "PLIP interaction profile"
+}
+
+# The pipeline: each stage's inputs and outputs are files in the job directory
+DOCKING_PIPELINE = Pipeline([
+    Stage("hdock", lambda params: [HDOCK_PATH, "receptor.pdb", "antibody.pdb", "-out", "hdock.out"],
+          inputs=("receptor.pdb", "antibody.pdb"), outputs=("hdock.out",)),
+    Stage("createpl", lambda params: [CREATEPL_PATH, "hdock.out", "complex.pdb", "-nmax", "1", "-complex"],
+          inputs=("hdock.out", "receptor.pdb", "antibody.pdb"), outputs=("complex.pdb",)),
+    Stage("prodigy", lambda params: [PRODIGY_PATH, "complex.pdb", "--selection", *params["chains"]],
+          inputs=("complex.pdb",)),
+    Stage("plip", lambda params: [PLIP_PATH, "-f", "complex.pdb", "-o", "plip_results", "-x"],
+          inputs=("complex.pdb",), outputs=("plip_results",))
+], cache=StageCache(STAGE_CACHE_DIR, STAGE_CACHE_MAX_BYTES) if STAGE_CACHE_DIR and STAGE_CACHE_MAX_BYTES else None)
+
+# Pipeline stages, in the order they run
+DOCKING_STAGES = tuple(stage.name for stage in DOCKING_PIPELINE.stages)
+
+
+def get_docking_jobs():
+    """Get or create the process-wide DockingJobs instance"""
+    global _docking_jobs
+    with _docking_jobs_lock:
+        if _docking_jobs is None:
+            _docking_jobs = DockingJobs(DOCKING_WORK_DIR, DOCKING_MAX_JOBS, DOCKING_SCREEN_WORKERS,
+                                        DOCKING_JOB_RETENTION, DOCKING_WORK_MAX_BYTES)
+    return _docking_jobs
+
+
+def binding_affinity(prodigy_output):
+    """Predicted binding affinity from PRODIGY's report, or None"""
+    for line in (prodigy_output or "").splitlines():
+        if "Predicted binding affinity" in line:
+            return line.split(":", 1)[1].strip()
+    return None
+
+
+class DockingJob:
+    """One run of the docking pipeline
+
+    A worker thread updates the job as it goes; pages only read it. Each
+    stage has a status dict as described in Pipeline.
+    """
+
+    def __init__(self, job_id, work_dir, chains, owner=None, timeout=None):
+        self.job_id = job_id
+        self.work_dir = work_dir
+        self.chains = tuple(chains)
+        self.owner = owner
+        self.timeout = timeout
+        self.status = "queued"
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.nbytes = 0
+        self.stages = DOCKING_PIPELINE.status()
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    @property
+    def progress(self):
+        """Fraction of stages finished"""
+        finished = sum(info["status"] in ("done", "cached", "skipped") for info in self.stages.values())
+        return finished / len(self.stages)
+
+    @property
+    def current_stage(self):
+        """Stage now running, or None"""
+        for stage, info in self.stages.items():
+            if info["status"] == "running":
+                return stage
+        return None
+
+    @property
+    def timed_out(self):
+        return any(info["timed_out"] for info in self.stages.values())
+
+    @property
+    def binding_affinity(self):
+        return binding_affinity(self.stages["prodigy"]["stdout"])
+
+    def output_path(self, name):
+        """Path of a file in the job directory, or None if it doesn't exist"""
+        path = os.path.join(self.work_dir, name)
+        return path if os.path.exists(path) else None
+
+
+class DockingScreen:
+    """Every receptor × antibody pair of a screen, each docked as its own job"""
+
+    def __init__(self, screen_id, pairs, chains, owner=None):
+        self.screen_id = screen_id
+        self.pairs = pairs  # (receptor name, antibody name, job ID)
+        self.chains = tuple(chains)
+        self.owner = owner
+        self.submitted = time.time()
+
+
+class DockingJobs:
+    """Background docking jobs shared by every session in the server process
+
+    Jobs run in a directory of their own on thread pools: the stages are
+    external programs, so a thread only waits on its job's current process
+    and the pool size bounds how many docking processes run at once.
+    Single dockings and screens have separate pools, so a long screen never
+    queues ahead of an interactive docking. A job is looked up by its ID,
+    so a page rerun or a new session can attach to a job already running
+    instead of starting it again. Submitting the same inputs while an
+    identical job is still in progress returns that job.
+
+    Finished jobs are forgotten and their directories deleted once they are
+    older than retention seconds, or sooner, oldest first, when the
+    directories of finished jobs take more than max_bytes. Directories left
+    by an earlier server process are deleted once past retention too.
+    """
+
+    def __init__(self, work_dir, max_jobs, screen_workers, retention, max_bytes):
+        self.work_dir = work_dir
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_jobs), thread_name_prefix="docking")
+        self._screen_executor = ThreadPoolExecutor(max_workers=max(1, screen_workers),
+                                                   thread_name_prefix="docking-screen")
+        self._jobs = {}
+        self._active = {}
+        self._screens = {}
+        self._lock = threading.Lock()
+        self._remove_stale()
+
+    def _create(self, receptor, antibody, chains, owner, timeout):
+        """Create a job for these inputs unless an identical one is in progress
+
+        Returns the job ID and the new job (None when attaching to the job in
+        progress). Call with the lock held.
+        """
+        digest = hashlib.sha256()
+        for part in (receptor, antibody, "\0".join(chains).encode(), str(owner).encode()):
+            digest.update(hashlib.sha256(part).digest())
+        key = digest.hexdigest()
+
+        job_id = self._active.get(key)
+        if job_id is not None and not self._jobs[job_id].done:
+            return job_id, None
+
+        job_id = uuid.uuid4().hex
+        job = DockingJob(job_id, os.path.join(self.work_dir, job_id), chains, owner, timeout)
+        os.makedirs(job.work_dir)
+        with open(os.path.join(job.work_dir, "receptor.pdb"), "wb") as f:
+            f.write(receptor)
+        with open(os.path.join(job.work_dir, "antibody.pdb"), "wb") as f:
+            f.write(antibody)
+
+        self._jobs[job_id] = job
+        self._active[key] = job_id
+        return job_id, job
+
+    def submit(self, receptor, antibody, chains, owner=None):
+        """Start docking receptor and antibody (PDB bytes); returns the job ID"""
+        self.cleanup()
+        with self._lock:
+            job_id, job = self._create(receptor, antibody, chains, owner, None)
+        if job is not None:
+            self._start(job, self._executor)
+        return job_id
+
+    def submit_screen(self, receptors, antibodies, chains, owner=None, timeout=DOCKING_PAIR_TIMEOUT):
+        """Dock every receptor against every antibody; returns the screen ID
+
+        receptors and antibodies map names to PDB bytes. Pairs are queued
+        on the screening pool and each has its own time limit in seconds.
+        """
+        self.cleanup()
+        pairs = []
+        new_jobs = []
+        with self._lock:
+            for receptor_name, receptor in receptors.items():
+                for antibody_name, antibody in antibodies.items():
+                    job_id, job = self._create(receptor, antibody, chains, owner, timeout or None)
+                    pairs.append((receptor_name, antibody_name, job_id))
+                    if job is not None:
+                        new_jobs.append(job)
+            screen = DockingScreen(uuid.uuid4().hex, pairs, chains, owner)
+            self._screens[screen.screen_id] = screen
+        for job in new_jobs:
+            self._start(job, self._screen_executor)
+        return screen.screen_id
+
+    def get_screen(self, screen_id):
+        """The screen with this ID, or None"""
+        with self._lock:
+            return self._screens.get(screen_id)
+
+    def screen_results(self, screen_id):
+        """One row per pair of a screen, filled in as its jobs finish"""
+        screen = self.get_screen(screen_id)
+        rows = []
+        for receptor_name, antibody_name, job_id in screen.pairs:
+            job = self.get(job_id)
+            if job is None:
+                rows.append({"Receptor": receptor_name, "Antibody": antibody_name, "Status": "expired",
+                             "Job ID": job_id})
+                continue
+            affinity = pd.to_numeric(job.binding_affinity, errors="coerce")
+            seconds = (job.finished or time.time()) - job.started if job.started else None
+            rows.append({
+                "Receptor": receptor_name,
+                "Antibody": antibody_name,
+                "Status": "timed out" if job.timed_out else job.status,
+                "Binding Affinity (kcal/mol)": affinity,
+                "Time (s)": seconds,
+                "Error": job.error,
+                "Job ID": job_id
+            })
+        return pd.DataFrame(rows, columns=["Receptor", "Antibody", "Status", "Binding Affinity (kcal/mol)",
+                                           "Time (s)", "Error", "Job ID"])
+
+    def get(self, job_id):
+        """The job with this ID, or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner=None):
+        """Jobs of one owner (or all jobs), newest first"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+        return sorted(jobs, key=lambda job: job.submitted, reverse=True)
+
+    def resubmit(self, job_id, chains):
+        """Run a job's receptor and antibody again with another chain selection
+
+        Only the stages whose inputs or arguments change run again; the rest
+        come from the stage cache. Raises JobExpiredError when the job or its
+        input files have already been cleaned up.
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise JobExpiredError(f"Docking job {job_id} is no longer available")
+        try:
+            with open(os.path.join(job.work_dir, "receptor.pdb"), "rb") as f:
+                receptor = f.read()
+            with open(os.path.join(job.work_dir, "antibody.pdb"), "rb") as f:
+                antibody = f.read()
+        except FileNotFoundError as e:
+            raise JobExpiredError(f"The input files of docking job {job_id} are no longer available") from e
+        return self.submit(receptor, antibody, chains, job.owner)
+
+    def _start(self, job, executor):
+        """Finish a job from the stage cache right away, or queue it on executor
+
+        A pair docked before (by any job or screen) completes without
+        waiting for a free worker; a partial hit keeps its cached stages and
+        queues the rest.
+        """
+        started = time.time()
+        if DOCKING_PIPELINE.restore(job.work_dir, {"chains": job.chains}, job.stages):
+            job.started = started
+            job.nbytes = directory_size(job.work_dir)
+            job.status = "completed"
+            job.finished = time.time()
+        else:
+            executor.submit(self._run, job)
+
+    def _run(self, job):
+        """Run the pipeline for a job"""
+        job.status = "running"
+        job.started = time.time()
+        deadline = job.started + job.timeout if job.timeout else None
+        try:
+            succeeded = DOCKING_PIPELINE.run(job.work_dir, {"chains": job.chains}, job.stages, deadline)
+            failed = [STAGE_LABELS[stage] for stage, info in job.stages.items() if info["status"] == "failed"]
+            if failed:
+                job.error = f"{', '.join(failed)} {'timed out' if job.timed_out else 'failed'}"
+            job.status = "completed" if succeeded else "failed"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.nbytes = directory_size(job.work_dir)
+            job.finished = time.time()
+        self.cleanup()
+
+    def cleanup(self):
+        """Delete finished jobs past retention, then the oldest ones beyond max_bytes"""
+        now = time.time()
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.finished)
+            total = sum(job.nbytes for job in finished)
+            expired = []
+            for job in finished:
+                if now - job.finished > self.retention or total > self.max_bytes:
+                    expired.append(job)
+                    total -= job.nbytes
+            for job in expired:
+                del self._jobs[job.job_id]
+            self._active = {key: job_id for key, job_id in self._active.items() if job_id in self._jobs}
+            self._screens = {
+                screen_id: screen for screen_id, screen in self._screens.items()
+                if any(job_id in self._jobs for _, _, job_id in screen.pairs)
+            }
+        for job in expired:
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def _remove_stale(self):
+        """Delete job directories of earlier server processes that are past retention"""
+        cutoff = time.time() - self.retention
+        try:
+            with os.scandir(self.work_dir) as scan:
+                for entry in scan:
+                    try:
+                        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
@@ -0,0 +1,294 @@
+import numpy as np
+
+# Upper bound on atom pairs evaluated per vectorized block
+PAIR_BLOCK_SIZE = 1 << 20
+
+
+def residue_atom_ranges(arrays):
+    """Start offset and atom count of every residue
+
+    Atoms of a residue are stored contiguously, in residue order, so each
+    residue is fully described by its first atom and its size.
+    """
+    counts = np.bincount(arrays.atom_residue, minlength=arrays.residue_count)
+    starts = np.cumsum(counts) - counts
+    return starts, counts
+
+
+def intra_residue_distances(arrays, residues=None, summary=None):
+    """Compute all intra-residue atom pair distances with NumPy broadcasting
+
+    Residues are grouped by atom count so every residue in a group shares the
+    same upper-triangle pair pattern; each group is evaluated as one
+    (residues x pairs x 3) difference block. Results are returned as parallel
+    arrays ordered by residue, then by pair (i < j), matching the order of a
+    nested loop over each residue's atoms. Each block is also folded into
+    summary (a DistanceSummary) when one is given.
+    """
+    starts, counts = residue_atom_ranges(arrays)
+    if residues is None:
+        residues = np.arange(arrays.residue_count)
+    residues = np.asarray(residues, dtype=np.int64)
+
+    sizes = counts[residues]
+    pair_counts = sizes * (sizes - 1) // 2
+    offsets = np.cumsum(pair_counts) - pair_counts
+    total = int(pair_counts.sum())
+
+    distance = np.empty(total, dtype=np.float32)
+    atom1 = np.empty(total, dtype=np.int32)
+    atom2 = np.empty(total, dtype=np.int32)
+    residue = np.empty(total, dtype=np.int32)
+
+    coords = arrays.coords
+    for size in np.unique(sizes[sizes > 1]):
+        i, j = np.triu_indices(size, k=1)
+        group = np.flatnonzero(sizes == size)
+
+        # Keep each block bounded so very large residues don't exhaust memory
+        step = max(1, PAIR_BLOCK_SIZE // len(i))
+        for block_start in range(0, len(group), step):
+            block = group[block_start:block_start + step]
+            first = starts[residues[block]][:, None]
+            left = first + i
+            right = first + j
+
+            delta = coords[left] - coords[right]
+            slots = offsets[block][:, None] + np.arange(len(i))
+
+            distance[slots] = np.sqrt(np.einsum("ijk,ijk->ij", delta, delta))
+            atom1[slots] = left
+            atom2[slots] = right
+            residue[slots] = residues[block][:, None]
+            if summary is not None:
+                summary.update(distance[slots], left, right)
+
+    return {
+        "distance": distance,
+        "atom1": atom1,
+        "atom2": atom2,
+        "residue": residue
+    }
+
+
+# Covalent radii in Angstrom (Cordero et al., 2008) for elements found in PDB entries
+COVALENT_RADII = {
+    "H": 0.31, "D": 0.31, "B": 0.84, "C": 0.76, "N": 0.71, "O": 0.66, "F": 0.57,
+    "NA": 1.66, "MG": 1.41, "AL": 1.21, "SI": 1.11, "P": 1.07, "S": 1.05, "CL": 1.02,
+    "K": 2.03, "CA": 1.76, "MN": 1.39, "FE": 1.32, "CO": 1.26, "NI": 1.24, "CU": 1.32,
+    "ZN": 1.22, "SE": 1.20, "BR": 1.20, "I": 1.39
+}
+DEFAULT_COVALENT_RADIUS = 0.77
+
+# Two atoms are bonded when their distance is within the sum of their radii plus this slack
+BOND_TOLERANCE = 0.45
+MIN_BOND_DISTANCE = 0.4
+
+# Use a dense cell table while it has at most this many cells per point
+DENSE_GRID_FACTOR = 8
+
+# Offsets of a cell and its 26 neighbours
+_NEIGHBOR_OFFSETS = np.array(
+    [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)],
+    dtype=np.int64
+)
+
+
+def _expand_ranges(starts, ends):
+    """Flatten half-open index ranges [start, end) into (owner, index) arrays"""
+    counts = ends - starts
+    owner = np.repeat(np.arange(len(starts)), counts)
+    first = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return owner, first + np.arange(len(owner))
+
+
+class CellGrid:
+    """Uniform-grid spatial hash over a set of points
+
+    Points are binned into cubic cells whose edge is at least the largest
+    query cutoff, so every neighbour of a point lies in its own cell or one
+    of the 26 adjacent cells. Building and querying are both linear in the
+    number of points for the roughly uniform density of molecular structures.
+    The grid is padded with one empty cell on every side, which lets
+    neighbour cells be addressed by constant key offsets without bounds checks.
+    """
+
+    def __init__(self, coords, cell_size):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+
+        if len(self.coords):
+            self.origin = self.coords.min(axis=0)
+            self.shape = np.floor((self.coords.max(axis=0) - self.origin) / self.cell_size).astype(np.int64) + 3
+        else:
+            self.origin = np.zeros(3, dtype=np.float32)
+            self.shape = np.full(3, 3, dtype=np.int64)
+        self.key_offsets = _NEIGHBOR_OFFSETS @ np.array([self.shape[1] * self.shape[2], self.shape[2], 1])
+
+        keys = self._keys(self.coords)
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+        self.sorted_coords = self.coords[self.order]
+
+        # A dense cell -> first point table gives O(1) lookups; fall back to
+        # binary search over occupied cells when the grid is mostly empty
+        cell_total = int(np.prod(self.shape))
+        if cell_total <= max(DENSE_GRID_FACTOR * len(keys), 1 << 16):
+            counts = np.bincount(keys, minlength=cell_total)
+            self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        else:
+            self.cell_start = None
+
+    def _keys(self, points):
+        """Cell key of every point, clamped to the grid's interior cells
+
+        Clamping is safe: a point outside the grid is at least one cell away
+        from every stored point, so it only gains extra candidates that the
+        exact distance check rejects.
+        """
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64) + 1
+        np.clip(cells, 1, self.shape - 2, out=cells)
+        return (cells[:, 0] * self.shape[1] + cells[:, 1]) * self.shape[2] + cells[:, 2]
+
+    def _cell_ranges(self, keys):
+        """Half-open ranges of sorted point slots held by each cell key"""
+        if self.cell_start is not None:
+            return self.cell_start[keys], self.cell_start[keys + 1]
+        return (
+            np.searchsorted(self.sorted_keys, keys, side="left"),
+            np.searchsorted(self.sorted_keys, keys, side="right")
+        )
+
+    def _scan(self, points, keys, key_offsets, cutoff, same_set=False):
+        """Yield (query slot, grid slot, distance) blocks, one per neighbour offset"""
+        cutoff_sq = cutoff * cutoff
+        for key_offset in key_offsets:
+            starts, ends = self._cell_ranges(keys + key_offset)
+            owner, slot = _expand_ranges(starts, ends)
+            if same_set and key_offset == 0:
+                # Within a cell, keep each unordered pair once
+                keep = owner < slot
+                owner, slot = owner[keep], slot[keep]
+
+            delta = points[owner] - self.sorted_coords[slot]
+            distance_sq = np.einsum("ij,ij->i", delta, delta)
+            close = distance_sq <= cutoff_sq
+            yield owner[close], slot[close], np.sqrt(distance_sq[close])
+
+    def query(self, points, cutoff):
+        """Find all (point, grid point) pairs closer than cutoff
+
+        Returns parallel arrays of query indices, grid indices and distances.
+        The cutoff must not exceed the grid's cell size.
+        """
+        if cutoff > self.cell_size:
+            raise ValueError("Query cutoff exceeds the grid cell size")
+
+        points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+
+        # Visit query points in cell order so the gathers walk memory mostly
+        # sequentially instead of jumping across the whole structure
+        keys = self._keys(points)
+        visit = np.argsort(keys, kind="stable")
+
+        found = list(self._scan(points[visit], keys[visit], self.key_offsets, cutoff))
+        return (
+            np.concatenate([visit[owner] for owner, _, _ in found]),
+            np.concatenate([self.order[slot] for _, slot, _ in found]),
+            np.concatenate([distance for _, _, distance in found])
+        )
+
+    def self_pairs(self, cutoff):
+        """Find all unique pairs (i < j) of grid points closer than cutoff
+
+        Only the cell itself and the 13 neighbours with a larger key are
+        scanned, so each pair is examined once.
+        """
+        if cutoff > self.cell_size:
+            raise ValueError("Query cutoff exceeds the grid cell size")
+
+        half_shell = self.key_offsets[self.key_offsets >= 0]
+        found = list(self._scan(self.sorted_coords, self.sorted_keys, half_shell, cutoff, same_set=True))
+
+        first = np.concatenate([self.order[owner] for owner, _, _ in found])
+        second = np.concatenate([self.order[slot] for _, slot, _ in found])
+        distance = np.concatenate([distance for _, _, distance in found])
+
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        order = np.lexsort((second, first))
+        return first[order], second[order], distance[order]
+
+
+def structure_geometry(arrays, model_index=0):
+    """Centroid, radius of gyration and bounding box dimensions of one model's atoms"""
+    coords = arrays.coords[arrays.atom_model == model_index].astype(np.float64)
+    if len(coords) == 0:
+        return {"centroid": None, "radius_of_gyration": None, "dimensions": None}
+    centroid = coords.mean(axis=0)
+    return {
+        "centroid": centroid.tolist(),
+        "radius_of_gyration": float(np.sqrt(np.square(coords - centroid).sum(axis=1).mean())),
+        "dimensions": (coords.max(axis=0) - coords.min(axis=0)).tolist()
+    }
+
+
+def covalent_radii(arrays):
+    """Covalent radius of every atom, looked up once per element category"""
+    table = np.array(
+        [COVALENT_RADII.get(element.upper(), DEFAULT_COVALENT_RADIUS) for element in arrays.elements],
+        dtype=np.float32
+    )
+    if table.size == 0:
+        return np.zeros(arrays.atom_count, dtype=np.float32)
+    return table[arrays.element_codes]
+
+
+def perceive_bonds(arrays, atoms=None, summary=None):
+    """Detect covalent bonds from element radii using a cell-grid neighbour search
+
+    Two atoms are bonded when their distance lies between MIN_BOND_DISTANCE
+    and the sum of their covalent radii plus BOND_TOLERANCE. Bonds between
+    residues (peptide links, disulfides, ligand attachments) are found as well
+    as bonds within a residue. Results are parallel arrays like those of
+    intra_residue_distances; "residue" is the residue of the first atom.
+    The bonds are folded into summary (a DistanceSummary) when one is given.
+    """
+    if atoms is None:
+        atoms = np.arange(arrays.atom_count)
+    atoms = np.asarray(atoms, dtype=np.int64)
+
+    radii = covalent_radii(arrays)[atoms]
+    cutoff = 2.0 * float(radii.max(initial=DEFAULT_COVALENT_RADIUS)) + BOND_TOLERANCE
+
+    grid = CellGrid(arrays.coords[atoms], cutoff)
+    first, second, distance = grid.self_pairs(cutoff)
+
+    bonded = (distance >= MIN_BOND_DISTANCE) & (distance <= radii[first] + radii[second] + BOND_TOLERANCE)
+    atom1 = atoms[first[bonded]].astype(np.int32)
+    atom2 = atoms[second[bonded]].astype(np.int32)
+    distance = distance[bonded].astype(np.float32)
+    if summary is not None:
+        summary.update(distance, atom1, atom2)
+
+    return {
+        "distance": distance,
+        "atom1": atom1,
+        "atom2": atom2,
+        "residue": arrays.atom_residue[atom1]
+    }
+
+
+def classify_bonds(arrays, bonds):
+    """Count perceived bonds by kind: intra-residue, inter-residue and disulfide"""
+    inter_residue = arrays.atom_residue[bonds["atom1"]] != arrays.atom_residue[bonds["atom2"]]
+
+    sulfur = np.flatnonzero(arrays.elements == "S")
+    is_sulfur = np.isin(arrays.element_codes, sulfur)
+    disulfide = inter_residue & is_sulfur[bonds["atom1"]] & is_sulfur[bonds["atom2"]]
+
+    return {
+        "total": int(len(bonds["distance"])),
+        "intra_residue": int((~inter_residue).sum()),
+        "inter_residue": int(inter_residue.sum()),
+        "disulfide": int(disulfide.sum())
+    }
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from utils.geometry import CellGrid
+from utils.structure_arrays import encode_labels
+
+# Heavy atoms of two partners closer than this are in contact (Angstrom)
+INTERFACE_CUTOFF = 4.5
+
+# Residues never counted as part of an interface
+SOLVENT_RESIDUES = ("HOH", "WAT", "DOD")
+
+
+def interface_atoms(arrays, model_index=0):
+    """Indices of the heavy, non-solvent atoms of one model"""
+    hydrogen = np.isin(arrays.elements, ["H", "D"])
+    solvent = np.isin(arrays.residue_names, SOLVENT_RESIDUES)
+    keep = (
+        (arrays.atom_model == model_index)
+        & ~hydrogen[arrays.element_codes]
+        & ~solvent[arrays.residue_name_codes[arrays.atom_residue]]
+    )
+    return np.flatnonzero(keep)
+
+
+def _near_box(coords, other, margin):
+    """Mask of points within margin of the bounding box of other"""
+    if len(other) == 0:
+        return np.zeros(len(coords), dtype=bool)
+    low, high = other.min(axis=0) - margin, other.max(axis=0) + margin
+    return np.all((coords >= low) & (coords <= high), axis=1)
+
+
+def residue_labels(arrays, residues):
+    """Chain, residue number, insertion code and name columns for residue rows
+
+    Name columns are categorical, sharing the structure's category arrays.
+    """
+    chain_codes, chain_categories = encode_labels(arrays.chain_ids)
+    return {
+        "chain": pd.Categorical.from_codes(chain_codes[arrays.residue_chain[residues]], chain_categories),
+        "residue_number": arrays.residue_seq[residues],
+        "insertion_code": pd.Categorical(arrays.residue_icode[residues]),
+        "residue_name": pd.Categorical.from_codes(arrays.residue_name_codes[residues], arrays.residue_names)
+    }
+
+
+def _interface_residues(arrays, residues):
+    """Table of the residues of one partner that make contacts, with contact counts"""
+    unique, counts = np.unique(residues, return_counts=True)
+    frame = pd.DataFrame(residue_labels(arrays, unique))
+    frame["atom_contacts"] = counts
+    return frame
+
+
+def interface_contacts(receptor, antibody, cutoff=INTERFACE_CUTOFF, model_index=0):
+    """Find the atom and residue contacts between two partners of a complex
+
+    A cell grid with cutoff-sized cells is built over the receptor's heavy
+    atoms and queried with the antibody's, so the work grows linearly with
+    the number of atoms. Atoms outside the other partner's bounding box
+    (plus the cutoff) are dropped before indexing, as they can't be in
+    contact. Waters and hydrogens are ignored.
+
+    Returns the atom contacts as parallel index arrays, residue-level
+    contacts and per-partner interface residue tables as DataFrames, and
+    counts of buried atoms (atoms with at least one contact) per partner.
+    """
+    atoms1 = interface_atoms(receptor, model_index)
+    atoms2 = interface_atoms(antibody, model_index)
+    coords1, coords2 = receptor.coords[atoms1], antibody.coords[atoms2]
+
+    near1 = _near_box(coords1, coords2, cutoff)
+    near2 = _near_box(coords2, coords1, cutoff)
+    atoms1, coords1 = atoms1[near1], coords1[near1]
+    atoms2, coords2 = atoms2[near2], coords2[near2]
+
+    if len(atoms1) and len(atoms2):
+        antibody_index, receptor_index, distance = CellGrid(coords1, cutoff).query(coords2, cutoff)
+        order = np.lexsort((antibody_index, receptor_index))
+        contact1 = atoms1[receptor_index[order]]
+        contact2 = atoms2[antibody_index[order]]
+        distance = distance[order].astype(np.float32)
+    else:
+        contact1 = contact2 = np.zeros(0, dtype=np.int64)
+        distance = np.zeros(0, dtype=np.float32)
+
+    residues1 = receptor.atom_residue[contact1]
+    residues2 = antibody.atom_residue[contact2]
+
+    # Residue pairs: atom contact count and closest approach per pair
+    pair_key = residues1.astype(np.int64) * max(antibody.residue_count, 1) + residues2
+    pairs, first, inverse, pair_counts = np.unique(pair_key, return_index=True, return_inverse=True, return_counts=True)
+    min_distance = np.full(len(pairs), np.inf, dtype=np.float32)
+    np.minimum.at(min_distance, inverse.ravel(), distance)
+
+    labels1 = residue_labels(receptor, residues1[first])
+    labels2 = residue_labels(antibody, residues2[first])
+    residue_contacts = pd.DataFrame({
+        "receptor_chain": labels1["chain"],
+        "receptor_residue": labels1["residue_number"],
+        "receptor_residue_name": labels1["residue_name"],
+        "antibody_chain": labels2["chain"],
+        "antibody_residue": labels2["residue_number"],
+        "antibody_residue_name": labels2["residue_name"],
+        "atom_contacts": pair_counts,
+        "min_distance": min_distance
+    })
+
+    chain_contacts = (
+        residue_contacts.groupby(["receptor_chain", "antibody_chain"], observed=True)["atom_contacts"].sum()
+        if len(residue_contacts) else pd.Series(dtype=np.int64)
+    )
+
+    return {
+        "cutoff": cutoff,
+        "atom_contacts": {
+            "receptor_atom": contact1,
+            "antibody_atom": contact2,
+            "distance": distance
+        },
+        "contact_count": int(len(distance)),
+        "residue_contacts": residue_contacts,
+        "receptor_residues": _interface_residues(receptor, residues1),
+        "antibody_residues": _interface_residues(antibody, residues2),
+        "chain_contacts": {f"{chain1}-{chain2}": int(count) for (chain1, chain2), count in chain_contacts.items()},
+        "buried_atoms": {
+            "receptor": int(len(np.unique(contact1))),
+            "antibody": int(len(np.unique(contact2)))
+        }
+    }
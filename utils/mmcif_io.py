@@ -0,0 +1,354 @@
+import re
+import numpy as np
+from utils.structure_arrays import StructureArrays, encode_labels
+from utils.structure_io import open_binary_buffer, segment_atoms, guess_element, DECODE_BLOCK_ROWS
+
+# Values marking an mmCIF item as inapplicable (".") or unknown ("?")
+_UNASSIGNED = (b".", b"?")
+
+# mmCIF tokens: quoted strings may contain the quote character when it is
+# not followed by whitespace (e.g. 'O5'' style atom names)
+_CIF_TOKEN = re.compile(rb"""'(?:[^']|'(?=\S))*'|"(?:[^"]|"(?=\S))*"|\S+""")
+
+# BinaryCIF ByteArray type codes (always little endian)
+_BCIF_DTYPES = {
+    1: np.dtype("<i1"),
+    2: np.dtype("<i2"),
+    3: np.dtype("<i4"),
+    4: np.dtype("<u1"),
+    5: np.dtype("<u2"),
+    6: np.dtype("<u4"),
+    32: np.dtype("<f4"),
+    33: np.dtype("<f8")
+}
+
+
+def _tokenize(line):
+    """Split an mmCIF data line into tokens, removing quotes"""
+    if b"'" not in line and b'"' not in line:
+        return line.split()
+    tokens = _CIF_TOKEN.findall(line)
+    return [token[1:-1] if token[:1] in (b"'", b'"') and len(token) > 1 else token for token in tokens]
+
+
+class CIFColumns:
+    """Column reader over the _atom_site category of a text mmCIF buffer
+
+    Only the atom_site loop is tokenized. Tokenizing creates a bytes object
+    per value, but rows are collected in bounded blocks and stored as
+    fixed-width byte-string columns, so those objects never outlive the
+    block they were read in.
+    """
+
+    def __init__(self, data):
+        self.columns = {}
+        with open_binary_buffer(data) as stream:
+            self._read_atom_site(stream)
+
+    def _read_atom_site(self, lines):
+        """Locate the _atom_site category and decode it column by column"""
+        names, blocks, pending = [], [], []
+        in_loop = loop_header = False
+        line_number = 0
+
+        def flush():
+            if pending:
+                if len(pending) % len(names):
+                    raise ValueError(f"Incomplete _atom_site row before line {line_number}.")
+                blocks.append(np.array(pending, dtype=bytes).reshape(-1, len(names)))
+                pending.clear()
+
+        for line_number, line in enumerate(lines, start=1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith(b"#"):
+                continue
+
+            if stripped == b"loop_":
+                if names:
+                    break
+                in_loop, loop_header = True, True
+                continue
+
+            if stripped.startswith(b"_"):
+                item = stripped.split(None, 1)
+                if not item[0].startswith(b"_atom_site."):
+                    if names:
+                        break
+                    in_loop = False
+                    continue
+                if in_loop and loop_header:
+                    names.append(item[0].decode("ascii"))
+                elif not in_loop and len(item) == 2:
+                    # Single-row category written as key-value pairs
+                    names.append(item[0].decode("ascii"))
+                    pending.extend(_tokenize(item[1]))
+                else:
+                    raise ValueError(f"Unsupported _atom_site item at line {line_number}.")
+                continue
+
+            if not names or not in_loop:
+                if names:
+                    break
+                continue
+            if stripped.startswith((b"data_", b"save_", b"global_", b"stop_")):
+                break
+            if stripped.startswith(b";"):
+                raise ValueError(f"Multi-line values are not supported in _atom_site (line {line_number}).")
+
+            loop_header = False
+            pending.extend(_tokenize(stripped))
+            if len(pending) >= DECODE_BLOCK_ROWS * len(names):
+                flush()
+
+        if not names:
+            raise ValueError("No _atom_site category found.")
+        flush()
+
+        table = np.concatenate(blocks) if blocks else np.zeros((0, len(names)), dtype=bytes)
+        for index, name in enumerate(names):
+            self.columns[name[len("_atom_site."):]] = np.ascontiguousarray(table[:, index])
+
+    @property
+    def row_count(self):
+        return len(next(iter(self.columns.values())))
+
+    def has(self, name):
+        return name in self.columns
+
+    def present(self, name):
+        """Rows where the item has a value (neither "." nor "?")"""
+        values = self.columns[name]
+        return (values != _UNASSIGNED[0]) & (values != _UNASSIGNED[1])
+
+    def text(self, name):
+        """String column, with unassigned values as empty strings"""
+        values = np.where(self.present(name), self.columns[name], b"")
+        return values.astype(str)
+
+    def number(self, name, what):
+        """Numeric column; raises ValueError on unassigned or malformed values"""
+        try:
+            return self.columns[name].astype(np.float64)
+        except ValueError:
+            raise ValueError(f"Invalid or missing {what} in _atom_site.{name}.") from None
+
+
+def _unpack_integers(data, byte_count, is_unsigned, size):
+    """Decode BinaryCIF IntegerPacking: runs of limit values add up to one value"""
+    if data.dtype.itemsize != byte_count:
+        raise ValueError("Corrupt IntegerPacking column.")
+    if is_unsigned:
+        limits = (np.iinfo(data.dtype).max,)
+    else:
+        limits = (np.iinfo(data.dtype).max, np.iinfo(data.dtype).min)
+    continued = np.isin(data, limits)
+
+    # Each value ends at the first element that is not a limit value
+    first = np.flatnonzero(np.concatenate(([True], ~continued[:-1])))
+    values = np.add.reduceat(data.astype(np.int64), first) if len(data) else np.zeros(0, dtype=np.int64)
+    if len(values) != size:
+        raise ValueError("Corrupt IntegerPacking column.")
+    return values.astype(np.uint32 if is_unsigned else np.int32)
+
+
+def decode_bcif(encoded):
+    """Decode a BinaryCIF encoded data block ({"data", "encoding"}) into a NumPy array
+
+    Encodings are undone last to first, each as a single vectorized step.
+    """
+    data = encoded["data"]
+    for encoding in reversed(encoded["encoding"]):
+        kind = encoding["kind"]
+        if kind == "ByteArray":
+            data = np.frombuffer(data, dtype=_BCIF_DTYPES[encoding["type"]])
+        elif kind == "FixedPoint":
+            data = np.divide(data, encoding["factor"], dtype=_BCIF_DTYPES[encoding["srcType"]])
+        elif kind == "IntervalQuantization":
+            step = (encoding["max"] - encoding["min"]) / (encoding["numSteps"] - 1)
+            dtype = _BCIF_DTYPES[encoding["srcType"]]
+            data = (encoding["min"] + data * step).astype(dtype)
+        elif kind == "RunLength":
+            data = np.repeat(data[::2].astype(_BCIF_DTYPES[encoding["srcType"]]), data[1::2])
+            if len(data) != encoding["srcSize"]:
+                raise ValueError("Corrupt RunLength column.")
+        elif kind == "Delta":
+            data = data.astype(_BCIF_DTYPES[encoding["srcType"]])
+            if len(data):
+                data[0] += encoding["origin"]
+            data = np.cumsum(data, dtype=data.dtype)
+        elif kind == "IntegerPacking":
+            data = _unpack_integers(data, encoding["byteCount"], encoding["isUnsigned"], encoding["srcSize"])
+        elif kind == "StringArray":
+            offsets = decode_bcif({"data": encoding["offsets"], "encoding": encoding["offsetEncoding"]})
+            indices = decode_bcif({"data": data, "encoding": encoding["dataEncoding"]})
+            text = encoding["stringData"]
+            strings = np.array([text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)] or [""], dtype=str)
+            data = strings[np.maximum(indices, 0)]
+        else:
+            raise ValueError(f"Unsupported BinaryCIF encoding '{kind}'.")
+    return data
+
+
+class BinaryCIFColumns:
+    """Column reader over the _atom_site category of a BinaryCIF buffer
+
+    BinaryCIF stores each column as an encoded byte array (run-length,
+    delta, integer packing, fixed point or string tables), so decoding is a
+    handful of NumPy operations per column rather than a loop over atoms.
+    Columns are decoded on first use.
+    """
+
+    def __init__(self, data):
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError("BinaryCIF support requires the msgpack package.") from None
+
+        try:
+            document = msgpack.unpackb(data, raw=False)
+            categories = {
+                category["name"]: category
+                for block in document["dataBlocks"][:1]
+                for category in block["categories"]
+            }
+        except Exception:
+            raise ValueError("Not a valid BinaryCIF file.") from None
+
+        if "_atom_site" not in categories:
+            raise ValueError("No _atom_site category found.")
+        atom_site = categories["_atom_site"]
+        self.row_count = atom_site["rowCount"]
+        self._encoded = {column["name"]: column for column in atom_site["columns"]}
+        self._decoded = {}
+
+    def has(self, name):
+        return name in self._encoded
+
+    def _column(self, name):
+        if name not in self._decoded:
+            column = self._encoded[name]
+            values = decode_bcif(column["data"])
+            if column.get("mask"):
+                present = decode_bcif(column["mask"]) == 0
+            else:
+                present = np.ones(len(values), dtype=bool)
+            self._decoded[name] = (values, present)
+        return self._decoded[name]
+
+    def present(self, name):
+        """Rows where the item has a value (not masked as "." or "?")"""
+        return self._column(name)[1]
+
+    def text(self, name):
+        """String column, with unassigned values as empty strings"""
+        values, present = self._column(name)
+        return np.where(present, values.astype(str), "")
+
+    def number(self, name, what):
+        """Numeric column; raises ValueError on unassigned or malformed values"""
+        values, present = self._column(name)
+        if not present.all():
+            raise ValueError(f"Invalid or missing {what} in _atom_site.{name}.")
+        try:
+            return values.astype(np.float64)
+        except ValueError:
+            raise ValueError(f"Invalid or missing {what} in _atom_site.{name}.") from None
+
+
+def atom_site_arrays(columns, structure_id="structure"):
+    """Build StructureArrays from the _atom_site columns of an mmCIF/BinaryCIF file
+
+    Follows Bio.PDB's MMCIFParser: author chain IDs and residue numbers,
+    label atom and residue names, and a new model whenever
+    pdbx_PDB_model_num changes. Atoms without a residue number are skipped.
+    """
+    for name in ("label_atom_id", "label_comp_id", "Cartn_x", "Cartn_y", "Cartn_z"):
+        if not columns.has(name):
+            raise ValueError(f"Missing _atom_site.{name} column.")
+
+    seq_name = "auth_seq_id" if columns.has("auth_seq_id") else "label_seq_id"
+    chain_name = "auth_asym_id" if columns.has("auth_asym_id") else "label_asym_id"
+    rows = np.flatnonzero(columns.present(seq_name))
+
+    def column_text(name, default=""):
+        if columns.has(name):
+            return columns.text(name)[rows]
+        return np.full(len(rows), default)
+
+    resseq = columns.number(seq_name, "residue number")[rows] if len(rows) else np.zeros(0)
+    if np.any(resseq != np.round(resseq)):
+        raise ValueError(f"Invalid residue number in _atom_site.{seq_name}.")
+    resseq = resseq.astype(np.int32)
+
+    # Models change whenever the model number does
+    if columns.has("pdbx_PDB_model_num"):
+        model_num = columns.number("pdbx_PDB_model_num", "model number")[rows].astype(np.int32)
+        new_model = np.ones(len(rows), dtype=bool)
+        new_model[1:] = model_num[1:] != model_num[:-1]
+        atom_model = (np.cumsum(new_model) - 1).astype(np.int32)
+        model_ids = model_num[new_model]
+    else:
+        atom_model = np.zeros(len(rows), dtype=np.int32)
+        model_ids = [0] if len(rows) else []
+
+    chain = column_text(chain_name)
+    resname = column_text("label_comp_id")
+    icode = column_text("pdbx_PDB_ins_code")
+    hetatm = column_text("group_PDB") == "HETATM"
+
+    name_codes, name_categories = encode_labels(column_text("label_atom_id"))
+    tables = segment_atoms(
+        atom_model, chain, resseq, icode, resname, hetatm, name_codes,
+        lambda: columns.number("occupancy", "occupancy")[rows],
+        lambda: columns.present("label_alt_id")[rows] if columns.has("label_alt_id")
+        else np.zeros(len(rows), dtype=bool)
+    )
+    residue_first = tables["residue_first"]
+    rows, name_codes = rows[tables["rows"]], name_codes[tables["rows"]]
+
+    coords = np.empty((len(rows), 3), dtype=np.float32)
+    for axis, name in enumerate(("Cartn_x", "Cartn_y", "Cartn_z")):
+        coords[:, axis] = columns.number(name, "coordinates")[rows]
+
+    # Elements come from type_symbol, guessed from the atom name where it is
+    # unusable; resolved once per distinct (atom name, symbol) combination
+    symbol_codes, symbol_categories = encode_labels(column_text("type_symbol"))
+    width = max(len(symbol_categories), 1)
+    combined = name_codes.astype(np.int64) * width + symbol_codes
+    combinations, inverse = np.unique(combined, return_inverse=True)
+    elements = np.array([
+        guess_element(name_categories[combination // width], symbol_categories[combination % width])
+        for combination in combinations.tolist()
+    ], dtype=str)
+    element_codes, element_categories = encode_labels(elements)
+    element_codes = element_codes[inverse.ravel()] if len(element_codes) else np.zeros(0, dtype=np.int32)
+
+    residue_name_codes, residue_names = encode_labels(resname[residue_first])
+    return StructureArrays(
+        structure_id=structure_id,
+        model_ids=model_ids,
+        chain_ids=tables["chain_ids"],
+        chain_model=tables["chain_model"],
+        residue_chain=tables["residue_chain"],
+        residue_seq=resseq[residue_first],
+        residue_icode=[code or " " for code in icode[residue_first].tolist()],
+        residue_hetero=hetatm[residue_first],
+        residue_name_codes=residue_name_codes,
+        residue_names=residue_names,
+        atom_residue=tables["atom_residue"],
+        coords=coords,
+        atom_name_codes=name_codes,
+        atom_names=name_categories,
+        element_codes=element_codes,
+        elements=element_categories
+    )
+
+
+def parse_mmcif(data, structure_id="structure"):
+    """Parse a text mmCIF buffer into StructureArrays"""
+    return atom_site_arrays(CIFColumns(data), structure_id)
+
+
+def parse_bcif(data, structure_id="structure"):
+    """Parse a BinaryCIF buffer into StructureArrays"""
+    return atom_site_arrays(BinaryCIFColumns(data), structure_id)
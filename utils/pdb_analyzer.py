@@ -1,22 +1,52 @@
 import Bio.PDB
 import streamlit as st
 import os
-import tempfile
+import contextlib
+import threading
 from io import StringIO
 import pandas as pd
 import numpy as np
-from config import ALLOWED_EXTENSIONS, MAX_FILE_SIZE
-
-# Initialize the analyzer as a global object
-_analyzer = None
-
-
+from config import ALLOWED_EXTENSIONS, MAX_FILE_SIZE, LARGE_FILE_THRESHOLD, BATCH_COMPARE_WORKERS, SASA_WORKERS
+from utils.structure_arrays import StructureArrays
+from utils.structure_cache import get_structure_cache, content_hash
+from utils.structure_io import (open_text_buffer, open_binary_buffer, scan_pdb_records, map_file, parse_pdb_columns,
+                                split_compression, inflate_buffer)
+from utils.mmcif_io import parse_mmcif, parse_bcif
+from utils.geometry import intra_residue_distances, perceive_bonds, classify_bonds, structure_geometry
+from utils.superposition import superpose_structures, ca_trace
+from utils.batch_compare import similarity_matrix, cluster_order
+from utils.interface import interface_contacts, INTERFACE_CUTOFF
+from utils.sasa import structure_sasa, complex_sasa, PARALLEL_MIN_ATOMS
+from utils.secondary_structure import assign_secondary_structure
+from utils.analysis_result import StructureAnalysis, BondCounts, BondStatistics, SecondaryStructure, AnalysisHandle
+from utils.summary_stats import DistanceSummary
+from utils.result_store import get_result_store, result_key
+
+# Supported values for PDBAnalyzer.analyze_structure(bond_mode=...)
+BOND_MODES = ("covalent", "intra_residue")
+
+# Histogram bin edges (Angstrom) of the bond statistics for each bond mode
+BOND_HISTOGRAM_EDGES = {
+    "covalent": np.linspace(0.0, 3.0, 61),
+    "intra_residue": np.linspace(0.0, 20.0, 81)
+}
+
+# Supported values for PDBAnalyzer.compare_batch(metric=...)
+BATCH_METRICS = ("rmsd", "tm_score")
+
+# Result sections analyze_structure(features=...) can compute; counts are always included
+ANALYSIS_FEATURES = ("counts", "bonds", "secondary_structure")
+
+# Part of every stored result's key; bump when results change shape or values
+ANALYZER_VERSION = 2
+
+# Structure format of each accepted file extension
+FILE_FORMATS = {".pdb": "pdb", ".cif": "mmcif", ".bcif": "bcif"}
+
+@st.cache_resource(show_spinner=False)
 def get_analyzer():
-    """Get or create a PDBAnalyzer instance"""
-    global _analyzer
-    if _analyzer is None:
-        _analyzer = PDBAnalyzer()
-    return _analyzer
+    """The process-wide PDBAnalyzer shared by every page, session and rerun"""
+    return PDBAnalyzer()
 
 
 def validate_pdb_file(file):
@@ -75,125 +105,317 @@ def compare_pdb_structures(file1, file2):
 
 
 class PDBAnalyzer:
-    """Class for analyzing PDB files"""
+    """Class for analyzing PDB files
+
+    One instance is meant to serve the whole server process (see
+    get_analyzer()), so it is safe to call from concurrent sessions: the
+    Bio.PDB parser is used under a lock, the structure cache and result
+    store are thread-safe, and jobs large enough to start a process pool
+    run one at a time instead of each claiming every CPU.
+    """
 
     def __init__(self):
         self.parser = Bio.PDB.PDBParser(QUIET=True)
+        self._parser_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self.structure_cache = get_structure_cache()
+        self.result_store = get_result_store()
+
+    def _pool_slot(self, parallel):
+        """Context that serializes process-pool jobs; a no-op for in-process work"""
+        return self._pool_lock if parallel else contextlib.nullcontext()
 
     def validate_file(self, file):
-        """Validate that the file is a PDB file"""
-        # Check file extension
-        _, file_extension = os.path.splitext(file.name)
+        """Validate that the file (an upload or a path) is a PDB file"""
+        # Check file extension (of the archived file, for compressed uploads)
+        name, _ = split_compression(self._file_name(file))
+        _, file_extension = os.path.splitext(name)
         if file_extension.lower() not in ALLOWED_EXTENSIONS:
-            return False, f"Invalid file format. Only PDB files ({', '.join(ALLOWED_EXTENSIONS)}) are allowed."
+            return False, f"Invalid file format. Only structure files ({', '.join(sorted(ALLOWED_EXTENSIONS))}) are allowed."
 
         # Check file size
-        if file.size > MAX_FILE_SIZE:
+        size = os.path.getsize(file) if isinstance(file, (str, os.PathLike)) else file.size
+        if size > MAX_FILE_SIZE:
             return False, f"File size exceeds the maximum allowed size ({MAX_FILE_SIZE / (1024 * 1024):.1f} MB)."
 
-        # Try to parse the file to ensure it's a valid PDB file
-        temp_file_path = None
+        # Scan the coordinate records to ensure it's a valid PDB file
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdb") as temp_file:
-                temp_file.write(file.getbuffer())
-                temp_file_path = temp_file.name
+            self.scan_records(file)
+            return True, "File is valid."
+        except Exception as e:
+            return False, f"Invalid structure file: {str(e)}"
 
-            # Parse the PDB file
-            self.parser.get_structure("temp", temp_file_path)
+    def scan_records(self, file):
+        """Count models, chains, residues and atoms without building a structure
 
-            # Clean up
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        Uses the single-pass record scanner, which validates the fixed-column
+        format in constant memory. Results are cached by content hash like
+        parsed structures. mmCIF and BinaryCIF files are parsed column by
+        column anyway, so they are counted from the cached parse, as are
+        compressed uploads, which must be inflated before parsing.
+        """
+        data = self._read_buffer(file)
+        file_format, compression = self._file_format(file)
+        if file_format != "pdb" or compression is not None or len(data) > LARGE_FILE_THRESHOLD:
+            # The vectorized columnar index is far faster than a line loop on
+            # large files; its coordinates are validated when first decoded
+            return self._load(data, file_format, compression).summary()
+
+        key = "records:" + content_hash(data)
+        return self.structure_cache.get_or_create(key, lambda: self._scan(data))
+
+    def _scan(self, data):
+        """Scan raw PDB bytes for record counts"""
+        with open_binary_buffer(data) as stream:
+            return scan_pdb_records(stream)
+
+    @staticmethod
+    def _file_format(file):
+        """Structure format and compression of an upload or path, from its file name"""
+        name = os.fspath(file) if isinstance(file, (str, os.PathLike)) else file.name
+        name, compression = split_compression(name)
+        _, file_extension = os.path.splitext(name)
+        return FILE_FORMATS.get(file_extension.lower(), "pdb"), compression
+
+    @staticmethod
+    def _file_name(file):
+        """Display name of an upload or path"""
+        return os.path.basename(os.fspath(file)) if isinstance(file, (str, os.PathLike)) else file.name
+
+    @staticmethod
+    def _read_buffer(file):
+        """Bytes of an upload, or a read-only memory map of a file on disk"""
+        if isinstance(file, (str, os.PathLike)):
+            return map_file(file)
+        return file.getbuffer()
+
+    def load_structure(self, file):
+        """Parse an uploaded file (or a path to a file on disk) into StructureArrays
+
+        Parsed structures are shared through the process-wide cache keyed by
+        the content hash of the upload, so each unique upload is parsed once.
+        """
+        return self._load(*self._source(file))
 
-            return True, "File is valid."
-        except Exception as e:
-            # Clean up
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+    def _source(self, file):
+        """Buffer, structure format, compression and cache key of an upload or path
 
-            return False, f"Invalid PDB file: {str(e)}"
+        The key combines the format and compression with the content hash of
+        the (possibly compressed) bytes, so a cache hit never needs to
+        decompress anything.
+        """
+        data = self._read_buffer(file)
+        file_format, compression = self._file_format(file)
+        return data, file_format, compression, f"{file_format}:{compression or 'raw'}:{content_hash(data)}"
+
+    def _load(self, data, file_format="pdb", compression=None, key=None):
+        """Fetch the parsed structure for a buffer from the cache, parsing it on a miss"""
+        if key is None:
+            key = f"{file_format}:{compression or 'raw'}:{content_hash(data)}"
+        return self.structure_cache.get_or_create(key, lambda: self._parse(data, file_format, compression))
+
+    def _parse(self, data, file_format="pdb", compression=None):
+        """Parse raw structure bytes into read-only StructureArrays
+
+        The upload buffer is read in place through a text stream, so parsing
+        never round-trips through a temporary file. Buffers larger than
+        LARGE_FILE_THRESHOLD are parsed column by column instead, without a
+        Bio.PDB object graph, and their atom columns are decoded on demand.
+        mmCIF and BinaryCIF files are always decoded column by column.
+        Compressed buffers are first inflated in memory, with MAX_FILE_SIZE
+        enforced on the decompressed size as well.
+        """
+        if compression is not None:
+            data = inflate_buffer(data, compression, MAX_FILE_SIZE)
+
+        if file_format == "mmcif":
+            return parse_mmcif(data).freeze()
+        if file_format == "bcif":
+            return parse_bcif(data).freeze()
+
+        if len(data) > LARGE_FILE_THRESHOLD:
+            return parse_pdb_columns(data).freeze()
+
+        with open_text_buffer(data) as handle, self._parser_lock:
+            structure = self.parser.get_structure("structure", handle)
+        return StructureArrays.from_structure(structure).freeze()
+
+    def analyze_structure(self, file, bond_mode="covalent", features=ANALYSIS_FEATURES, keep_pairs=False):
+        """Analyze the structure of a PDB file
+
+        Returns a StructureAnalysis; fields can also be read by key, as with
+        the dict results of the other methods.
+
+        bond_mode selects what "bond_lengths" holds: "covalent" perceives real
+        covalent bonds (including peptide and disulfide bonds) from element
+        radii, "intra_residue" lists every atom pair within each residue.
+
+        features lists the result sections to compute. Model, chain, residue
+        and atom counts are always returned; "bonds" adds "bond_stats" (count,
+        mean, variance, extremes and histogram, summarized while distances
+        are computed), "bond_counts" and "bond_lengths", and
+        "secondary_structure" adds per-residue H/E/C labels and per-chain
+        fractions of the first model. Counts alone never touch atom
+        coordinates.
+
+        The per-pair "bond_lengths" table is only kept with keep_pairs=True;
+        otherwise it is recomputed from the parsed structure on first access.
+        Results are kept in the on-disk result store, keyed by the upload's
+        content hash and the options, so a repeat upload is never parsed.
+        """
+        if bond_mode not in BOND_MODES:
+            raise ValueError(f"Unknown bond mode '{bond_mode}'. Expected one of: {', '.join(BOND_MODES)}")
+        unknown = set(features) - set(ANALYSIS_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown analysis features: {', '.join(sorted(unknown))}")
 
-    def analyze_structure(self, file):
-        """Analyze the structure of a PDB file"""
-        temp_file_path = None
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdb") as temp_file:
-                temp_file.write(file.getbuffer())
-                temp_file_path = temp_file.name
-
-            # Parse the PDB file
-            structure = self.parser.get_structure("structure", temp_file_path)
-
-            # Get structure information
-            info = {
-                "structure_id": structure.id,
-                "number_of_models": len(structure),
-                "chains": {},
-                "residue_count": 0,
-                "atom_count": 0,
-                "residue_types": set(),
-                "bond_lengths": []
-            }
-
-            # Process models, chains, residues, and atoms
-            for model in structure:
-                for chain in model:
-                    chain_id = chain.id
-                    info["chains"][chain_id] = {
-                        "residue_count": 0,
-                        "atom_count": 0
-                    }
+            source = self._source(file)
+            key = result_key(ANALYZER_VERSION, "analysis", source[3], bond_mode, sorted(features), keep_pairs)
+            info = self.result_store.get_or_create(
+                key, lambda: self._analyze(source, bond_mode, features, keep_pairs))
 
-                    for residue in chain:
-                        if Bio.PDB.is_aa(residue):
-                            info["residue_types"].add(residue.get_resname())
+            if info.bond_stats is not None and info.bond_lengths is None:
+                info.set_bond_loader(lambda: self._bond_frame(*self._bond_source(source, bond_mode)))
+            return info
+        except Exception as e:
+            raise Exception(f"Error analyzing PDB file: {str(e)}")
 
-                        info["residue_count"] += 1
-                        info["chains"][chain_id]["residue_count"] += 1
+    def _analyze(self, source, bond_mode, features, keep_pairs):
+        """Compute an analyze_structure() result for a (data, format, compression, hash) source"""
+        # Parse (or fetch from the cache) the columnar representation used for all counts
+        arrays = self._load(*source)
 
-                        for atom in residue:
-                            info["atom_count"] += 1
-                            info["chains"][chain_id]["atom_count"] += 1
+        # Get structure information (per-chain counts reflect the last model,
+        # as chains are keyed by ID only)
+        info = StructureAnalysis.from_summary(arrays.structure_id, arrays.summary())
 
+        if "bonds" in features:
             # Calculate bond lengths for the first model
-            if len(structure) > 0:
-                model = structure[0]
-                for chain in model:
-                    for residue in chain:
-                        atoms = list(residue.get_atoms())
-                        for i in range(len(atoms)):
-                            for j in range(i + 1, len(atoms)):
-                                atom1 = atoms[i]
-                                atom2 = atoms[j]
-                                # Calculate distance between atoms
-                                distance = atom1 - atom2
-                                info["bond_lengths"].append({
-                                    "atom1": atom1.get_name(),
-                                    "atom2": atom2.get_name(),
-                                    "residue": residue.get_resname(),
-                                    "chain": chain.id,
-                                    "distance": distance
-                                })
-
-            # Clean up
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            pairs, info.bond_stats, info.bond_counts = self._bond_statistics(arrays, bond_mode)
+            if keep_pairs:
+                info.bond_lengths = self._bond_frame(arrays, pairs)
 
-            return info
-        except Exception as e:
-            # Clean up
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        if "secondary_structure" in features:
+            info.secondary_structure = SecondaryStructure(**assign_secondary_structure(arrays))
 
-            raise Exception(f"Error analyzing PDB file: {str(e)}")
+        return info
+
+    def open_analysis(self, file, bond_mode="covalent"):
+        """Open a lazy analysis of an uploaded file (or a path to a file on disk)
+
+        Returns an AnalysisHandle read like an analyze_structure() result, but
+        each section ("counts", "chains", "bonds", "bond_lengths",
+        "composition", "geometry", "secondary_structure") is only computed
+        when one of its keys is first read. Sections are kept in the on-disk
+        result store, and the structure is only parsed when a section that
+        is not stored yet needs it.
+
+        The handle holds no reference to the upload's buffer: the raw bytes
+        are kept in the result store, and sections fetch the parsed
+        structure from the structure cache, re-parsing the stored bytes on a
+        miss.
+        """
+        if bond_mode not in BOND_MODES:
+            raise ValueError(f"Unknown bond mode '{bond_mode}'. Expected one of: {', '.join(BOND_MODES)}")
+
+        data, file_format, compression, source_key = self._source(file)
+        upload_key = result_key(ANALYZER_VERSION, "upload", source_key)
+        if not self.result_store.contains(upload_key):
+            self.result_store.put(upload_key, {"data": np.frombuffer(data, dtype=np.uint8)})
+        if not self.result_store.contains(upload_key):
+            # The store is disabled or too small for the upload: parse it now, while its buffer is at hand
+            self._load(data, file_format, compression, source_key)
+        del data
+
+        def parse():
+            stored = self.result_store.get(upload_key)
+            if stored is None:
+                raise ValueError("The uploaded file is no longer cached. Please upload it again.")
+            return self._parse(stored["data"].data, file_format, compression)
+
+        def load():
+            return self.structure_cache.get_or_create(source_key, parse)
+
+        def stored(name, compute, *options):
+            key = result_key(ANALYZER_VERSION, "section", name, source_key, *options)
+            return lambda: self.result_store.get_or_create(key, lambda: compute(load()))
+
+        def bond_lengths():
+            arrays = load()
+            return {"bond_lengths": self._bond_frame(arrays, self._bond_pairs(arrays, bond_mode))}
+
+        def bonds(arrays):
+            _, bond_stats, bond_counts = self._bond_statistics(arrays, bond_mode)
+            return {"bond_stats": bond_stats, "bond_counts": bond_counts}
+
+        def counts(arrays):
+            info = StructureAnalysis.from_summary(arrays.structure_id, arrays.summary())
+            return {key: info[key] for key in AnalysisHandle.SECTIONS["counts"]}
+
+        return AnalysisHandle({
+            "counts": stored("counts", counts),
+            "chains": stored("chains", lambda arrays: {"chains": StructureAnalysis.from_summary(
+                arrays.structure_id, arrays.summary()).chains}),
+            "bonds": stored("bonds", bonds, bond_mode),
+            "bond_lengths": bond_lengths,
+            "composition": stored("composition", lambda arrays: {"residue_counts": arrays.residue_composition()}),
+            "geometry": stored("geometry", lambda arrays: {"geometry": structure_geometry(arrays)}),
+            "secondary_structure": stored("secondary_structure", lambda arrays: {
+                "secondary_structure": SecondaryStructure(**assign_secondary_structure(arrays))})
+        }, filename=self._file_name(file))
+
+    @staticmethod
+    def _bond_statistics(arrays, bond_mode):
+        """Bond pair arrays, BondStatistics and (covalent mode) BondCounts of the first model"""
+        summary = DistanceSummary(BOND_HISTOGRAM_EDGES[bond_mode])
+        pairs = PDBAnalyzer._bond_pairs(arrays, bond_mode, summary)
+        bond_counts = None
+        if pairs is not None and bond_mode == "covalent":
+            bond_counts = BondCounts(**classify_bonds(arrays, pairs))
+        return pairs, BondStatistics.from_summary(summary, arrays), bond_counts
+
+    def _bond_source(self, source, bond_mode):
+        """Parsed structure and bond pair arrays of a source, for lazy bond tables"""
+        arrays = self._load(*source)
+        return arrays, self._bond_pairs(arrays, bond_mode)
+
+    @staticmethod
+    def _bond_pairs(arrays, bond_mode, summary=None):
+        """Bond (or intra-residue pair) arrays of the first model, or None without models"""
+        if arrays.model_count == 0:
+            return None
+        if bond_mode == "covalent":
+            return perceive_bonds(arrays, np.flatnonzero(arrays.atom_model == 0), summary)
+        return intra_residue_distances(arrays, np.flatnonzero(arrays.residue_model == 0), summary)
+
+    @staticmethod
+    def _bond_frame(arrays, pairs):
+        """Labelled DataFrame of bond pair arrays"""
+        if pairs is None:
+            return pd.DataFrame(columns=["atom1", "atom2", "residue", "chain", "distance"])
+        return arrays.atom_pair_frame(pairs)
+
+    def compare_structures(self, file1, file2, superposition_atoms="ca"):
+        """Compare two PDB structures
+
+        Besides count and set differences, chain sequences are aligned to map
+        equivalent residues, and the second structure is superposed onto the
+        first on their Cα (or backbone, with superposition_atoms="backbone")
+        atoms. The "superposition" entry holds the global and per-chain RMSD
+        and the per-residue deviation array, or None when nothing aligns.
+        Comparisons are kept in the on-disk result store like analyses.
+        """
+        source1, source2 = self._source(file1), self._source(file2)
+        key = result_key(ANALYZER_VERSION, "comparison", source1[3], source2[3], superposition_atoms)
+        return self.result_store.get_or_create(
+            key, lambda: self._compare(source1, source2, superposition_atoms))
 
-    def compare_structures(self, file1, file2):
-        """Compare two PDB structures"""
-        # Analyze both structures
-        info1 = self.analyze_structure(file1)
-        info2 = self.analyze_structure(file2)
+    def _compare(self, source1, source2, superposition_atoms):
+        """Compute a compare_structures() result for two sources"""
+        # Only counts and residue types are compared, so skip bond perception
+        info1 = self._analyze(source1, "covalent", ("counts",), keep_pairs=False)
+        info2 = self._analyze(source2, "covalent", ("counts",), keep_pairs=False)
 
         # Compare basic statistics
         comparison = {
@@ -220,9 +442,81 @@ class PDBAnalyzer:
             }
 
         comparison["chain_comparison"] = chain_comparison
+        comparison["superposition"] = superpose_structures(
+            self._load(*source1), self._load(*source2), superposition_atoms)
 
         return comparison
 
+    def analyze_interface(self, receptor_file, antibody_file, cutoff=INTERFACE_CUTOFF, sasa=True):
+        """Find the contacts between a receptor and an antibody
+
+        Both files hold one partner each, in the same coordinate frame (e.g. a
+        docked pose split in two). Returns atom and residue contacts within
+        cutoff, the interface residues of each partner and buried atom counts.
+        With sasa=True, "sasa" holds per-residue SASA of each partner alone
+        and in complex and the buried surface area (see complex_sasa).
+        """
+        receptor = self.load_structure(receptor_file)
+        antibody = self.load_structure(antibody_file)
+        if receptor.model_count == 0 or antibody.model_count == 0:
+            raise ValueError("Both structures must contain atoms.")
+        result = interface_contacts(receptor, antibody, cutoff)
+        if sasa:
+            with self._pool_slot(SASA_WORKERS > 1 and receptor.atom_count + antibody.atom_count >= PARALLEL_MIN_ATOMS):
+                result["sasa"] = complex_sasa(receptor, antibody, workers=SASA_WORKERS)
+        return result
+
+    def compute_sasa(self, file, workers=None):
+        """Solvent-accessible surface area of the first model (Shrake-Rupley)
+
+        Returns the total, per-atom values for the heavy non-water atoms
+        ("atoms" holds their indices) and a per-residue DataFrame. Chains are
+        split over SASA_WORKERS processes for very large structures.
+        """
+        arrays = self.load_structure(file)
+        if arrays.model_count == 0:
+            raise ValueError("The structure contains no atoms.")
+        workers = workers or SASA_WORKERS
+        with self._pool_slot(workers > 1 and arrays.atom_count >= PARALLEL_MIN_ATOMS):
+            return structure_sasa(arrays, workers=workers)
+
+    def compare_batch(self, files, metric="rmsd", workers=None):
+        """Compare every pair of a batch of structures
+
+        Every file is first checked with validate_file; a ValueError lists
+        the files that fail. Each structure is reduced to its Cα trace, and
+        every pair is sequence-aligned and superposed (see
+        compare_structures). When the batch is large enough to pay for it,
+        pairs are spread over a process pool of BATCH_COMPARE_WORKERS
+        processes that read the coordinates from shared memory. Returns the
+        N x N "rmsd", "tm_score" and "aligned_residues" matrices plus "order",
+        the leaf order of an average-linkage clustering on the chosen metric,
+        for heatmaps.
+        """
+        if metric not in BATCH_METRICS:
+            raise ValueError(f"Unknown batch metric '{metric}'. Expected one of: {', '.join(BATCH_METRICS)}")
+
+        invalid = []
+        for file in files:
+            is_valid, message = self.validate_file(file)
+            if not is_valid:
+                invalid.append(f"{self._file_name(file)}: {message}")
+        if invalid:
+            raise ValueError("Invalid files in batch: " + "; ".join(invalid))
+
+        labels = [self._file_name(file) for file in files]
+        traces = [ca_trace(self.load_structure(file)) for file in files]
+        result = similarity_matrix(traces, workers or BATCH_COMPARE_WORKERS, pool_slot=self._pool_lock)
+
+        distance = result["rmsd"] if metric == "rmsd" else 1.0 - result["tm_score"]
+        return {
+            "labels": labels,
+            "metric": metric,
+            "matrix": result[metric],
+            **result,
+            "order": cluster_order(distance)
+        }
+
     def generate_report(self, comparison):
         """Generate a report from the comparison results"""
         report = f"""
@@ -256,4 +550,21 @@ class PDBAnalyzer:
         - Atom Count Difference: {chain_data['atom_count_diff']}
             """
 
+        superposition = comparison.get("superposition")
+        if superposition:
+            atoms = "Cα" if superposition["atoms"] == "ca" else "Backbone"
+            report += f"""
+        ## Structural Superposition ({atoms} atoms)
+        - Aligned Residues: {superposition['aligned_residues']}
+        - Global RMSD: {superposition['rmsd']:.3f} Å
+            """
+            for chain_id, chain_data in superposition["chains"].items():
+                rmsd = f"{chain_data['rmsd']:.3f} Å" if chain_data["rmsd"] is not None else "N/A"
+                report += f"""
+        ### Chain {chain_id}
+        - Aligned Residues: {chain_data['aligned_residues']}
+        - Sequence Identity: {chain_data['sequence_identity']:.1%}
+        - RMSD: {rmsd}
+            """
+
         return report
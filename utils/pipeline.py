@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def file_digest(path):
+    """SHA-256 of a file, or of the relative names and contents of a directory's files"""
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(os.path.relpath(full, path).encode() + b"\0")
+                digest.update(file_digest(full).encode())
+    else:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def directory_size(path):
+    """Total size in bytes of the files under path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def copy_output(source, target):
+    """Copy a file or directory, replacing target"""
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    if os.path.isdir(source):
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(source, target)
+    else:
+        shutil.copy2(source, target)
+
+
+class Stage:
+    """One pipeline step: a command that reads input files and writes output files
+
+    command(params) returns the argument list, which runs in the work
+    directory; inputs and outputs are names relative to it. version is part
+    of the cache key, so bump it when a stage's results change for reasons
+    its arguments and inputs don't show.
+    """
+
+    def __init__(self, name, command, inputs=(), outputs=(), version=1):
+        self.name = name
+        self.command = command
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.version = version
+
+    def key(self, work_dir, params):
+        """Cache key from the stage's arguments and the contents of its inputs
+
+        The executable path is left out, so moving an installation keeps the
+        cache valid.
+        """
+        parts = [self.name, self.version, self.command(params)[1:]]
+        parts += [[name, file_digest(os.path.join(work_dir, name))] for name in self.inputs]
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class StageCache:
+    """Size-bounded on-disk outputs of pipeline stages, keyed by Stage.key()
+
+    Keys hash a stage's inputs, so entries are content-addressed: the
+    docking stage of a receptor-antibody pair is found again from the
+    SHA-256 of both files and the HDOCK arguments, whichever job or screen
+    asks. Each entry is a directory holding copies of the stage's output
+    files and a stage.json with its captured stdout and stderr. Entries are
+    built in a temporary directory and renamed into place, so readers never
+    see a partial one.
+
+    A hit refreshes the entry's modification time; after each write the
+    least recently used entries are deleted until the cache holds at most
+    max_bytes. Disk errors are never fatal: a failed read is a miss and a
+    failed write is skipped.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, stage.name, key)
+
+    def restore(self, stage, key, work_dir):
+        """Copy a cached entry's outputs into work_dir; returns its record, or None"""
+        path = self._path(stage, key)
+        try:
+            with open(os.path.join(path, "stage.json")) as f:
+                record = json.load(f)
+            for name in stage.outputs:
+                copy_output(os.path.join(path, "outputs", name), os.path.join(work_dir, name))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return record
+
+    def store(self, stage, key, work_dir, record):
+        """Cache the outputs of a stage that just succeeded in work_dir, then evict old entries"""
+        path = self._path(stage, key)
+        temporary = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = tempfile.mkdtemp(dir=os.path.dirname(path), suffix=".tmp")
+            for name in stage.outputs:
+                copy_output(os.path.join(work_dir, name), os.path.join(temporary, "outputs", name))
+            with open(os.path.join(temporary, "stage.json"), "w") as f:
+                json.dump(record, f)
+            os.rename(temporary, path)
+        except OSError:
+            # Another run may have stored the same entry first
+            if temporary is not None:
+                shutil.rmtree(temporary, ignore_errors=True)
+            return
+        self._evict()
+
+    def _entries(self):
+        """(modification time, size, path) of every stored entry"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as stages:
+                for stage in stages:
+                    if not stage.is_dir():
+                        continue
+                    with os.scandir(stage.path) as scan:
+                        for entry in scan:
+                            if entry.is_dir() and not entry.name.endswith(".tmp"):
+                                try:
+                                    mtime = entry.stat().st_mtime
+                                except OSError:
+                                    continue
+                                entries.append((mtime, directory_size(entry.path), entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        """Delete least recently used entries until within max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    @property
+    def size(self):
+        """Total size in bytes of the stored entries"""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        """Delete every stored entry"""
+        for _, _, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class Pipeline:
+    """Stages run in declared order, each reusing cached outputs when it can
+
+    A stage depends on the earlier stages that produce its inputs. When a
+    stage fails, the stages depending on it are skipped and the others
+    still run. Progress is reported by updating one status dict per stage:
+    "status" ("pending", "running", "cached", "done", "failed" or
+    "skipped"), "stdout", "stderr", "started", "seconds" and "timed_out".
+
+    Commands run with TMPDIR set to the work directory, so their scratch
+    files stay with the run. With a deadline (a time.time() value), a
+    command still running when it passes is killed and its stage fails as
+    timed out.
+    """
+
+    def __init__(self, stages, cache=None):
+        self.stages = tuple(stages)
+        self.cache = cache
+        producers = {}
+        self.dependencies = {}
+        for stage in self.stages:
+            self.dependencies[stage.name] = {producers[name] for name in stage.inputs if name in producers}
+            for name in stage.outputs:
+                producers[name] = stage.name
+
+    def status(self):
+        """Initial status dict of each stage"""
+        return {
+            stage.name: {"status": "pending", "stdout": "", "stderr": "", "started": None, "seconds": None,
+                         "timed_out": False}
+            for stage in self.stages
+        }
+
+    def restore(self, work_dir, params, status):
+        """Take stages from the cache, in order, until one misses
+
+        Returns whether every stage was cached; run() then only runs the
+        stages that weren't.
+        """
+        if self.cache is None:
+            return False
+        for stage in self.stages:
+            info = status[stage.name]
+            started = time.time()
+            try:
+                record = self.cache.restore(stage, stage.key(work_dir, params), work_dir)
+            except OSError:
+                record = None
+            if record is None:
+                return False
+            info["started"] = started
+            info["stdout"], info["stderr"] = record["stdout"], record["stderr"]
+            self._finish(info, True, cached=True)
+        return True
+
+    def run(self, work_dir, params, status, deadline=None):
+        """Run every stage in work_dir; returns whether all of them succeeded"""
+        failed = set()
+        for stage in self.stages:
+            if status[stage.name]["status"] in ("done", "cached"):
+                continue
+            if self.dependencies[stage.name] & failed:
+                status[stage.name]["status"] = "skipped"
+                failed.add(stage.name)
+            elif not self._run_stage(stage, work_dir, params, status[stage.name], deadline):
+                failed.add(stage.name)
+        return not failed
+
+    def _run_stage(self, stage, work_dir, params, info, deadline=None):
+        """Restore or run one stage; returns whether it succeeded"""
+        info["started"] = time.time()
+        info["status"] = "running"
+        try:
+            key = stage.key(work_dir, params)
+        except OSError as e:
+            info["stderr"] = f"Missing input: {e}"
+            return self._finish(info, False)
+
+        record = self.cache.restore(stage, key, work_dir) if self.cache else None
+        if record is not None:
+            info["stdout"], info["stderr"] = record["stdout"], record["stderr"]
+            return self._finish(info, True, cached=True)
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                info["stderr"], info["timed_out"] = "Timed out before starting", True
+                return self._finish(info, False)
+        try:
+            result = subprocess.run(stage.command(params), cwd=work_dir, capture_output=True, text=True,
+                                    timeout=timeout, env={**os.environ, "TMPDIR": work_dir})
+        except subprocess.TimeoutExpired:
+            info["stderr"], info["timed_out"] = f"Timed out after {timeout:.0f} s", True
+            return self._finish(info, False)
+        except OSError as e:
+            info["stderr"] = str(e)
+            return self._finish(info, False)
+        info["stdout"], info["stderr"] = result.stdout, result.stderr
+        missing = [name for name in stage.outputs if not os.path.exists(os.path.join(work_dir, name))]
+        if result.returncode != 0 or missing:
+            if missing:
+                info["stderr"] += f"\n{', '.join(missing)} was not created"
+            return self._finish(info, False)
+
+        if self.cache:
+            self.cache.store(stage, key, work_dir, {"stdout": result.stdout, "stderr": result.stderr})
+        return self._finish(info, True)
+
+    @staticmethod
+    def _finish(info, succeeded, cached=False):
+        info["seconds"] = time.time() - info["started"]
+        info["status"] = ("cached" if cached else "done") if succeeded else "failed"
+        return succeeded
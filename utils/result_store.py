@@ -0,0 +1,243 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from dataclasses import fields, is_dataclass
+import numpy as np
+import pandas as pd
+from config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES
+from utils import analysis_result
+
+# Initialize the result store as a global object
+_result_store = None
+_result_store_lock = threading.Lock()
+
+# Result types that can be rebuilt from a stored entry
+RESULT_TYPES = {
+    cls.__name__: cls for cls in vars(analysis_result).values()
+    if isinstance(cls, type) and is_dataclass(cls)
+}
+
+
+def get_result_store():
+    """Get or create the process-wide ResultStore instance"""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+    return _result_store
+
+
+def result_key(*parts):
+    """Store key for a result, from content hashes, analyzer version and options"""
+    return hashlib.sha256(json.dumps([str(part) for part in parts]).encode()).hexdigest()
+
+
+def _encode(value, arrays):
+    """Describe value as JSON, moving arrays and table columns into arrays"""
+    def store(array):
+        name = f"a{len(arrays)}"
+        arrays[name] = array
+        return name
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return {"value": value}
+    if isinstance(value, np.generic):
+        return {"value": value.item()}
+    if isinstance(value, np.ndarray):
+        return {"array": store(value)}
+    if isinstance(value, pd.DataFrame):
+        columns = {}
+        for column in value.columns:
+            series = value[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns[column] = {
+                    "codes": store(series.cat.codes.to_numpy()),
+                    "categories": store(np.asarray(series.cat.categories, dtype=str))
+                }
+            elif series.dtype.kind in "biuf":
+                columns[column] = {"array": store(series.to_numpy())}
+            else:
+                columns[column] = {"array": store(np.asarray(series, dtype=str))}
+        return {"frame": columns, "order": [str(column) for column in value.columns]}
+    if isinstance(value, (set, frozenset)):
+        return {"set": [_encode(item, arrays) for item in sorted(value)], "frozen": isinstance(value, frozenset)}
+    if isinstance(value, (list, tuple)):
+        return {"list": [_encode(item, arrays) for item in value]}
+    if isinstance(value, dict):
+        return {"dict": [[key, _encode(item, arrays)] for key, item in value.items()]}
+    if type(value).__name__ in RESULT_TYPES:
+        # Fields marked store=False hold process-local state such as loaders
+        return {
+            "type": type(value).__name__,
+            "fields": {field.name: _encode(getattr(value, field.name), arrays)
+                       for field in fields(value) if field.metadata.get("store", True)}
+        }
+    raise TypeError(f"Cannot store a value of type {type(value).__name__}")
+
+
+def _decode(description, arrays):
+    """Rebuild a value from its _encode() description"""
+    if "value" in description:
+        return description["value"]
+    if "array" in description:
+        return arrays[description["array"]]
+    if "frame" in description:
+        columns = {}
+        for column in description["order"]:
+            spec = description["frame"][column]
+            if "codes" in spec:
+                columns[column] = pd.Categorical.from_codes(arrays[spec["codes"]], arrays[spec["categories"]])
+            else:
+                columns[column] = arrays[spec["array"]]
+        return pd.DataFrame(columns, columns=description["order"])
+    if "set" in description:
+        items = [_decode(item, arrays) for item in description["set"]]
+        return frozenset(items) if description["frozen"] else set(items)
+    if "list" in description:
+        return [_decode(item, arrays) for item in description["list"]]
+    if "dict" in description:
+        return {key: _decode(item, arrays) for key, item in description["dict"]}
+    return RESULT_TYPES[description["type"]](
+        **{name: _decode(item, arrays) for name, item in description["fields"].items()})
+
+
+class ResultStore:
+    """Disk-backed LRU store of analysis results, shared across restarts
+
+    Each result is one .npz file named by its key: array data and table
+    columns are stored as NumPy arrays (categorical columns as codes plus
+    categories), and everything else as a JSON description alongside them.
+    Nothing is pickled, so loading an entry can't execute code.
+
+    A hit refreshes the file's modification time; after each write the
+    least recently used files are deleted until the directory holds at most
+    max_bytes. Disk errors are never fatal: a failed read is a miss and a
+    failed write is skipped. A max_bytes of 0 disables the store.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def contains(self, key):
+        """Whether a result is stored under key, without reading it"""
+        return self.enabled and os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Return the result stored under key, or None"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                arrays = {name: stored[name] for name in stored.files}
+            description = json.loads(arrays.pop("__result__").item())
+            value = _decode(description, arrays)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, zipfile.BadZipFile, ValueError, KeyError, TypeError):
+            # Unreadable or written by an incompatible version: drop it
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Read-only directory, or evicted meanwhile; the entry was still valid
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store value under key, then evict old entries beyond max_bytes"""
+        if not self.enabled:
+            return
+        arrays = {}
+        description = _encode(value, arrays)
+        arrays["__result__"] = np.array(json.dumps(description))
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        if buffer.tell() > self.max_bytes:
+            return
+
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as stream:
+                stream.write(buffer.getbuffer())
+            os.replace(temporary, self._path(key))
+        except OSError:
+            if temporary is not None:
+                self._remove(temporary)
+            return
+        self._evict()
+
+    def get_or_create(self, key, factory):
+        """Return the result stored under key, calling factory() and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def _entries(self):
+        """(modification time, size, path) of every stored entry"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(".npz"):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        """Delete least recently used entries until within max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @property
+    def size(self):
+        """Total size in bytes of the stored entries"""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        """Delete every stored entry"""
+        for _, _, path in self._entries():
+            self._remove(path)
@@ -0,0 +1,211 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.geometry import CellGrid
+from utils.interface import interface_atoms, residue_labels
+
+# Solvent probe radius (Angstrom)
+PROBE_RADIUS = 1.4
+
+# Test points per atom sphere; 100 gives per-residue values within about 1%
+SPHERE_POINT_COUNT = 100
+
+# Van der Waals radii in Angstrom (Bondi, 1964), as used by Bio.PDB.SASA
+VDW_RADII = {
+    "H": 1.20, "D": 1.20, "C": 1.70, "N": 1.55, "O": 1.52, "F": 1.47, "NA": 2.27, "MG": 1.73,
+    "P": 1.80, "S": 1.80, "CL": 1.75, "K": 2.75, "CA": 2.31, "NI": 1.63, "CU": 1.40, "ZN": 1.39,
+    "SE": 1.90, "BR": 1.85, "CD": 1.58, "I": 1.98, "HG": 1.55
+}
+DEFAULT_VDW_RADIUS = 1.80
+
+# Upper bound on (atom, neighbour) pairs tested against the sphere points at once
+SASA_BLOCK_PAIRS = 1 << 13
+
+# Spawning a worker takes about a second, so smaller structures run in-process
+PARALLEL_MIN_ATOMS = 50000
+
+# Worker state, set once per process by _init_worker
+_worker_coords = None
+_worker_radii = None
+
+
+def sphere_points(count=SPHERE_POINT_COUNT):
+    """Evenly spread points on the unit sphere (golden-section spiral)"""
+    index = np.arange(count) + 0.5
+    z = 1.0 - 2.0 * index / count
+    ring = np.sqrt(1.0 - z * z)
+    angle = np.pi * (3.0 - np.sqrt(5.0)) * index
+    return np.column_stack((ring * np.cos(angle), ring * np.sin(angle), z))
+
+
+# Computed once; every atom's sphere is this set scaled and shifted
+SPHERE_POINTS = sphere_points()
+
+
+def vdw_radii(arrays):
+    """Van der Waals radius of every atom, looked up once per element category"""
+    table = np.array(
+        [VDW_RADII.get(element.upper(), DEFAULT_VDW_RADIUS) for element in arrays.elements],
+        dtype=np.float64
+    )
+    if table.size == 0:
+        return np.zeros(arrays.atom_count, dtype=np.float64)
+    return table[arrays.element_codes]
+
+
+def atom_sasa(coords, radii, atoms=None, probe=PROBE_RADIUS):
+    """Shrake-Rupley solvent-accessible surface area of atoms, in square Angstrom
+
+    Every atom is inflated by the probe radius and covered with the
+    precomputed sphere points. A point is buried when it falls inside
+    another inflated atom; only neighbours found through a cell grid are
+    tested, and the test for a block of (atom, neighbour) pairs is a single
+    matrix product: |c_i + R_i s - c_j|^2 = |d|^2 + R_i^2 + 2 R_i (s . d).
+
+    Only the atoms listed in atoms (all by default) are evaluated, but all
+    of coords occlude them, so a structure can be split across workers.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    expanded = np.asarray(radii, dtype=np.float64) + probe
+    atoms = np.arange(len(coords)) if atoms is None else np.asarray(atoms, dtype=np.int64)
+    if len(atoms) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    # Directed neighbour list of the evaluated atoms, grouped by atom
+    reach = 2.0 * float(expanded.max())
+    owner, neighbor, distance = CellGrid(coords, reach).query(coords[atoms], reach)
+    overlap = (atoms[owner] != neighbor) & (distance < expanded[atoms[owner]] + expanded[neighbor])
+    owner, neighbor = owner[overlap], neighbor[overlap]
+    order = np.argsort(owner, kind="stable")
+    owner, neighbor = owner[order], neighbor[order]
+    counts = np.bincount(owner, minlength=len(atoms))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    exposed = np.ones(len(atoms), dtype=np.float64)
+    start = 0
+    while start < len(atoms):
+        # Take whole atoms until the block holds about SASA_BLOCK_PAIRS pairs
+        stop = max(int(np.searchsorted(offsets, offsets[start] + SASA_BLOCK_PAIRS, side="right")) - 1, start + 1)
+        stop = min(stop, len(atoms))
+        first, last = offsets[start], offsets[stop]
+        if last > first:
+            pair_owner = owner[first:last]
+            center = atoms[pair_owner]
+            other = neighbor[first:last]
+
+            delta = coords[center] - coords[other]
+            radius = expanded[center][:, None]
+            buried = (np.einsum("ij,ij->i", delta, delta)[:, None] + radius * radius
+                      + 2.0 * radius * (delta @ SPHERE_POINTS.T)) < (expanded[other] ** 2)[:, None]
+
+            # Pairs are grouped by atom: OR each atom's rows together
+            block_atoms, segment = np.unique(pair_owner, return_index=True)
+            buried = np.logical_or.reduceat(buried, segment, axis=0)
+            exposed[block_atoms] = 1.0 - buried.mean(axis=1)
+        start = stop
+
+    return 4.0 * np.pi * expanded[atoms] ** 2 * exposed
+
+
+def _init_worker(coords, radii):
+    """Give a pool worker the coordinates and radii once, at start-up"""
+    global _worker_coords, _worker_radii
+    _worker_coords, _worker_radii = coords, radii
+
+
+def _chain_sasa(atoms):
+    """Pool task: SASA of one chain's atoms in the full structure"""
+    return atom_sasa(_worker_coords, _worker_radii, atoms)
+
+
+def sasa_by_chain(coords, radii, chains, workers=1):
+    """atom_sasa() over all atoms, with one pool task per chain
+
+    chains holds a chain label per atom. Chains are independent tasks as
+    each is occluded by the full coordinate set; the pool is only used for
+    structures large enough to pay for its start-up.
+    """
+    if workers <= 1 or len(coords) < PARALLEL_MIN_ATOMS:
+        return atom_sasa(coords, radii)
+
+    order = np.argsort(chains, kind="stable")
+    boundaries = np.flatnonzero(np.diff(chains[order])) + 1
+    groups = np.split(order, boundaries)
+
+    sasa = np.empty(len(coords), dtype=np.float64)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(groups)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(np.asarray(coords, dtype=np.float64), np.asarray(radii, dtype=np.float64))
+    ) as pool:
+        for group, values in zip(groups, pool.map(_chain_sasa, groups)):
+            sasa[group] = values
+    return sasa
+
+
+def _residue_sasa(arrays, atoms, values):
+    """Sum atom values per residue; one row per residue with evaluated atoms"""
+    residues = arrays.atom_residue[atoms]
+    totals = np.bincount(residues, weights=values, minlength=arrays.residue_count)
+    present = np.unique(residues)
+    return present, totals[present]
+
+
+def structure_sasa(arrays, model_index=0, workers=1):
+    """Per-atom and per-residue SASA of one model, waters and hydrogens excluded"""
+    atoms = interface_atoms(arrays, model_index)
+    values = sasa_by_chain(arrays.coords[atoms], vdw_radii(arrays)[atoms], arrays.atom_chain[atoms], workers)
+
+    residues, residue_values = _residue_sasa(arrays, atoms, values)
+    frame = pd.DataFrame(residue_labels(arrays, residues))
+    frame["sasa"] = residue_values
+    return {
+        "total": float(values.sum()),
+        "atoms": atoms,
+        "atom_sasa": values,
+        "residues": frame
+    }
+
+
+def complex_sasa(receptor, antibody, model_index=0, workers=1):
+    """SASA of both partners alone and in complex, and the buried surface
+
+    Only atoms within reach of the other partner can lose surface, so the
+    complex is evaluated for those atoms alone; all others keep their
+    unbound values. Returns per-residue tables with "sasa_free",
+    "sasa_complex" and "delta_sasa" columns for each partner and the total
+    buried surface area (the sum of both partners' ΔSASA).
+    """
+    free1 = structure_sasa(receptor, model_index, workers)
+    free2 = structure_sasa(antibody, model_index, workers)
+    atoms1, atoms2 = free1["atoms"], free2["atoms"]
+
+    coords = np.concatenate((receptor.coords[atoms1], antibody.coords[atoms2])).astype(np.float64)
+    radii = np.concatenate((vdw_radii(receptor)[atoms1], vdw_radii(antibody)[atoms2]))
+    partner = np.concatenate((np.zeros(len(atoms1), dtype=bool), np.ones(len(atoms2), dtype=bool)))
+    bound = np.concatenate((free1["atom_sasa"], free2["atom_sasa"]))
+
+    if len(atoms1) and len(atoms2):
+        reach = 2.0 * float(radii.max() + PROBE_RADIUS)
+        owner, neighbor, _ = CellGrid(coords[partner], reach).query(coords[~partner], reach)
+        touching = np.concatenate((
+            np.flatnonzero(~partner)[np.unique(owner)],
+            np.flatnonzero(partner)[np.unique(neighbor)]
+        ))
+        bound[touching] = atom_sasa(coords, radii, touching)
+
+    result = {}
+    for name, arrays, free, values in (
+        ("receptor", receptor, free1, bound[:len(atoms1)]),
+        ("antibody", antibody, free2, bound[len(atoms1):])
+    ):
+        frame = free["residues"].rename(columns={"sasa": "sasa_free"})
+        frame["sasa_complex"] = _residue_sasa(arrays, free["atoms"], values)[1]
+        frame["delta_sasa"] = frame["sasa_free"] - frame["sasa_complex"]
+        result[name] = frame
+        result[f"{name}_buried"] = float(frame["delta_sasa"].sum())
+
+    result["buried_surface_area"] = result["receptor_buried"] + result["antibody_buried"]
+    return result
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from utils.geometry import CellGrid, PAIR_BLOCK_SIZE
+from utils.interface import residue_labels
+from utils.superposition import residue_atoms
+
+# Electrostatic H-bond energy constant, q1 * q2 * f in kcal/mol * Angstrom (Kabsch & Sander, 1983)
+HBOND_ENERGY_FACTOR = 0.084 * 332.0
+HBOND_MAX_ENERGY = -0.5
+HBOND_MIN_ENERGY = -9.9
+
+# Only residue pairs with Cα atoms this close can be H-bonded (as in DSSP)
+HBOND_CA_CUTOFF = 9.0
+
+# Consecutive residues are linked when C(i)-N(i+1) is shorter than this
+PEPTIDE_BOND_MAX = 2.5
+
+# Three-state labels, in the order used for per-chain fractions
+SS_LABELS = ("H", "E", "C")
+
+
+def backbone(arrays, model_index=0):
+    """Backbone N, CA, C and O coordinates of the complete amino acid residues of a model
+
+    Returns the residue rows and (n, 3) coordinate arrays, plus "segment":
+    residues share a segment id while they are joined by peptide bonds, so
+    a chain break or a chain change starts a new segment.
+    """
+    index = {name: residue_atoms(arrays, name) for name in ("N", "CA", "C", "O")}
+    complete = np.all([atoms >= 0 for atoms in index.values()], axis=0)
+    residues = np.flatnonzero(complete & arrays.residue_is_aa() & (arrays.residue_model == model_index))
+
+    coords = {name: arrays.coords[atoms[residues]].astype(np.float64) for name, atoms in index.items()}
+    gap = np.linalg.norm(coords["N"][1:] - coords["C"][:-1], axis=1)
+    linked = (arrays.residue_chain[residues][1:] == arrays.residue_chain[residues][:-1]) & (gap < PEPTIDE_BOND_MAX)
+    segment = np.concatenate(([0], np.cumsum(~linked))) if len(residues) else np.zeros(0, dtype=np.int64)
+
+    return {"residues": residues, "segment": segment, **coords}
+
+
+def _amide_hydrogens(chain):
+    """Amide H positions, placed along C=O of the previous residue; NaN where there is none
+
+    Residues without a linked predecessor and prolines can't donate.
+    """
+    hydrogen = np.full_like(chain["N"], np.nan)
+    has_previous = np.zeros(len(hydrogen), dtype=bool)
+    has_previous[1:] = chain["segment"][1:] == chain["segment"][:-1]
+    has_previous &= ~chain["proline"]
+
+    carbonyl = chain["C"][:-1] - chain["O"][:-1]
+    carbonyl /= np.linalg.norm(carbonyl, axis=1)[:, None]
+    position = np.flatnonzero(has_previous)
+    hydrogen[position] = chain["N"][position] + carbonyl[position - 1]
+    return hydrogen
+
+
+def hbond_energy(chain, hydrogen, acceptor, donor):
+    """Kabsch-Sander electrostatic energy of the C=O(acceptor) ... H-N(donor) bonds"""
+    def inverse(a, b):
+        delta = a - b
+        return 1.0 / np.sqrt(np.einsum("ij,ij->i", delta, delta))
+
+    O, C = chain["O"][acceptor], chain["C"][acceptor]
+    N, H = chain["N"][donor], hydrogen[donor]
+    energy = HBOND_ENERGY_FACTOR * (inverse(O, N) + inverse(C, H) - inverse(O, H) - inverse(C, N))
+    return np.maximum(energy, HBOND_MIN_ENERGY)
+
+
+def backbone_hbonds(chain):
+    """Sorted keys (acceptor * n + donor) of all backbone H-bonds
+
+    Candidates are residue pairs with Cα atoms within HBOND_CA_CUTOFF, found
+    with a cell grid; energies are evaluated in bounded blocks of pairs.
+    """
+    count = len(chain["CA"])
+    hydrogen = _amide_hydrogens(chain)
+
+    first, second, _ = CellGrid(chain["CA"], HBOND_CA_CUTOFF).self_pairs(HBOND_CA_CUTOFF)
+    acceptor = np.concatenate((first, second))
+    donor = np.concatenate((second, first))
+
+    # A residue can't accept from its own or the preceding residue's NH
+    keep = (donor != acceptor + 1) & ~np.isnan(hydrogen[donor, 0])
+    acceptor, donor = acceptor[keep], donor[keep]
+
+    bonded = np.zeros(len(acceptor), dtype=bool)
+    for start in range(0, len(acceptor), PAIR_BLOCK_SIZE):
+        block = slice(start, start + PAIR_BLOCK_SIZE)
+        bonded[block] = hbond_energy(chain, hydrogen, acceptor[block], donor[block]) < HBOND_MAX_ENERGY
+
+    return np.sort(acceptor[bonded].astype(np.int64) * count + donor[bonded])
+
+
+def _has_hbond(keys, count, acceptor, donor):
+    """Whether each (acceptor, donor) residue pair is H-bonded; out-of-range pairs are not"""
+    valid = (acceptor >= 0) & (acceptor < count) & (donor >= 0) & (donor < count)
+    found = np.zeros(len(acceptor), dtype=bool)
+    found[valid] = np.isin(acceptor[valid] * count + donor[valid], keys)
+    return found
+
+
+def _same_segment(segment, *positions):
+    """Whether all positions are in range and on one unbroken segment"""
+    count = len(segment)
+    valid = np.all([(p >= 0) & (p < count) for p in positions], axis=0)
+    same = valid.copy()
+    clipped = [np.clip(p, 0, count - 1) for p in positions]
+    for position in clipped[1:]:
+        same &= segment[position] == segment[clipped[0]]
+    return same
+
+
+def _helix_residues(keys, segment, turn):
+    """Residues of minimal helices: two consecutive turn-n H-bonds (i-1 -> i-1+n, i -> i+n)"""
+    count = len(segment)
+    start = np.arange(count)
+    is_turn = _has_hbond(keys, count, start, start + turn) & _same_segment(segment, start, start + turn)
+    helix_start = np.flatnonzero(is_turn[1:] & is_turn[:-1]) + 1
+
+    helix = np.zeros(count, dtype=bool)
+    for offset in range(turn):
+        helix[helix_start + offset] = True
+    return helix
+
+
+def _bridge_residues(keys, segment):
+    """Residues in parallel or antiparallel β-bridges
+
+    Every bridge pattern contains at least one H-bond (a -> d), so the
+    candidate residue pairs are derived from the H-bond list itself:
+    antiparallel (a, d) needs Hb(d, a); antiparallel (a+1, d-1) needs
+    Hb(d-2, a+2); parallel (a+1, d) needs Hb(d, a+2).
+    """
+    count = len(segment)
+    acceptor, donor = keys // max(count, 1), keys % max(count, 1)
+
+    patterns = (
+        (acceptor, donor, donor, acceptor),
+        (acceptor + 1, donor - 1, donor - 2, acceptor + 2),
+        (acceptor + 1, donor, donor, acceptor + 2)
+    )
+    bridge = np.zeros(count, dtype=bool)
+    for i, j, check_acceptor, check_donor in patterns:
+        found = (
+            (np.abs(i - j) >= 3)
+            & _same_segment(segment, i - 1, i, i + 1)
+            & _same_segment(segment, j - 1, j, j + 1)
+            & _has_hbond(keys, count, check_acceptor, check_donor)
+        )
+        bridge[i[found]] = True
+        bridge[j[found]] = True
+    return bridge
+
+
+def assign_secondary_structure(arrays, model_index=0):
+    """DSSP-style three-state (H/E/C) secondary structure of a model
+
+    Backbone H-bonds are found from Kabsch-Sander electrostatic energies.
+    α-helices come from consecutive 4-turns, β-strands from parallel and
+    antiparallel bridges, and 3-10 and π helices (3- and 5-turns) count as
+    H where no α-helix or strand was assigned. Everything else, including
+    residues with incomplete backbones, is C.
+
+    Returns a per-residue DataFrame with the "ss" label of every amino acid
+    residue and the H/E/C fractions of each chain.
+    """
+    chain = backbone(arrays, model_index)
+    chain["proline"] = arrays.residue_names[arrays.residue_name_codes[chain["residues"]]] == "PRO"
+    segment = chain["segment"]
+
+    labels = np.full(len(segment), "C")
+    if len(segment):
+        keys = backbone_hbonds(chain)
+        other_helix = _helix_residues(keys, segment, 3) | _helix_residues(keys, segment, 5)
+        labels[other_helix] = "H"
+        labels[_bridge_residues(keys, segment)] = "E"
+        labels[_helix_residues(keys, segment, 4)] = "H"
+
+    # Amino acids with incomplete backbones are reported as coil
+    residues = np.flatnonzero(arrays.residue_is_aa() & (arrays.residue_model == model_index))
+    frame = pd.DataFrame(residue_labels(arrays, residues))
+    ss = np.full(len(residues), "C")
+    ss[np.isin(residues, chain["residues"])] = labels
+    frame["ss"] = pd.Categorical(ss, categories=SS_LABELS)
+
+    fractions = frame.groupby("chain", observed=True)["ss"].value_counts(normalize=True).unstack(fill_value=0.0)
+    return {
+        "residues": frame,
+        "chains": {str(chain_id): {label: float(row[label]) for label in SS_LABELS} for chain_id, row in fractions.iterrows()}
+    }
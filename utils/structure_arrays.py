@@ -0,0 +1,264 @@
+import threading
+import numpy as np
+import pandas as pd
+from Bio.PDB.Polypeptide import is_aa
+
+
+def encode_labels(values):
+    """Encode a sequence of string labels as (int32 codes, sorted categories)"""
+    values = np.asarray(values, dtype=str)
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=str)
+    categories, codes = np.unique(values, return_inverse=True)
+    return codes.astype(np.int32).ravel(), categories
+
+
+class StructureArrays:
+    """Columnar, array-backed representation of a parsed structure
+
+    Atoms, residues and chains are stored as parallel NumPy arrays instead of
+    a Bio.PDB object tree. Atom rows point at residue rows, residue rows point
+    at chain rows and chain rows point at models, so every count or grouping
+    is a vectorized reduction over integer index arrays. String columns (atom
+    names, elements, residue names) are categorical: an int32 code per row
+    plus a small sorted array of categories.
+    """
+
+    # Atom columns that can be supplied as loaders and decoded on first access
+    LAZY_COLUMNS = ("coords", "atom_name_codes", "atom_names", "element_codes", "elements")
+
+    def __init__(self, structure_id, model_ids, chain_ids, chain_model,
+                 residue_chain, residue_seq, residue_icode, residue_hetero,
+                 residue_name_codes, residue_names, atom_residue, coords=None,
+                 atom_name_codes=None, atom_names=None, element_codes=None, elements=None,
+                 loaders=None, source_nbytes=0):
+        self.structure_id = structure_id
+
+        # Model table
+        self.model_ids = np.asarray(model_ids, dtype=np.int32)
+
+        # Chain table (one row per chain instance of each model)
+        self.chain_ids = np.asarray(chain_ids, dtype=str)
+        self.chain_model = np.asarray(chain_model, dtype=np.int32)
+
+        # Residue table
+        self.residue_chain = np.asarray(residue_chain, dtype=np.int32)
+        self.residue_seq = np.asarray(residue_seq, dtype=np.int32)
+        self.residue_icode = np.asarray(residue_icode, dtype=str)
+        self.residue_hetero = np.asarray(residue_hetero, dtype=bool)
+        self.residue_name_codes = np.asarray(residue_name_codes, dtype=np.int32)
+        self.residue_names = np.asarray(residue_names, dtype=str)
+
+        # Atom table
+        self.atom_residue = np.asarray(atom_residue, dtype=np.int32)
+        if coords is not None:
+            self.coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 3)
+        if atom_name_codes is not None:
+            self.atom_name_codes = np.asarray(atom_name_codes, dtype=np.int32)
+            self.atom_names = np.asarray(atom_names, dtype=str)
+        if element_codes is not None:
+            self.element_codes = np.asarray(element_codes, dtype=np.int32)
+            self.elements = np.asarray(elements, dtype=str)
+
+        # Lazy atom columns: column name -> callable returning {column: array}.
+        # source_nbytes is the size of the buffer the loaders keep alive.
+        self._loaders = dict(loaders or {})
+        self._source_nbytes = source_nbytes
+        self._load_lock = threading.Lock()
+        self._frozen = False
+
+        missing = [name for name in self.LAZY_COLUMNS if name not in vars(self) and name not in self._loaders]
+        if missing:
+            raise ValueError(f"Missing atom columns: {', '.join(missing)}")
+
+    def __getattr__(self, name):
+        # Only called for attributes not set yet, i.e. lazy columns not decoded
+        loaders = self.__dict__.get("_loaders")
+        if not loaders or name not in loaders:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        with self._load_lock:
+            if name not in vars(self):
+                columns = self._loaders[name]()
+                for column, value in columns.items():
+                    value.flags.writeable = not self._frozen
+                    setattr(self, column, value)
+                    self._loaders.pop(column, None)
+                if not self._loaders:
+                    self._source_nbytes = 0
+        return vars(self)[name]
+
+    def load_columns(self, *names):
+        """Decode the given lazy columns (all of them by default) now"""
+        for name in names or tuple(self._loaders):
+            getattr(self, name)
+        return self
+
+    @classmethod
+    def from_structure(cls, structure):
+        """Build the columnar representation from a Bio.PDB Structure"""
+        model_ids = []
+        chain_ids, chain_model = [], []
+        residue_chain, residue_seq, residue_icode, residue_hetero, residue_names = [], [], [], [], []
+        atom_residue, coords, atom_names, elements = [], [], [], []
+
+        for model_index, model in enumerate(structure):
+            model_ids.append(model.serial_num)
+            for chain in model:
+                chain_index = len(chain_ids)
+                chain_ids.append(chain.id)
+                chain_model.append(model_index)
+                for residue in chain:
+                    residue_index = len(residue_seq)
+                    hetflag, resseq, icode = residue.id
+                    residue_chain.append(chain_index)
+                    residue_seq.append(resseq)
+                    residue_icode.append(icode)
+                    residue_hetero.append(hetflag != " ")
+                    residue_names.append(residue.get_resname())
+                    for atom in residue:
+                        atom_residue.append(residue_index)
+                        coords.append(atom.coord)
+                        atom_names.append(atom.get_name())
+                        elements.append(atom.element)
+
+        residue_name_codes, residue_name_categories = encode_labels(residue_names)
+        atom_name_codes, atom_name_categories = encode_labels(atom_names)
+        element_codes, element_categories = encode_labels(elements)
+
+        return cls(
+            structure_id=structure.id,
+            model_ids=model_ids,
+            chain_ids=chain_ids,
+            chain_model=chain_model,
+            residue_chain=residue_chain,
+            residue_seq=residue_seq,
+            residue_icode=residue_icode,
+            residue_hetero=residue_hetero,
+            residue_name_codes=residue_name_codes,
+            residue_names=residue_name_categories,
+            atom_residue=atom_residue,
+            coords=np.array(coords, dtype=np.float32) if coords else np.zeros((0, 3), dtype=np.float32),
+            atom_name_codes=atom_name_codes,
+            atom_names=atom_name_categories,
+            element_codes=element_codes,
+            elements=element_categories,
+        )
+
+    @property
+    def model_count(self):
+        return len(self.model_ids)
+
+    @property
+    def chain_count(self):
+        return len(self.chain_ids)
+
+    @property
+    def residue_count(self):
+        return len(self.residue_seq)
+
+    @property
+    def atom_count(self):
+        return len(self.atom_residue)
+
+    @property
+    def residue_model(self):
+        """Model index of every residue"""
+        return self.chain_model[self.residue_chain]
+
+    @property
+    def atom_chain(self):
+        """Chain row of every atom"""
+        return self.residue_chain[self.atom_residue]
+
+    @property
+    def atom_model(self):
+        """Model index of every atom"""
+        return self.chain_model[self.atom_chain]
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the arrays and any buffer pinned by lazy columns"""
+        # Copy the values first: another thread may be decoding a lazy column
+        arrays = sum(value.nbytes for value in tuple(vars(self).values()) if isinstance(value, np.ndarray))
+        return arrays + self._source_nbytes
+
+    def freeze(self):
+        """Mark every array read-only so the structure can be shared safely"""
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        self._frozen = True
+        return self
+
+    def residue_is_aa(self):
+        """Boolean mask of residues that are amino acids (Bio.PDB.is_aa semantics)"""
+        name_is_aa = np.array([is_aa(name) for name in self.residue_names], dtype=bool)
+        if name_is_aa.size == 0:
+            return np.zeros(self.residue_count, dtype=bool)
+        return name_is_aa[self.residue_name_codes]
+
+    def residue_types(self):
+        """Set of amino acid residue names present in the structure"""
+        codes = np.unique(self.residue_name_codes[self.residue_is_aa()])
+        return set(self.residue_names[codes].tolist())
+
+    def residue_composition(self, model_index=0):
+        """Amino acid residue counts by name in one model, most frequent first"""
+        selected = self.residue_is_aa() & (self.residue_model == model_index)
+        counts = np.bincount(self.residue_name_codes[selected], minlength=len(self.residue_names))
+        order = np.argsort(-counts, kind="stable")
+        return {str(self.residue_names[code]): int(counts[code]) for code in order if counts[code]}
+
+    def summary(self):
+        """Model, chain, residue and atom counts plus residue types
+
+        Matches the result of utils.structure_io.scan_pdb_records; per-chain
+        counts are those of the last model. Only index columns are touched,
+        so lazy atom columns stay undecoded.
+        """
+        return {
+            "number_of_models": self.model_count,
+            "chains": self.chain_counts(model_index=self.model_count - 1),
+            "residue_count": self.residue_count,
+            "atom_count": self.atom_count,
+            "residue_types": self.residue_types()
+        }
+
+    def chain_counts(self, model_index=None):
+        """Residue and atom counts per chain ID, optionally restricted to one model"""
+        residue_counts = np.bincount(self.residue_chain, minlength=self.chain_count)
+        atom_counts = np.bincount(self.atom_chain, minlength=self.chain_count)
+
+        chains = {}
+        for chain_index in range(self.chain_count):
+            if model_index is not None and self.chain_model[chain_index] != model_index:
+                continue
+            chain_id = str(self.chain_ids[chain_index])
+            counts = chains.setdefault(chain_id, {"residue_count": 0, "atom_count": 0})
+            counts["residue_count"] += int(residue_counts[chain_index])
+            counts["atom_count"] += int(atom_counts[chain_index])
+        return chains
+
+    def model_mask(self, model_index):
+        """Boolean atom mask selecting a single model"""
+        return self.atom_model == model_index
+
+    def atom_pair_frame(self, pairs):
+        """Label parallel atom-pair arrays with atom, residue and chain names
+
+        Name columns are categorical, so the frame costs a few bytes per pair
+        regardless of how many pairs share the same labels.
+        """
+        residue = pairs["residue"]
+        chain_codes, chain_categories = encode_labels(self.chain_ids)
+        return pd.DataFrame({
+            "atom1": pd.Categorical.from_codes(self.atom_name_codes[pairs["atom1"]], self.atom_names),
+            "atom2": pd.Categorical.from_codes(self.atom_name_codes[pairs["atom2"]], self.atom_names),
+            "residue": pd.Categorical.from_codes(self.residue_name_codes[residue], self.residue_names),
+            "chain": pd.Categorical.from_codes(chain_codes[self.residue_chain[residue]], chain_categories),
+            "distance": pairs["distance"],
+            "atom1_index": pairs["atom1"],
+            "atom2_index": pairs["atom2"],
+            "residue_index": residue
+        })
@@ -0,0 +1,154 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from config import STRUCTURE_CACHE_MAX_BYTES
+
+# Initialize the structure cache as a global object
+_structure_cache = None
+_structure_cache_lock = threading.Lock()
+
+# Nominal size charged for small entries (record scans, remembered parse failures)
+MIN_ENTRY_SIZE = 1024
+
+
+def get_structure_cache():
+    """Get or create the process-wide StructureCache instance"""
+    global _structure_cache
+    with _structure_cache_lock:
+        if _structure_cache is None:
+            _structure_cache = StructureCache(STRUCTURE_CACHE_MAX_BYTES)
+    return _structure_cache
+
+
+def fresh_exception(error):
+    """A new exception like error, without its traceback, for raising it again
+
+    Exceptions whose constructor doesn't take their args back become a
+    ValueError with the same message.
+    """
+    try:
+        return copy.copy(error)
+    except Exception:
+        return ValueError(str(error))
+
+
+def content_hash(data):
+    """SHA-256 hex digest of an upload's raw bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class StructureCache:
+    """Thread-safe LRU cache of parsed structures keyed by content hash
+
+    The cache is shared by every session and page in the server process, so
+    an upload is parsed once no matter how many reruns touch it. Entries are
+    evicted least-recently-used first once the total size of the cached
+    values exceeds max_bytes. Values that grow after insertion (lazily
+    decoded columns) are re-measured on every hit and before every eviction.
+    Parse failures are remembered too (as a copy without the traceback, so
+    no frames of the failed parse stay alive), so an invalid upload is not
+    re-parsed on every rerun either; each caller gets a fresh exception.
+
+    Cached values are shared between sessions and must not be modified.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Total size in bytes of the cached values"""
+        return self._size
+
+    @staticmethod
+    def _measure(value):
+        return max(getattr(value, "nbytes", 0), MIN_ENTRY_SIZE)
+
+    def _remeasure(self, key):
+        """Update the recorded size of an entry whose value may have grown (lock held)"""
+        value, error, size = self._entries[key]
+        new_size = self._measure(value)
+        if new_size != size:
+            self._entries[key] = (value, error, new_size)
+            self._size += new_size - size
+
+    def _evict(self):
+        """Drop least recently used entries until within budget (lock held)"""
+        while self._size > self.max_bytes and self._entries:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def _lookup(self, key):
+        """Return the cached entry for key and mark it recently used (lock held)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._remeasure(key)
+            self._evict()
+        return entry
+
+    def _store(self, key, value, error, size):
+        """Insert an entry and evict old ones until within budget (lock held)"""
+        if size > self.max_bytes:
+            return
+        for cached in self._entries:
+            self._remeasure(cached)
+        self._entries[key] = (value, error, size)
+        self._size += size
+        self._evict()
+
+    @staticmethod
+    def _unpack(entry):
+        value, error, _ = entry
+        if error is not None:
+            raise fresh_exception(error)
+        return value
+
+    def get_or_create(self, key, factory):
+        """Return the value cached under key, calling factory() on a miss
+
+        Concurrent callers asking for the same missing key wait for a single
+        factory call instead of each parsing the upload themselves.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return self._unpack(entry)
+            pending = self._pending.setdefault(key, threading.Lock())
+
+        with pending:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return self._unpack(entry)
+                self.misses += 1
+
+            try:
+                value, error = factory(), None
+            except Exception as e:
+                value, error = None, e
+
+            with self._lock:
+                self._store(key, value, None if error is None else fresh_exception(error), self._measure(value))
+                self._pending.pop(key, None)
+
+        if error is not None:
+            raise error
+        return value
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
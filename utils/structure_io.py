@@ -0,0 +1,605 @@
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import numpy as np
+from Bio.Data.IUPACData import atom_weights
+from Bio.PDB.Polypeptide import is_aa
+from utils.structure_arrays import StructureArrays, encode_labels
+
+# Bytes searched per step when indexing the lines of a large buffer
+INDEX_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Rows decoded per step when parsing fixed-width numeric columns
+DECODE_BLOCK_ROWS = 1 << 18
+
+# Compression of an upload, by file name suffix
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+# Decompressed bytes read per step when inflating a compressed upload
+INFLATE_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class MemoryReader(io.RawIOBase):
+    """Read-only raw stream over an in-memory buffer, without copying it
+
+    Wrapping an upload's memoryview in this reader lets parsers that expect
+    a file handle consume the uploaded bytes directly, so no temporary file
+    (or full second copy of the buffer) is ever created.
+    """
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(0, min(offset, len(self._view)))
+        return self._position
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._view) - self._position)
+        buffer[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+def open_text_buffer(data, encoding="utf-8"):
+    """Open an in-memory byte buffer as a text stream"""
+    return io.TextIOWrapper(io.BufferedReader(MemoryReader(data)), encoding=encoding)
+
+
+def open_binary_buffer(data):
+    """Open an in-memory byte buffer as a buffered binary stream"""
+    return io.BufferedReader(MemoryReader(data))
+
+
+def split_compression(name):
+    """Split a compression suffix off a file name: ("x.pdb.gz") -> ("x.pdb", "gzip")"""
+    root, suffix = os.path.splitext(name)
+    compression = COMPRESSION_SUFFIXES.get(suffix.lower())
+    if compression is None:
+        return name, None
+    return root, compression
+
+
+def open_compressed_buffer(data, compression):
+    """Open a compressed in-memory buffer as a stream of its decompressed bytes"""
+    raw = open_binary_buffer(data)
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(raw, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(raw, mode="rb")
+    raise ValueError(f"Unsupported compression '{compression}'.")
+
+
+def inflate_buffer(data, compression, max_size):
+    """Decompress an in-memory buffer chunk by chunk
+
+    Decompression streams from the compressed buffer into memory and stops
+    as soon as the output would exceed max_size, so a small archive cannot
+    inflate without bound (and nothing is written to disk).
+    """
+    inflated = bytearray()
+    try:
+        with open_compressed_buffer(data, compression) as stream:
+            while True:
+                chunk = stream.read(INFLATE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if len(inflated) + len(chunk) > max_size:
+                    raise ValueError(
+                        f"Decompressed size exceeds the maximum allowed size ({max_size / (1024 * 1024):.1f} MB).")
+                inflated += chunk
+    except (OSError, EOFError, lzma.LZMAError):
+        raise ValueError(f"Corrupt or truncated {compression} archive.") from None
+    return inflated
+
+
+def scan_pdb_records(stream):
+    """Scan PDB coordinate records in one pass and return structure counts
+
+    Only ATOM/HETATM/MODEL/ENDMDL/TER/END records are interpreted; the fixed
+    columns Bio.PDB relies on (residue number, chain, insertion code and
+    coordinates) are validated on the way. Memory use does not grow with
+    the number of atoms: only the current residue and the residue IDs and
+    counters of the chains of the current model are kept. Counts follow
+    Bio.PDB.PDBParser conventions (one implicit model when MODEL records
+    are absent, alternate locations counted once, chain counts taken from
+    the last model) for files whose residues are written contiguously, as
+    wwPDB files are. Residues are keyed like Bio.PDB residue IDs, so the
+    variants of a point mutation (one residue number, several residue names)
+    form one residue, counted with the atoms and name of the variant Bio.PDB
+    keeps (see segment_atoms), and a residue whose ID already appeared in
+    its chain (a chain ID reused later in the model) is not counted again.
+
+    stream yields lines as bytes. Raises ValueError on a malformed record.
+    """
+    model_count = 0
+    model_open = False
+    in_coordinates = False
+    chains = {}
+    chain_counts = None
+    chain_residues = {}
+    residue_keys = None
+    residue_count = 0
+    atom_count = 0
+    residue_names = set()
+
+    chain_id = None
+    residue_key = None
+    residue_chain = None
+    variants = {}
+    resname = None
+    first_blank = False
+    repeated = False
+
+    def close_residue():
+        # Count the variant Bio.PDB selects: the last one, unless the first has blank altlocs
+        nonlocal atom_count
+        if residue_key is not None and not repeated:
+            selected = next(iter(variants)) if first_blank else resname
+            residue_names.add(selected)
+            atom_count += len(variants[selected])
+            residue_chain["atom_count"] += len(variants[selected])
+
+    for line_number, line in enumerate(stream, 1):
+        line = line.rstrip(b"\r\n")
+        record = line[:6]
+
+        if record == b"ATOM  " or record == b"HETATM":
+            in_coordinates = True
+            if len(line) < 27:
+                raise ValueError(f"Truncated {record.decode().strip()} record at line {line_number}.")
+            try:
+                resseq = int(line[22:26])
+                float(line[30:38]), float(line[38:46]), float(line[46:54])
+            except ValueError:
+                raise ValueError(f"Invalid residue number or coordinates at line {line_number}.") from None
+
+            # Initialize the model - there was no explicit MODEL record
+            if not model_open:
+                close_residue()
+                residue_key = None
+                model_count += 1
+                model_open = True
+                chains = {}
+                chain_residues = {}
+                chain_id = None
+
+            # Bio.PDB residue ID: hetero flag (with the name for HETATM), number, insertion code
+            line_resname = line[17:20].strip()
+            if record == b"HETATM":
+                hetero_flag = b"W" if line_resname in (b"HOH", b"WAT") else b"H_" + line_resname
+            else:
+                hetero_flag = b" "
+            key = (hetero_flag, resseq, line[26:27])
+
+            if line[21:22] != chain_id:
+                close_residue()
+                residue_key = None
+                chain_id = line[21:22]
+                chain_counts = chains.setdefault(chain_id.decode("latin-1"), {"residue_count": 0, "atom_count": 0})
+                residue_keys = chain_residues.setdefault(chain_id, set())
+
+            if key != residue_key:
+                close_residue()
+                residue_key = key
+                residue_chain = chain_counts
+                variants = {}
+                first_blank = False
+                # Bio.PDB files a repeated residue ID under the first residue
+                # with it, whose atoms a copy of the chain only duplicates
+                repeated = key in residue_keys
+                if not repeated:
+                    residue_keys.add(key)
+                    residue_count += 1
+                    chain_counts["residue_count"] += 1
+
+            # Alternate locations of an atom share its name and count once
+            resname = line_resname
+            variants.setdefault(resname, set()).add(line[12:16])
+            if len(variants) == 1 and line[16:17] in (b" ", b""):
+                first_blank = True
+
+        elif record == b"MODEL ":
+            close_residue()
+            in_coordinates = True
+            model_count += 1
+            model_open = True
+            chains = {}
+            chain_residues = {}
+            chain_id = None
+            residue_key = None
+        elif record == b"ENDMDL":
+            close_residue()
+            model_open = False
+            chain_id = None
+            residue_key = None
+        elif in_coordinates and (record == b"END   " or record == b"CONECT"):
+            # End of atomic data
+            break
+
+    close_residue()
+
+    return {
+        "number_of_models": model_count,
+        "chains": chains,
+        "residue_count": residue_count,
+        "atom_count": atom_count,
+        "residue_types": {name.decode("latin-1") for name in residue_names if is_aa(name.decode("latin-1"))}
+    }
+
+
+def map_file(path):
+    """Memory-map a file read-only; pages are loaded lazily by the OS"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def guess_element(fullname, element):
+    """Element of an atom, guessed from its name when the element column is unusable
+
+    Mirrors Bio.PDB.Atom's rules so both parsing paths agree.
+    """
+    if element and element.capitalize() in atom_weights:
+        return element.upper()
+
+    name = fullname.strip()
+    if not name:
+        return "X"
+    if fullname[0].isalpha() and not fullname[2:].isdigit():
+        putative_element = name
+    elif name[0].isdigit():
+        putative_element = name[1:2]
+    else:
+        putative_element = name[0]
+
+    if putative_element.capitalize() in atom_weights:
+        return putative_element.upper()
+    return "X"
+
+
+def _decode_categories(codes, categories, transform):
+    """Apply transform to each category and re-encode, merging categories that collide"""
+    labels = np.array([transform(category) for category in categories.tolist()], dtype=str)
+    new_codes, new_categories = encode_labels(labels)
+    if len(new_codes) == 0:
+        return codes, new_categories
+    return new_codes[codes], new_categories
+
+
+def _parse_decimal(chars):
+    """Vectorized parse of fixed-width decimal fields given as an (n, width) uint8 array
+
+    Returns (values, valid); a field is valid when it holds an optionally
+    signed decimal number padded with blanks.
+    """
+    width = chars.shape[1]
+    is_digit = (chars >= 48) & (chars <= 57)
+    is_dot = chars == 46
+    is_sign = (chars == 45) | (chars == 43)
+    valid = (
+        np.all(is_digit | is_dot | is_sign | (chars == 32), axis=1)
+        & is_digit.any(axis=1)
+        & (is_dot.sum(axis=1) <= 1)
+        & (is_sign.sum(axis=1) <= 1)
+    )
+
+    # Power of ten carried by each column, relative to the decimal point
+    column = np.arange(width)
+    dot = np.where(is_dot.any(axis=1), is_dot.argmax(axis=1), width)[:, None]
+    exponent = np.where(column < dot, dot - column - 1, dot - column)
+    powers = 10.0 ** np.arange(-width, width + 1)
+
+    values = np.where(is_digit, (chars - 48) * powers[exponent + width], 0.0).sum(axis=1)
+    values[(chars == 45).any(axis=1)] *= -1
+    return values, valid
+
+
+def segment_atoms(atom_model, chain, resseq, icode, resname, hetatm, name_codes, occupancy, has_altloc):
+    """Group atom rows into residues and chains the way Bio.PDB's structure builder does
+
+    A residue starts wherever the model, chain, residue number, insertion
+    code or ATOM/HETATM flag changes from the previous row, or the residue
+    name changes between HETATM rows (hetero residue IDs include the name).
+    Point mutations, several residue names at one position, are one residue
+    keeping the rows of the variant Bio.PDB selects: the one listed last,
+    or the first one when it has atoms without an alternate location ID
+    (Bio.PDB then drops the later variants). Alternate locations are
+    resolved to one row per (residue, atom name), preferring the highest
+    occupancy like Bio.PDB's disordered atoms. occupancy and has_altloc
+    are callables so they are only decoded when needed.
+    Chains get one row per (model, chain ID) in order of first appearance,
+    and a chain ID that reappears later (e.g. waters listed after all
+    polymers) is merged into its first chain. A residue whose ID is already
+    in its chain (a chain ID reused for a copy of the chain) is dropped with
+    its atoms, as Bio.PDB files them under the first residue, whose atoms
+    they only duplicate.
+
+    Returns the input rows to keep, in chain-grouped order, plus the residue
+    and chain tables for them.
+    """
+    new_residue = np.ones(len(atom_model), dtype=bool)
+    new_residue[1:] = (
+        (atom_model[1:] != atom_model[:-1]) | (chain[1:] != chain[:-1]) | (resseq[1:] != resseq[:-1])
+        | (icode[1:] != icode[:-1]) | (hetatm[1:] != hetatm[:-1])
+        | (hetatm[1:] & (resname[1:] != resname[:-1]))
+    )
+    atom_residue = np.cumsum(new_residue) - 1
+
+    # Keep one variant of residues with several names
+    residue_start = np.flatnonzero(new_residue)
+    residue_last = np.flatnonzero(np.append(new_residue[1:], len(new_residue) > 0))
+    first_variant = resname == resname[residue_start][atom_residue]
+    keep = first_variant
+    if not first_variant.all():
+        first_blank = np.bincount(atom_residue[first_variant & ~has_altloc()], minlength=len(residue_start)) > 0
+        selected = np.where(first_blank, resname[residue_start], resname[residue_last])
+        keep = resname == selected[atom_residue]
+    candidates = np.flatnonzero(keep)
+    first = np.ones(len(candidates), dtype=bool)
+    first[1:] = atom_residue[candidates][1:] != atom_residue[candidates][:-1]
+    residue_first = candidates[first]
+
+    if len(candidates):
+        atom_key = atom_residue[candidates].astype(np.int64) * (int(name_codes.max()) + 1) + name_codes[candidates]
+        if len(np.unique(atom_key)) < len(atom_key):
+            order = np.lexsort((np.arange(len(atom_key)), -occupancy()[candidates], atom_key))
+            first_of_key = np.ones(len(order), dtype=bool)
+            first_of_key[1:] = atom_key[order][1:] != atom_key[order][:-1]
+            keep[:] = False
+            keep[candidates[order[first_of_key]]] = True
+
+    chain_codes, chain_categories = encode_labels(chain[residue_first])
+    width = max(len(chain_categories), 1)
+    chain_key = atom_model[residue_first].astype(np.int64) * width + chain_codes
+    unique_keys, first_index, inverse = np.unique(chain_key, return_index=True, return_inverse=True)
+    appearance = np.argsort(first_index, kind="stable")
+    rank = np.empty(len(appearance), dtype=np.int32)
+    rank[appearance] = np.arange(len(appearance))
+    ordered_keys = unique_keys[appearance]
+    residue_chain = rank[inverse.ravel()]
+
+    # Drop residues whose (chain, hetero flag, number, insertion code) came earlier
+    first_resname = np.unique(resname[residue_first], return_inverse=True)[1].ravel()
+    hetero_codes = np.where(hetatm[residue_first], first_resname + 1, 0)
+    icode_codes = np.unique(icode[residue_first], return_inverse=True)[1].ravel()
+    residue_key = np.stack((residue_chain, hetero_codes, resseq[residue_first], icode_codes), axis=1)
+    key_order = np.lexsort((np.arange(len(residue_first)), *residue_key.T[::-1]))
+    repeated = np.zeros(len(key_order), dtype=bool)
+    repeated[1:] = (residue_key[key_order][1:] == residue_key[key_order][:-1]).all(axis=1)
+    if repeated.any():
+        kept_residue = np.ones(len(residue_first), dtype=bool)
+        kept_residue[key_order[repeated]] = False
+        keep &= kept_residue[atom_residue]
+        renumber = np.cumsum(kept_residue) - 1
+        atom_residue = renumber[atom_residue]
+        residue_first = residue_first[kept_residue]
+        residue_chain = residue_chain[kept_residue]
+
+    # Group residues (and their atoms) by chain, keeping file order within a chain
+    residue_order = np.argsort(residue_chain, kind="stable")
+    residue_rank = np.empty(len(residue_order), dtype=np.int64)
+    residue_rank[residue_order] = np.arange(len(residue_order))
+    rows = np.flatnonzero(keep)
+    rows = rows[np.argsort(residue_rank[atom_residue[rows]], kind="stable")]
+
+    return {
+        "rows": rows,
+        "atom_residue": residue_rank[atom_residue[rows]],
+        "residue_first": residue_first[residue_order],
+        "residue_chain": residue_chain[residue_order],
+        "chain_ids": chain_categories[ordered_keys % width],
+        "chain_model": ordered_keys // width
+    }
+
+
+class PDBColumns:
+    """Fixed-column, vectorized reader over the coordinate records of a PDB buffer
+
+    The buffer (bytes, an upload's memoryview or a memory-mapped file) is
+    indexed once to find its ATOM/HETATM/MODEL/ENDMDL records; individual
+    columns are then decoded for all atoms at once with NumPy, never creating
+    per-atom Python objects. Columns are only decoded when requested, so a
+    count-only analysis never touches coordinates.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.buffer = np.frombuffer(data, dtype=np.uint8) if len(data) else np.zeros(0, dtype=np.uint8)
+        self._index_lines()
+
+    def _index_lines(self):
+        """Locate line boundaries and classify records, one chunk at a time"""
+        size = len(self.buffer)
+        newlines = [np.flatnonzero(self.buffer[offset:offset + INDEX_CHUNK_SIZE] == 10) + offset
+                    for offset in range(0, size, INDEX_CHUNK_SIZE)]
+        newlines = np.concatenate(newlines) if newlines else np.zeros(0, dtype=np.int64)
+
+        self.starts = np.concatenate(([0], newlines + 1))
+        self.ends = np.concatenate((newlines, [size]))
+        if len(self.starts) > 1 and self.starts[-1] >= size:
+            self.starts, self.ends = self.starts[:-1], self.ends[:-1]
+
+        # Drop carriage returns of CRLF line endings
+        carriage = (self.ends > self.starts) & (self.buffer[np.maximum(self.ends - 1, 0)] == 13) if size else \
+            np.zeros(len(self.ends), dtype=bool)
+        self.ends = self.ends - carriage
+
+        records = self.field(np.arange(len(self.starts)), 0, 6).view("S6").ravel()
+        self.records = records
+
+    def field(self, rows, start, stop):
+        """Bytes [start, stop) of the given lines as an (n, width) array, blank past line ends"""
+        chars = np.full((len(rows), stop - start), 32, dtype=np.uint8)
+        if len(self.buffer) == 0:
+            return chars
+
+        # Gather in row blocks to bound the size of the position temporaries
+        columns = np.arange(start, stop)
+        for block in range(0, len(rows), DECODE_BLOCK_ROWS):
+            block_rows = rows[block:block + DECODE_BLOCK_ROWS]
+            positions = self.starts[block_rows][:, None] + columns
+            inside = positions < self.ends[block_rows][:, None]
+            chars[block:block + DECODE_BLOCK_ROWS][inside] = self.buffer[positions[inside]]
+        return chars
+
+    def text(self, rows, start, stop):
+        """Fixed-width byte-string column for the given lines"""
+        return self.field(rows, start, stop).view(f"S{stop - start}").ravel()
+
+    def number(self, rows, start, stop, what):
+        """Decimal column for the given lines, decoded in bounded row blocks"""
+        values = np.empty(len(rows), dtype=np.float64)
+        for block in range(0, len(rows), DECODE_BLOCK_ROWS):
+            block_rows = rows[block:block + DECODE_BLOCK_ROWS]
+            decoded, valid = _parse_decimal(self.field(block_rows, start, stop))
+            if not valid.all():
+                line = int(block_rows[np.argmin(valid)]) + 1
+                raise ValueError(f"Invalid {what} at line {line}.")
+            values[block:block + DECODE_BLOCK_ROWS] = decoded
+        return values
+
+    def to_arrays(self, structure_id="structure"):
+        """Build StructureArrays whose atom columns are decoded lazily from this buffer"""
+        records = self.records
+        is_atom = (records == b"ATOM  ") | (records == b"HETATM")
+        is_model = records == b"MODEL "
+        is_endmdl = records == b"ENDMDL"
+
+        # Coordinate section starts at the first ATOM/HETATM/MODEL and ends at END/CONECT
+        is_coordinate = is_atom | is_model
+        first = int(np.argmax(is_coordinate)) if is_coordinate.any() else len(records)
+        is_end = (records == b"END   ") | (records == b"CONECT")
+        is_end[:first] = False
+        last = int(np.argmax(is_end)) if is_end.any() else len(records)
+        for mask in (is_atom, is_model, is_endmdl):
+            mask[last:] = False
+
+        atom_rows = np.flatnonzero(is_atom)
+        short = self.ends[atom_rows] - self.starts[atom_rows] < 27
+        if short.any():
+            raise ValueError(f"Truncated ATOM/HETATM record at line {int(atom_rows[np.argmax(short)]) + 1}.")
+
+        # Model of every atom: a MODEL record opens a model, and atoms found
+        # after ENDMDL without a new MODEL record open an implicit one
+        model_ids = []
+        atom_model = np.empty(len(atom_rows), dtype=np.int32)
+        events = np.flatnonzero(is_model | is_endmdl)
+        boundaries = np.concatenate(([0], events, [len(records)]))
+        model_open = False
+        for index in range(len(boundaries) - 1):
+            event = boundaries[index]
+            if index > 0:
+                if is_model[event]:
+                    serial = self.text(np.array([event]), 10, 14)[0].strip()
+                    model_ids.append(int(serial) if serial.isdigit() else len(model_ids))
+                    model_open = True
+                else:
+                    model_open = False
+            lo, hi = np.searchsorted(atom_rows, [event, boundaries[index + 1]])
+            if hi > lo and not model_open:
+                model_ids.append(len(model_ids))
+                model_open = True
+            atom_model[lo:hi] = len(model_ids) - 1
+
+        # Residue keys; a residue starts wherever any part of the key changes
+        chain = self.text(atom_rows, 21, 22)
+        resname = self.text(atom_rows, 17, 20)
+        icode = self.text(atom_rows, 26, 27)
+        hetatm = records[atom_rows] == b"HETATM"
+        resseq = self.number(atom_rows, 22, 26, "residue number")
+        if np.any(resseq != np.round(resseq)):
+            line = int(atom_rows[np.argmax(resseq != np.round(resseq))]) + 1
+            raise ValueError(f"Invalid residue number at line {line}.")
+        resseq = resseq.astype(np.int32)
+
+        name_codes, name_categories = encode_labels(self.text(atom_rows, 12, 16))
+        tables = segment_atoms(
+            atom_model, chain, resseq, icode, resname, hetatm, name_codes,
+            lambda: _parse_decimal(self.field(atom_rows, 54, 60))[0],
+            lambda: self.text(atom_rows, 16, 17) != b" "
+        )
+        row_residue, residue_first = tables["atom_residue"], tables["residue_first"]
+        atom_rows, name_codes = atom_rows[tables["rows"]], name_codes[tables["rows"]]
+
+        residue_name_codes, residue_names = encode_labels(resname[residue_first])
+        residue_name_codes, residue_names = _decode_categories(
+            residue_name_codes, residue_names, str.strip)
+
+        def load_coords():
+            coords = np.empty((len(atom_rows), 3), dtype=np.float32)
+            for axis, start in enumerate((30, 38, 46)):
+                coords[:, axis] = self.number(atom_rows, start, start + 8, "coordinates")
+            return {"coords": coords}
+
+        def load_atom_names():
+            def atom_name(fullname):
+                return fullname if len(fullname.split()) != 1 else fullname.strip()
+
+            codes, categories = _decode_categories(name_codes, name_categories, atom_name)
+            return {"atom_name_codes": codes, "atom_names": categories}
+
+        def load_elements():
+            # Guess once per distinct (atom name, element column) combination
+            element_codes, element_categories = encode_labels(self.text(atom_rows, 76, 78))
+            combined = name_codes.astype(np.int64) * max(len(element_categories), 1) + element_codes
+            combinations, inverse = np.unique(combined, return_inverse=True)
+            elements = np.array([
+                guess_element(name_categories[combination // max(len(element_categories), 1)],
+                              element_categories[combination % max(len(element_categories), 1)].strip())
+                for combination in combinations.tolist()
+            ], dtype=str)
+            codes, categories = encode_labels(elements)
+            codes = codes[inverse.ravel()] if len(codes) else np.zeros(0, dtype=np.int32)
+            return {"element_codes": codes, "elements": categories}
+
+        return StructureArrays(
+            structure_id=structure_id,
+            model_ids=model_ids,
+            chain_ids=tables["chain_ids"],
+            chain_model=tables["chain_model"],
+            residue_chain=tables["residue_chain"],
+            residue_seq=resseq[residue_first],
+            residue_icode=[code.decode("latin-1") or " " for code in icode[residue_first].tolist()],
+            residue_hetero=hetatm[residue_first],
+            residue_name_codes=residue_name_codes,
+            residue_names=residue_names,
+            atom_residue=row_residue,
+            loaders={
+                "coords": load_coords,
+                "atom_name_codes": load_atom_names,
+                "atom_names": load_atom_names,
+                "element_codes": load_elements,
+                "elements": load_elements
+            },
+            source_nbytes=0 if isinstance(self.data, mmap.mmap) else len(self.data)
+        )
+
+
+def parse_pdb_columns(data, structure_id="structure"):
+    """Parse a PDB buffer straight into lazily decoded StructureArrays"""
+    return PDBColumns(data).to_arrays(structure_id)
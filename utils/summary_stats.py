@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class DistanceSummary:
+    """Running summary of a stream of atom-pair distances
+
+    Blocks of distances are folded in as they are computed: count, mean and
+    variance are merged with Chan's parallel update, the extremes keep the
+    identity (atom indices) of the pair they came from, and a fixed-bin
+    histogram accumulates counts. Memory stays constant however many pairs
+    pass through, so nothing needs to keep the full pair list around.
+    """
+
+    __slots__ = ("edges", "histogram", "count", "mean", "_m2",
+                 "min", "max", "argmin", "argmax")
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.histogram = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.argmin = None
+        self.argmax = None
+
+    def update(self, distance, atom1, atom2):
+        """Fold in a block of distances with the atom indices of each pair"""
+        distance = np.asarray(distance, dtype=np.float64).ravel()
+        if distance.size == 0:
+            return self
+        atom1, atom2 = np.ravel(atom1), np.ravel(atom2)
+
+        count = distance.size
+        mean = float(distance.mean())
+        m2 = float(np.square(distance - mean).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+        low, high = int(distance.argmin()), int(distance.argmax())
+        if distance[low] < self.min:
+            self.min, self.argmin = float(distance[low]), (int(atom1[low]), int(atom2[low]))
+        if distance[high] > self.max:
+            self.max, self.argmax = float(distance[high]), (int(atom1[high]), int(atom2[high]))
+
+        # Values outside the edges land in the first or last bin
+        bins = np.searchsorted(self.edges, distance, side="right") - 1
+        np.clip(bins, 0, len(self.histogram) - 1, out=bins)
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+        return self
+
+    @property
+    def variance(self):
+        """Population variance of the distances seen so far"""
+        return self._m2 / self.count if self.count else float("nan")
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
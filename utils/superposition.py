@@ -0,0 +1,301 @@
+import numpy as np
+from Bio.Align import PairwiseAligner, substitution_matrices
+from Bio.Data.PDBData import protein_letters_3to1_extended
+
+# Atoms compared for each superposition mode
+SUPERPOSITION_ATOMS = {
+    "ca": ("CA",),
+    "backbone": ("N", "CA", "C", "O")
+}
+
+# Global alignment scoring (EMBOSS needle defaults)
+_BLOSUM62 = substitution_matrices.load("BLOSUM62")
+ALIGN_OPEN_GAP_SCORE = -10.0
+ALIGN_EXTEND_GAP_SCORE = -0.5
+
+
+def _aligner():
+    return PairwiseAligner(
+        mode="global",
+        substitution_matrix=_BLOSUM62,
+        open_gap_score=ALIGN_OPEN_GAP_SCORE,
+        extend_gap_score=ALIGN_EXTEND_GAP_SCORE
+    )
+
+
+def chain_sequences(arrays, model_index=0):
+    """One-letter sequence and residue indices of every amino acid chain in a model
+
+    Returns a dict keyed by chain ID, in order of appearance. A chain ID that
+    occurs several times in the model keeps its first occurrence.
+    """
+    letters = np.array([
+        protein_letters_3to1_extended.get(name, "X") if name else "X" for name in arrays.residue_names
+    ] or ["X"])
+    letters[~np.isin(letters, list(_BLOSUM62.alphabet))] = "X"
+
+    residues = np.flatnonzero(arrays.residue_is_aa() & (arrays.residue_model == model_index))
+    chains = {}
+    for chain_index in np.unique(arrays.residue_chain[residues]).tolist():
+        chain_id = str(arrays.chain_ids[chain_index])
+        if chain_id in chains:
+            continue
+        chain_residues = residues[arrays.residue_chain[residues] == chain_index]
+        chains[chain_id] = {
+            "sequence": "".join(letters[arrays.residue_name_codes[chain_residues]].tolist()),
+            "residues": chain_residues
+        }
+    return chains
+
+
+def align_residues(sequence1, sequence2):
+    """Globally align two sequences and return the indices of aligned positions
+
+    Only positions aligned to each other (not gaps) are returned, along with
+    the fraction of them that are identical.
+    """
+    if not sequence1 or not sequence2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 0.0
+    if sequence1 == sequence2:
+        # Poses and conformers of one molecule need no alignment
+        positions = np.arange(len(sequence1))
+        return positions, positions, 1.0
+
+    blocks = _aligner().align(sequence1, sequence2)[0].aligned
+    positions1 = np.concatenate([np.arange(start, end) for start, end in blocks[0]] or [np.zeros(0, dtype=np.int64)])
+    positions2 = np.concatenate([np.arange(start, end) for start, end in blocks[1]] or [np.zeros(0, dtype=np.int64)])
+
+    chars1 = np.frombuffer(sequence1.encode("ascii"), dtype=np.uint8)
+    chars2 = np.frombuffer(sequence2.encode("ascii"), dtype=np.uint8)
+    identity = float(np.mean(chars1[positions1] == chars2[positions2])) if len(positions1) else 0.0
+    return positions1, positions2, identity
+
+
+def align_chains(chains1, chains2):
+    """Pair the chains of two chain_sequences() results and align each pair
+
+    Chains are paired by ID; when the structures share no chain IDs, chains
+    are paired in order of appearance instead. Yields (chain ID 1, chain ID 2,
+    positions 1, positions 2, identity) per pair, with positions indexing
+    each chain's residues.
+    """
+    common = [chain_id for chain_id in chains1 if chain_id in chains2]
+    if common:
+        pairs = [(chain_id, chain_id) for chain_id in common]
+    else:
+        pairs = list(zip(chains1, chains2))
+
+    for chain1, chain2 in pairs:
+        positions1, positions2, identity = align_residues(chains1[chain1]["sequence"], chains2[chain2]["sequence"])
+        yield chain1, chain2, positions1, positions2, identity
+
+
+def map_residues(arrays1, arrays2):
+    """Map equivalent residues of two structures by aligning their chain sequences
+
+    Returns the paired chain IDs, the parallel residue index arrays and
+    per-chain sequence identities (see align_chains for how chains pair up).
+    """
+    chains1, chains2 = chain_sequences(arrays1), chain_sequences(arrays2)
+
+    pairs, residues1, residues2, pair_index, identities = [], [], [], [], []
+    for index, (chain1, chain2, positions1, positions2, identity) in enumerate(align_chains(chains1, chains2)):
+        pairs.append((chain1, chain2))
+        residues1.append(chains1[chain1]["residues"][positions1])
+        residues2.append(chains2[chain2]["residues"][positions2])
+        pair_index.append(np.full(len(positions1), index, dtype=np.int32))
+        identities.append(identity)
+
+    def join(parts, dtype):
+        return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+    return {
+        "chain_pairs": pairs,
+        "residues1": join(residues1, np.int64),
+        "residues2": join(residues2, np.int64),
+        "chain_pair": join(pair_index, np.int32),
+        "identity": identities
+    }
+
+
+def residue_atoms(arrays, atom_name):
+    """Atom index of the named atom in every residue, or -1 where it is missing"""
+    index = np.full(arrays.residue_count, -1, dtype=np.int64)
+    codes = np.flatnonzero(arrays.atom_names == atom_name)
+    if len(codes):
+        atoms = np.flatnonzero(np.isin(arrays.atom_name_codes, codes))
+        index[arrays.atom_residue[atoms]] = atoms
+    return index
+
+
+def kabsch(mobile, target, groups=None, group_count=None):
+    """Optimal superposition of paired point sets with the Kabsch algorithm
+
+    Points can be split into independent groups (e.g. one per chain); every
+    group is fitted at once with batched covariance sums and a stacked SVD.
+    Returns per-group rotations (applied as R @ x), translations and RMSDs,
+    plus the deviation of every point after its group's fit.
+    """
+    mobile = np.asarray(mobile, dtype=np.float64).reshape(-1, 3)
+    target = np.asarray(target, dtype=np.float64).reshape(-1, 3)
+    if groups is None:
+        groups = np.zeros(len(mobile), dtype=np.int64)
+    if group_count is None:
+        group_count = int(groups.max()) + 1 if len(groups) else 0
+
+    counts = np.bincount(groups, minlength=group_count).astype(np.float64)
+    safe_counts = np.maximum(counts, 1)[:, None]
+    mobile_center = np.stack([np.bincount(groups, mobile[:, axis], group_count) for axis in range(3)], axis=1) / safe_counts
+    target_center = np.stack([np.bincount(groups, target[:, axis], group_count) for axis in range(3)], axis=1) / safe_counts
+
+    mobile_centered = mobile - mobile_center[groups]
+    target_centered = target - target_center[groups]
+
+    # Per-group covariance matrices H = sum(m^T t)
+    outer = np.einsum("ni,nj->nij", mobile_centered, target_centered).reshape(-1, 9)
+    covariance = np.stack([np.bincount(groups, outer[:, k], group_count) for k in range(9)], axis=1).reshape(-1, 3, 3)
+
+    u, _, vt = np.linalg.svd(covariance)
+    # Flip the smallest singular vector where needed to avoid reflections
+    sign = np.sign(np.linalg.det(np.matmul(u, vt)))
+    sign[sign == 0] = 1
+    vt[:, 2, :] *= sign[:, None]
+    rotation = np.matmul(u, vt).transpose(0, 2, 1)
+    translation = target_center - np.einsum("gij,gj->gi", rotation, mobile_center)
+
+    fitted = np.einsum("nij,nj->ni", rotation[groups], mobile_centered)
+    squared = np.sum((fitted - target_centered) ** 2, axis=1)
+    rmsd = np.sqrt(np.bincount(groups, squared, group_count) / np.maximum(counts, 1))
+
+    return {
+        "rotation": rotation,
+        "translation": translation,
+        "rmsd": rmsd,
+        "deviation": np.sqrt(squared)
+    }
+
+
+def superpose_structures(arrays1, arrays2, atoms="ca"):
+    """Sequence-aligned superposition of the first models of two structures
+
+    Residues are mapped by aligning chain sequences, and the mapped Cα (or
+    backbone N/CA/C/O) atoms are superposed globally and chain by chain.
+    Per-residue deviations come from the global fit (RMS over the residue's
+    atoms in backbone mode) and are labelled with the chain ID and residue
+    number of the first structure. Returns None when no atoms can be paired.
+    """
+    if atoms not in SUPERPOSITION_ATOMS:
+        raise ValueError(f"Unknown superposition atoms '{atoms}'. Expected one of: {', '.join(SUPERPOSITION_ATOMS)}")
+
+    mapping = map_residues(arrays1, arrays2)
+    residues1, residues2 = mapping["residues1"], mapping["residues2"]
+
+    # Pair up the selected atoms present in both mapped residues
+    atoms1, atoms2, owner = [], [], []
+    for atom_name in SUPERPOSITION_ATOMS[atoms]:
+        index1 = residue_atoms(arrays1, atom_name)[residues1]
+        index2 = residue_atoms(arrays2, atom_name)[residues2]
+        both = (index1 >= 0) & (index2 >= 0)
+        atoms1.append(index1[both])
+        atoms2.append(index2[both])
+        owner.append(np.flatnonzero(both))
+    atoms1, atoms2, owner = np.concatenate(atoms1), np.concatenate(atoms2), np.concatenate(owner)
+    if len(owner) < 3:
+        return None
+
+    order = np.argsort(owner, kind="stable")
+    atoms1, atoms2, owner = atoms1[order], atoms2[order], owner[order]
+    mobile, target = arrays2.coords[atoms2], arrays1.coords[atoms1]
+
+    overall = kabsch(mobile, target)
+    chain_pair = mapping["chain_pair"][owner]
+    per_chain = kabsch(mobile, target, chain_pair, len(mapping["chain_pairs"]))
+
+    # Residues with at least one paired atom, and their RMS deviation
+    paired = np.unique(owner)
+    atom_counts = np.bincount(owner, minlength=len(residues1))
+    squared = np.bincount(owner, overall["deviation"] ** 2, minlength=len(residues1))
+    deviation = np.sqrt(squared[paired] / atom_counts[paired]).astype(np.float32)
+
+    atom_pair_counts = np.bincount(chain_pair, minlength=len(mapping["chain_pairs"]))
+    residue_pair_counts = np.bincount(mapping["chain_pair"][paired], minlength=len(mapping["chain_pairs"]))
+    chains = {}
+    for index, (chain1, chain2) in enumerate(mapping["chain_pairs"]):
+        label = chain1 if chain1 == chain2 else f"{chain1}/{chain2}"
+        chains[label] = {
+            "aligned_residues": int(residue_pair_counts[index]),
+            "sequence_identity": mapping["identity"][index],
+            "rmsd": float(per_chain["rmsd"][index]) if atom_pair_counts[index] >= 3 else None
+        }
+
+    residues1, residues2 = residues1[paired], residues2[paired]
+    return {
+        "atoms": atoms,
+        "aligned_residues": int(len(paired)),
+        "aligned_atoms": int(len(owner)),
+        "rmsd": float(overall["rmsd"][0]),
+        "rotation": overall["rotation"][0],
+        "translation": overall["translation"][0],
+        "chains": chains,
+        "residues1": residues1,
+        "residues2": residues2,
+        "residue_chain": arrays1.chain_ids[arrays1.residue_chain[residues1]],
+        "residue_seq": arrays1.residue_seq[residues1],
+        "residue_deviation": deviation
+    }
+
+
+def ca_trace(arrays, model_index=0):
+    """Sequence and Cα coordinates of every amino acid chain in a model
+
+    Extends chain_sequences() with a "coords" array per chain holding one
+    Cα position per residue (NaN where the Cα atom is missing). Traces are
+    all that batch comparisons need, so they are cheap to ship to workers.
+    """
+    chains = chain_sequences(arrays, model_index)
+    ca = residue_atoms(arrays, "CA")
+    for chain in chains.values():
+        index = ca[chain["residues"]]
+        coords = np.full((len(index), 3), np.nan)
+        coords[index >= 0] = arrays.coords[index[index >= 0]]
+        chain["coords"] = coords
+    return chains
+
+
+def tm_score_like(deviation, length):
+    """TM-score style similarity from per-residue deviations after superposition
+
+    Uses the TM-score distance scale d0 for a protein of the given length,
+    but on the RMSD-optimal superposition rather than a TM-optimal one, so
+    it is a lower bound of the true TM-score.
+    """
+    if length <= 0:
+        return 0.0
+    d0 = max(1.24 * np.cbrt(max(length - 15, 0)) - 1.8, 0.5)
+    return float(np.sum(1.0 / (1.0 + (deviation / d0) ** 2)) / length)
+
+
+def trace_similarity(trace1, trace2):
+    """Cα RMSD and TM-like score of two ca_trace() results after superposition
+
+    Returns (rmsd, tm_score, aligned residues); rmsd is NaN when fewer than
+    three residues could be paired. The TM-like score is normalized by the
+    shorter trace, so it is symmetric.
+    """
+    target, mobile = [], []
+    for chain1, chain2, positions1, positions2, _ in align_chains(trace1, trace2):
+        target.append(trace1[chain1]["coords"][positions1])
+        mobile.append(trace2[chain2]["coords"][positions2])
+    if not target:
+        return np.nan, 0.0, 0
+
+    target, mobile = np.concatenate(target), np.concatenate(mobile)
+    paired = ~(np.isnan(target).any(axis=1) | np.isnan(mobile).any(axis=1))
+    target, mobile = target[paired], mobile[paired]
+    if len(target) < 3:
+        return np.nan, 0.0, int(len(target))
+
+    fit = kabsch(mobile, target)
+    length = min(sum(len(chain["coords"]) for chain in trace1.values()),
+                 sum(len(chain["coords"]) for chain in trace2.values()))
+    return float(fit["rmsd"][0]), tm_score_like(fit["deviation"], length), int(len(target))